@@ -0,0 +1,70 @@
+"""
+Admin endpoints
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from typing import Any, Dict
+
+from app.core.auth import require_admin
+from app.core.profiling import profile_store, profiling_enabled
+from app.core.admission import admission
+from app.core.scheduler import schedulers
+from app.core.config import settings
+from app.core.cancellation import job_registry
+from app.core.deadline import stage_budgets
+from app.services.prewarm import prewarm_store
+from app.services.idempotency import idempotency
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/profiles")
+async def list_profiles() -> Dict[str, Any]:
+    """
+    List captured request profiles, newest first
+    
+    Send `X-Profile: 1` with `X-Admin-Token` on any request to profile it.
+    """
+    return {
+        "enabled": profiling_enabled(),
+        "sample_rate": settings.PROFILING_SAMPLE_RATE,
+        "profiles": profile_store.list()
+    }
+
+@router.get("/profiles/{request_id}")
+async def get_profile(request_id: str) -> FileResponse:
+    """Download a profile in speedscope format (open at https://www.speedscope.app)"""
+    path = profile_store.path_for(request_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"No profile for request {request_id}")
+    return FileResponse(path, media_type="application/json", filename=f"{request_id}.speedscope.json")
+
+@router.get("/admission")
+async def admission_metrics() -> Dict[str, Any]:
+    """Admission control counters, queue depth and per-user load for this worker"""
+    return admission.metrics(per_user=True)
+
+@router.get("/scheduler")
+async def scheduler_metrics() -> Dict[str, Any]:
+    """Per-lane grants and wait times for each upstream scheduler on this worker"""
+    return {name: scheduler.metrics() for name, scheduler in schedulers.items()}
+
+@router.get("/prewarm")
+async def prewarm_metrics() -> Dict[str, Any]:
+    """Speculative analysis hits, misses and wasted work on this worker"""
+    return prewarm_store.metrics()
+
+@router.get("/idempotency")
+async def idempotency_metrics() -> Dict[str, Any]:
+    """Executed, attached and replayed job counts on this worker"""
+    return idempotency.metrics()
+
+@router.get("/cancellation")
+async def cancellation_metrics() -> Dict[str, Any]:
+    """Cancelled jobs and the upstream calls they never made on this worker"""
+    return {**job_registry.metrics(), "jobs": job_registry.running()}
+
+@router.get("/deadlines")
+async def deadline_metrics() -> Dict[str, Any]:
+    """Per-stage timeouts, skipped stages and degradations on this worker"""
+    return stage_budgets.metrics()
@@ -3,26 +3,31 @@ AI content generation endpoints
 """
 
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from typing import Optional, Dict, Any
 import time
 
-from app.models.content import ContentRequest, ContentResponse
-from app.services.ai_service import AIService
-from app.core.auth import verify_clerk_token
+from app.models.content import ContentRequest, ContentResponse, PrewarmRequest
+from app.services.registry import services
+from app.services.prewarm import prewarm_store
+from app.services.artifact_store import artifact_store
+from app.services.idempotency import IdempotencyConflict, idempotency, request_fingerprint
+from app.core.config import settings
+from app.core.cancellation import JobCancelled, job_registry
+from app.core.auth import Caller, get_caller, get_current_user
+from app.core.responses import ORJSONResponse
 
 router = APIRouter()
 
-# Initialize AI service
-ai_service = AIService()
-
-# Optional auth for local development
-security = HTTPBearer(auto_error=False)
+# AIService is built lazily by the service registry
+get_ai_service = services.dependency("ai")
 
 @router.post("/generate-copy", response_model=ContentResponse)
 async def generate_copy(
     request: ContentRequest,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> ContentResponse:
+    auth: Optional[Dict[str, Any]] = Depends(get_current_user),
+    caller: Caller = Depends(get_caller),
+    ai_service=Depends(get_ai_service)
+) -> ORJSONResponse:
     """
     Generate enhanced marketing copy using AI copywriting intelligence
     
@@ -30,33 +35,80 @@ async def generate_copy(
     1. Business analysis and strategy development
     2. Copywriting with industry-specific intelligence
     3. Validation and conformance to constraints
+    
+    With a `job_id`, a retry while the job runs waits for the same result
+    and a retry after it succeeded replays it (`Idempotency-Status` header).
+    The job can be stopped with POST /api/jobs/{job_id}/cancel.
     """
     
-    try:
-        # Verify auth (optional for local development)
-        auth = await verify_clerk_token(credentials)
-        
+    async def generate() -> ContentResponse:
         start_time = time.time()
         
         # Generate content using enhanced AI service
         response = await ai_service.generate_content(request)
+        if response.success:
+            artifact_store.put("copy", response.model_dump(include={"copy_data", "localized_copy", "alternatives"}),
+                               project_id=request.project_id, job_id=request.job_id)
         
         # Add timing information
         generation_time = time.time() - start_time
         response.message += f" (Generated in {generation_time:.2f}s)"
-        
         return response
+    
+    try:
+        # Retries for the same job attach to the running generation or replay its result
+        job_id = request.job_id if settings.IDEMPOTENCY_ENABLED else None
+        # Analysis plus one copy call per locale
+        expected = {"gemini": 1 + len(request.locales or [None])}
+        with job_registry.track(request.job_id if settings.CANCELLATION_ENABLED else None, "ai.generate_copy",
+                                expected, owner=caller.key):
+            response, outcome = await idempotency.run(
+                "ai.generate_copy", job_id, request_fingerprint(request), generate, ContentResponse,
+                succeeded=lambda result: result.success, owner=caller.key
+            )
+        
+        # Serialized once by pydantic-core; skips response_model re-validation
+        return ORJSONResponse(response, headers={"Idempotency-Status": outcome})
         
+    except (IdempotencyConflict, JobCancelled) as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Content generation failed: {str(e)}"
         )
 
+@router.post("/prewarm", status_code=202)
+async def prewarm_analysis(
+    request: PrewarmRequest,
+    auth: Optional[Dict[str, Any]] = Depends(get_current_user),
+    caller: Caller = Depends(get_caller),
+    ai_service=Depends(get_ai_service)
+) -> dict:
+    """
+    Start the business analysis stage speculatively for a project
+    
+    Called when a project is saved. The result is parked for PREWARM_TTL
+    seconds and picked up by the next generation for the same project if
+    its business info and features haven't changed. Saves in quick
+    succession are debounced, and each user's prewarms are capped.
+    """
+    
+    content_request = ContentRequest.model_construct(
+        business_info=request.business_info,
+        selected_features=request.selected_features,
+        additional_context=None,
+        project_id=request.project_id
+    )
+    status = await prewarm_store.start(request.project_id, content_request, ai_service._analyze_business,
+                                       owner=caller.key)
+    return {"project_id": request.project_id, "status": status, "ttl": prewarm_store.ttl}
+
 @router.post("/test-analysis")
 async def test_business_analysis(
     request: ContentRequest,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    auth: Optional[Dict[str, Any]] = Depends(get_current_user),
+    ai_service=Depends(get_ai_service)
 ) -> dict:
     """
     Test endpoint to see the business analysis stage output
@@ -64,14 +116,11 @@ async def test_business_analysis(
     """
     
     try:
-        # Verify auth (optional for local development)
-        auth = await verify_clerk_token(credentials)
-        
         # Only run the analysis stage
         analysis = await ai_service._analyze_business(request)
         
         return {
-            "business_info": request.business_info.dict(),
+            "business_info": request.business_info.model_dump(),
             "selected_features": request.selected_features,
             "analysis": analysis
         }
@@ -0,0 +1,39 @@
+"""
+Rendered file downloads from the local blob store
+"""
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+
+from app.services.blob_store import blob_store
+from app.core.config import settings
+
+router = APIRouter()
+
+@router.api_route("/{name}", methods=["GET", "HEAD"])
+async def get_blob(name: str, request: Request) -> Response:
+    """
+    Download a rendered PDF or PNG by content digest
+    
+    Blobs never change, so the digest is a strong ETag and responses can
+    be cached for a year. Range requests are honored, and servers with
+    the ASGI pathsend extension send the file without copying it through
+    Python.
+    """
+    
+    resolved = blob_store.resolve(name)
+    if resolved is None:
+        raise HTTPException(status_code=404, detail="Blob not found")
+    path, digest, media_type = resolved
+    
+    headers = {
+        "ETag": f'"{digest}"',
+        "Cache-Control": f"public, max-age={settings.BLOB_CACHE_MAX_AGE}, immutable",
+    }
+    
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or f'"{digest}"' in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    
+    return FileResponse(path, media_type=media_type, headers=headers,
+                        filename=name, content_disposition_type="inline")
@@ -0,0 +1,126 @@
+"""
+End-to-end brochure pipeline endpoint
+"""
+
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from typing import Optional, Dict, Any, AsyncIterator
+import asyncio
+import time
+
+import orjson
+
+from app.models.content import BrochureRequest, BrochureResponse
+from app.services.brochure_pipeline import BrochurePipeline
+from app.services.registry import services
+from app.services.job_status import job_status
+from app.core.auth import Caller, get_caller, get_current_user
+from app.core.lifecycle import inflight_renders
+from app.core.progress import combine_callbacks
+from app.core.responses import ORJSONResponse
+from app.core.config import settings
+from app.core.cancellation import JobCancelled, job_registry
+from app.services.idempotency import IdempotencyConflict, idempotency, request_fingerprint
+
+router = APIRouter()
+
+# Analysis + copy, then PDF + PNG
+PIPELINE_UPSTREAM_CALLS = {"gemini": 2, "hcti": 2}
+
+get_ai_service = services.dependency("ai")
+get_render_service = services.dependency("render")
+
+async def _stream_events(pipeline: BrochurePipeline, request: BrochureRequest, owner: str) -> AsyncIterator[bytes]:
+    """Run the pipeline in a task and yield its progress as NDJSON lines"""
+    
+    queue: asyncio.Queue = asyncio.Queue()
+    start = time.perf_counter()
+    
+    async def on_stage(stage: str, status: str, **data: Any) -> None:
+        await queue.put({
+            "event": "stage",
+            "stage": stage,
+            "status": status,
+            "elapsed": round(time.perf_counter() - start, 3),
+            **data
+        })
+    
+    async def run() -> None:
+        try:
+            with job_registry.track(request.job_id if settings.CANCELLATION_ENABLED else None,
+                                    "brochure.stream", PIPELINE_UPSTREAM_CALLS, owner=owner):
+                async with inflight_renders.track():
+                    result = await pipeline.run(
+                        request, on_stage=combine_callbacks(on_stage, job_status.stage_callback(request.job_id))
+                    )
+            await queue.put({"event": "result", "result": result.model_dump(mode="json")})
+        except JobCancelled as e:
+            await queue.put({"event": "error", "detail": str(e)})
+        except Exception as e:
+            await queue.put({"event": "error", "detail": f"Brochure pipeline failed: {str(e)}"})
+        finally:
+            await queue.put(None)
+    
+    task = asyncio.create_task(run())
+    try:
+        while True:
+            event = await queue.get()
+            if event is None:
+                break
+            yield orjson.dumps(event) + b"\n"
+    finally:
+        # Client went away before the end - stop the pipeline
+        if not task.done():
+            task.cancel()
+
+@router.post("/generate", response_model=BrochureResponse)
+async def generate_brochure(
+    request: BrochureRequest,
+    auth: Optional[Dict[str, Any]] = Depends(get_current_user),
+    caller: Caller = Depends(get_caller),
+    ai_service=Depends(get_ai_service),
+    render_service=Depends(get_render_service)
+):
+    """
+    Generate copy and render the brochure in one call
+    
+    Replaces the /api/ai/generate-copy + /api/render/generate round trip:
+    1. Business analysis, copywriting and validation
+    2. HTML render, PDF and PNG generation
+    
+    Asset downloads overlap with the AI stages. With `stream: true` the
+    response is NDJSON: one `stage` event per stage transition, then a
+    final `result` (or `error`) event. Job progress is also pushed to the
+    job status callback sink when one is configured.
+    
+    Non-streaming requests are idempotent by `job_id`: a retry while the
+    job runs attaches to it, a retry after it succeeded replays the result.
+    Either kind can be stopped with POST /api/jobs/{job_id}/cancel.
+    """
+    
+    pipeline = BrochurePipeline(ai_service, render_service)
+    
+    if request.stream:
+        return StreamingResponse(_stream_events(pipeline, request, caller.key), media_type="application/x-ndjson")
+    
+    try:
+        job_id = request.job_id if settings.IDEMPOTENCY_ENABLED else None
+        with job_registry.track(request.job_id if settings.CANCELLATION_ENABLED else None,
+                                "brochure.generate", PIPELINE_UPSTREAM_CALLS, owner=caller.key):
+            async with inflight_renders.track():
+                result, outcome = await idempotency.run(
+                    "brochure.generate", job_id, request_fingerprint(request),
+                    lambda: pipeline.run(request, on_stage=job_status.stage_callback(request.job_id)),
+                    BrochureResponse, succeeded=lambda result: result.success, owner=caller.key
+                )
+        
+        # Serialized once by pydantic-core; skips response_model re-validation
+        return ORJSONResponse(result, headers={"Idempotency-Status": outcome})
+        
+    except (IdempotencyConflict, JobCancelled) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Brochure generation failed: {str(e)}"
+        )
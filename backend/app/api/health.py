@@ -2,60 +2,160 @@
 Health check endpoints
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from typing import Dict, Any
 import time
 import os
 
+from app.core.startup import startup_timer
+from app.services.health_prober import health_prober
+from app.services.registry import services
+from app.services.job_status import job_status
+from app.core.admission import admission
+from app.core.scheduler import schedulers
+from app.services.prewarm import prewarm_store
+from app.services.artifact_store import artifact_store
+from app.services.blob_store import blob_store
+from app.services.idempotency import idempotency
+from app.core.cancellation import job_registry
+from app.core.deadline import stage_budgets
+from app.core.shared_state import shared_state
+from app.core.auth import require_admin
+from app.core.config import settings
+
 router = APIRouter()
 
 @router.get("/health")
 async def health_check() -> Dict[str, Any]:
-    """Basic health check endpoint"""
+    """Basic health check endpoint, with the prober's verdict per upstream"""
     return {
         "status": "healthy",
         "timestamp": time.time(),
         "service": "Polario API",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "upstreams": {name: upstream["status"] for name, upstream in health_prober.snapshot.items()}
     }
 
-@router.get("/health/detailed")
+def _config_checks() -> Dict[str, Dict[str, str]]:
+    # From settings, which also reads .env, rather than the raw environment
+    return {
+        "google_ai": {
+            "status": "ok" if settings.GOOGLE_AI_API_KEY else "missing",
+            "message": "Google AI API key configured" if settings.GOOGLE_AI_API_KEY else "Google AI API key missing"
+        },
+        "clerk_auth": {
+            "status": "ok" if settings.CLERK_SECRET_KEY else "missing",
+            "message": "Clerk authentication configured" if settings.CLERK_SECRET_KEY else "Clerk keys missing"
+        }
+    }
+
+@router.get("/health/detailed", dependencies=[Depends(require_admin)])
 async def detailed_health_check() -> Dict[str, Any]:
-    """Detailed health check with service dependencies"""
+    """
+    Detailed health check with service dependencies (admin only)
     
-    status = "healthy"
-    checks = {}
+    Answers from state cached by the background prober; no upstream calls
+    are made per request.
+    """
+    
+    checks = _config_checks()
+    
+    # Upstream reachability and latency from the background prober
+    for name, upstream in health_prober.snapshot.items():
+        checks[f"upstream_{name}"] = upstream
+    
+    # Lazily built services
+    for name, state in services.status().items():
+        checks[f"service_{name}"] = {
+            "status": "degraded" if state["status"] == "degraded" else "ok",
+            "message": state["error"] or f"Service {state['status']}",
+            "init_ms": state["init_ms"]
+        }
+    
+    if job_status.enabled:
+        checks["job_callbacks"] = {
+            "status": "degraded" if job_status.stats["failed"] or job_status.stats["rejected"] else "ok",
+            "message": f"{type(job_status.sink).__name__}",
+            **job_status.stats
+        }
+    
+    if settings.ADMISSION_ENABLED:
+        metrics = admission.metrics()
+        checks["admission"] = {
+            "status": "degraded" if metrics["queue_depth"] >= admission.queue_size else "ok",
+            "message": f"{metrics['inflight']} in flight, {metrics['queue_depth']} queued",
+            **metrics
+        }
+    
+    if settings.ARTIFACT_STORE_ENABLED:
+        metrics = artifact_store.metrics()
+        checks["artifact_store"] = {
+            "status": "ok" if metrics["enabled"] and not metrics["failed"] else "degraded",
+            "message": f"{metrics['written']} written, {metrics['pending']} pending",
+            **metrics
+        }
     
-    # Check Google AI API key
-    checks["google_ai"] = {
-        "status": "ok" if os.getenv("GOOGLE_AI_API_KEY") else "missing",
-        "message": "Google AI API key configured" if os.getenv("GOOGLE_AI_API_KEY") else "Google AI API key missing"
+    if settings.BLOB_STORE_ENABLED:
+        metrics = blob_store.metrics()
+        checks["blob_store"] = {
+            "status": "ok",
+            "message": (f"{metrics['ingested']} stored, {metrics['deduplicated']} deduplicated, {metrics['failed']} failed"
+                        if metrics["public"] else "BLOB_PUBLIC_BASE_URL not set; HTMLCSStoImage URLs returned"),
+            **metrics
+        }
+    
+    if settings.IDEMPOTENCY_ENABLED:
+        metrics = idempotency.metrics()
+        checks["idempotency"] = {
+            "status": "ok",
+            "message": f"{metrics['running']} running, {metrics['replayed'] + metrics['replayed_from_store']} replays, {metrics['attached']} attached",
+            **metrics
+        }
+    
+    if settings.CANCELLATION_ENABLED:
+        metrics = job_registry.metrics()
+        avoided = sum(metrics["calls_avoided"].values())
+        checks["cancellation"] = {
+            "status": "ok",
+            "message": f"{metrics['cancelled_explicit']} cancelled, {metrics['cancelled_disconnect']} disconnected, {avoided} upstream calls avoided",
+            **metrics
+        }
+    
+    metrics = shared_state.metrics()
+    checks["shared_state"] = {
+        "status": "ok" if metrics["shared"] else "degraded",
+        "message": "Shared by workers" if metrics["shared"] else "Per worker (database unavailable)",
+        **metrics
     }
     
-    # Check Clerk configuration
-    checks["clerk_auth"] = {
-        "status": "ok" if os.getenv("CLERK_SECRET_KEY") else "missing",
-        "message": "Clerk authentication configured" if os.getenv("CLERK_SECRET_KEY") else "Clerk keys missing"
+    metrics = stage_budgets.metrics()
+    checks["deadlines"] = {
+        "status": "ok",
+        "message": f"{metrics['timeouts']} stage timeouts, {metrics['skipped']} stages skipped",
+        **metrics
     }
     
-    # Check Playwright
-    try:
-        from playwright.async_api import async_playwright
-        checks["playwright"] = {
+    metrics = prewarm_store.metrics()
+    checks["prewarm"] = {
+        "status": "ok",
+        "message": f"{metrics['parked']} parked, hit ratio {metrics['hit_ratio']:.0%}, waste ratio {metrics['waste_ratio']:.0%}",
+        **metrics
+    }
+    
+    for name, scheduler in schedulers.items():
+        metrics = scheduler.metrics()
+        checks[f"scheduler_{name}"] = {
             "status": "ok",
-            "message": "Playwright available"
+            "message": f"{metrics['active']}/{metrics['capacity']} upstream slots busy",
+            "lanes": {lane: {k: v for k, v in stats.items() if k in ("waiting", "mean_wait_ms", "p95_wait_ms")}
+                      for lane, stats in metrics["lanes"].items()}
         }
-    except ImportError:
-        checks["playwright"] = {
-            "status": "error",
-            "message": "Playwright not installed"
-        }
-        status = "degraded"
     
-    # Overall status
+    # Overall status - a failed service degrades the app, it doesn't take it down
+    status = "healthy"
     if any(check["status"] == "error" for check in checks.values()):
         status = "unhealthy"
-    elif any(check["status"] == "missing" for check in checks.values()):
+    elif any(check["status"] in ("missing", "degraded") for check in checks.values()):
         status = "degraded"
     
     return {
@@ -65,3 +165,12 @@ async def detailed_health_check() -> Dict[str, Any]:
         "version": "1.0.0",
         "checks": checks
     }
+
+@router.get("/health/startup")
+async def startup_report() -> Dict[str, Any]:
+    """Per-module import and service initialization timings for this worker"""
+    return {
+        "pid": os.getpid(),
+        "startup": startup_timer.report(),
+        "services": services.status()
+    }
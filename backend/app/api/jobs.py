@@ -0,0 +1,36 @@
+"""
+Job control endpoints
+"""
+
+from fastapi import APIRouter, HTTPException, Depends
+
+from app.core.auth import Caller, get_caller
+from app.core.cancellation import job_registry
+
+router = APIRouter()
+
+@router.post("/{job_id}/cancel", status_code=202)
+async def cancel_job(
+    job_id: str,
+    caller: Caller = Depends(get_caller)
+) -> dict:
+    """
+    Cancel everything running for a job, on every worker
+    
+    Stops the copy, render and pipeline requests for the job along with
+    any background print render. Their upstream requests are aborted and
+    their admission and scheduler slots freed; waiting callers get 409.
+    Work on this worker stops now, on other workers within
+    CANCEL_POLL_INTERVAL seconds; the counts are for this worker.
+    
+    Only the job's owner or a service call (`X-Service-Token`) may cancel it.
+    """
+    
+    owner = await job_registry.owner(job_id)
+    if owner is None and not caller.service:
+        raise HTTPException(status_code=404, detail="No work in flight for this job")
+    if not caller.may_act_for(owner):
+        raise HTTPException(status_code=403, detail="Only the job's owner can cancel it")
+    
+    cancelled = await job_registry.cancel(job_id)
+    return {"cancelled": True, **cancelled}
@@ -3,26 +3,32 @@ Brochure rendering endpoints
 """
 
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from typing import Optional, Dict, Any
 import time
 
 from app.models.content import RenderRequest, RenderResponse
-from app.services.render_service import RenderService
-from app.core.auth import verify_clerk_token
+from app.services.registry import services
+from app.services.job_status import job_status
+from app.services.background_renders import background_renders
+from app.services.idempotency import IdempotencyConflict, idempotency, request_fingerprint
+from app.core.config import settings
+from app.core.auth import Caller, get_caller, get_current_user
+from app.core.responses import ORJSONResponse
+from app.core.lifecycle import inflight_renders
+from app.core.cancellation import JobCancelled, job_registry
 
 router = APIRouter()
 
-# Initialize render service
-render_service = RenderService()
-
-# Optional auth for local development
-security = HTTPBearer(auto_error=False)
+# RenderService is built lazily by the service registry
+get_render_service = services.dependency("render")
 
 @router.post("/generate", response_model=RenderResponse)
 async def generate_brochure(
     request: RenderRequest,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> RenderResponse:
+    auth: Optional[Dict[str, Any]] = Depends(get_current_user),
+    caller: Caller = Depends(get_caller),
+    render_service=Depends(get_render_service)
+) -> ORJSONResponse:
     """
     Generate PDF and PNG brochure from content and assets
     
@@ -32,29 +38,73 @@ async def generate_brochure(
     3. Creates PNG thumbnail
     4. Uploads files to Convex storage
     5. Updates job status
+    
+    With `preview: true` a low-res PNG preview is returned as soon as it
+    is ready (`pdf_status: "pending"`); the print PDF follows in the
+    background and can be polled at /api/render/jobs/{job_id}.
+    
+    The job can be stopped with POST /api/jobs/{job_id}/cancel.
     """
     
-    try:
-        # Verify auth (optional for local development)
-        auth = await verify_clerk_token(credentials)
-        
+    async def render() -> RenderResponse:
         start_time = time.time()
         
         # Generate brochure using render service
-        response = await render_service.generate_brochure(request)
+        on_stage = job_status.stage_callback(request.job_id)
+        if request.preview:
+            response = await render_service.generate_preview(request, on_stage=on_stage)
+        else:
+            response = await render_service.generate_brochure(request, on_stage=on_stage)
         
         # Add timing information
         render_time = time.time() - start_time
         response.render_time = render_time
-        
         return response
+    
+    try:
+        # Tracked so shutdown can drain it; Convex retries for the same job
+        # attach to the running render or replay its result
+        job_id = request.job_id if settings.IDEMPOTENCY_ENABLED else None
+        with job_registry.track(request.job_id if settings.CANCELLATION_ENABLED else None,
+                                "render.generate", {"hcti": 2}, owner=caller.key):
+            async with inflight_renders.track():
+                response, outcome = await idempotency.run(
+                    "render.generate", job_id, request_fingerprint(request), render, RenderResponse,
+                    succeeded=lambda result: result.success, owner=caller.key
+                )
+        
+        # A replayed preview may have been overtaken by its background print render
+        if outcome != "executed" and response.pdf_status == "pending":
+            state = await background_renders.get(request.job_id)
+            if state and state["status"] != "pending":
+                response = response.model_copy(update={
+                    "pdf_url": state["pdf_url"], "png_url": state["png_url"] or response.png_url,
+                    "pdf_status": state["status"]
+                })
         
+        # Serialized once by pydantic-core; skips response_model re-validation
+        return ORJSONResponse(response, headers={"Idempotency-Status": outcome})
+        
+    except (IdempotencyConflict, JobCancelled) as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Brochure generation failed: {str(e)}"
         )
 
+@router.get("/jobs/{job_id}")
+async def get_render_job(
+    job_id: str,
+    auth: Optional[Dict[str, Any]] = Depends(get_current_user)
+) -> dict:
+    """Status of a background print render started by a preview request, from any worker"""
+    
+    state = await background_renders.get(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="No background render for this job")
+    return state
+
 @router.get("/templates")
 async def list_templates() -> dict:
     """List available brochure templates"""
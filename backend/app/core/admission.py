@@ -0,0 +1,241 @@
+"""
+Admission control
+Per-user and global in-flight limits with short bounded queues and fast rejection
+"""
+
+import asyncio
+import math
+import secrets
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from .auth import verify_clerk_token
+from .config import settings
+from .responses import ORJSONResponse
+
+class AdmissionRejected(Exception):
+    """Request shed before doing any work"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Limits concurrent work globally and per user
+
+    A request runs immediately when both its user and the worker are under
+    their in-flight limits. Otherwise it waits in a short FIFO queue; when
+    the user's queue is full it gets 429, when the global queue is full or
+    it waited longer than `queue_timeout` it gets 503. Both carry a
+    Retry-After estimated from recent service times.
+    """
+
+    def __init__(self, max_inflight: int = 32, max_inflight_per_user: int = 4, queue_size: int = 64,
+                 queue_size_per_user: int = 4, queue_timeout: float = 10.0):
+        self.max_inflight = max_inflight
+        self.max_inflight_per_user = max_inflight_per_user
+        self.queue_size = queue_size
+        self.queue_size_per_user = queue_size_per_user
+        self.queue_timeout = queue_timeout
+
+        self.inflight = 0
+        self._user_inflight: Dict[str, int] = {}
+        self._user_queued: Dict[str, int] = {}
+        self._waiters: Deque[Tuple[str, asyncio.Future]] = deque()
+
+        # Exponentially weighted mean of how long admitted work holds a slot
+        self._service_time = 1.0
+        self.stats = {"admitted": 0, "queued": 0, "shed_user": 0, "shed_global": 0, "timed_out": 0}
+        self._wait_ms_total = 0.0
+
+    def _can_run(self, user: str) -> bool:
+        return self.inflight < self.max_inflight and self._user_inflight.get(user, 0) < self.max_inflight_per_user
+
+    def _take(self, user: str) -> None:
+        self.inflight += 1
+        self._user_inflight[user] = self._user_inflight.get(user, 0) + 1
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from queue depth and mean service time"""
+        backlog = (len(self._waiters) + 1) / max(1, self.max_inflight)
+        return max(1, min(30, math.ceil(backlog * self._service_time)))
+
+    async def acquire(self, user: str) -> float:
+        """
+        Wait for a slot
+
+        Returns:
+            Seconds spent queued
+
+        Raises:
+            AdmissionRejected: queue full (429 per user, 503 global) or queue timeout (503)
+        """
+        # Waiters are admitted as soon as they fit, so any still queued are
+        # blocked on their own user limit - they don't hold this request back
+        if self._can_run(user) and not self._user_queued.get(user):
+            self._take(user)
+            self.stats["admitted"] += 1
+            return 0.0
+
+        if self._user_queued.get(user, 0) >= self.queue_size_per_user:
+            self.stats["shed_user"] += 1
+            raise AdmissionRejected(429, "Too many concurrent requests for this user", self.retry_after())
+        if len(self._waiters) >= self.queue_size:
+            self.stats["shed_global"] += 1
+            raise AdmissionRejected(503, "Server is at capacity", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (user, waiter)
+        self._waiters.append(entry)
+        self._user_queued[user] = self._user_queued.get(user, 0) + 1
+        self.stats["queued"] += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not (waiter.done() and not waiter.cancelled()):
+                self._forget(entry)
+                self.stats["timed_out"] += 1
+                raise AdmissionRejected(503, "Timed out waiting for capacity", self.retry_after())
+        except asyncio.CancelledError:
+            # Slot may have been granted just as we were cancelled - hand it back
+            if waiter.done() and not waiter.cancelled():
+                self.release(user, 0.0)
+            else:
+                self._forget(entry)
+            raise
+        waited = time.perf_counter() - start
+        self._wait_ms_total += waited * 1000
+        self.stats["admitted"] += 1
+        return waited
+
+    def _forget(self, entry: Tuple[str, asyncio.Future]) -> None:
+        user, waiter = entry
+        try:
+            self._waiters.remove(entry)
+        except ValueError:
+            return
+        waiter.cancel()
+        self._dec(self._user_queued, user)
+
+    @staticmethod
+    def _dec(counts: Dict[str, int], user: str) -> None:
+        remaining = counts.get(user, 0) - 1
+        if remaining > 0:
+            counts[user] = remaining
+        else:
+            counts.pop(user, None)
+
+    def release(self, user: str, service_time: float) -> None:
+        """Free a slot and admit the oldest waiters that now fit"""
+        self.inflight -= 1
+        self._dec(self._user_inflight, user)
+        if service_time:
+            self._service_time = 0.8 * self._service_time + 0.2 * service_time
+
+        if not self._waiters or self.inflight >= self.max_inflight:
+            return
+        # Oldest first, skipping users that are still at their own limit
+        for entry in list(self._waiters):
+            if self.inflight >= self.max_inflight:
+                break
+            user_waiting, waiter = entry
+            if self._user_inflight.get(user_waiting, 0) >= self.max_inflight_per_user:
+                continue
+            self._waiters.remove(entry)
+            self._dec(self._user_queued, user_waiting)
+            self._take(user_waiting)
+            waiter.set_result(None)
+
+    def metrics(self, per_user: bool = False) -> Dict[str, Any]:
+        report: Dict[str, Any] = {
+            "inflight": self.inflight,
+            "queue_depth": len(self._waiters),
+            "max_inflight": self.max_inflight,
+            "max_inflight_per_user": self.max_inflight_per_user,
+            "queue_size": self.queue_size,
+            "mean_service_s": round(self._service_time, 3),
+            "mean_queue_wait_ms": round(self._wait_ms_total / self.stats["queued"], 2) if self.stats["queued"] else 0.0,
+            **self.stats,
+        }
+        if per_user:
+            users = set(self._user_inflight) | set(self._user_queued)
+            report["users"] = {
+                user: {"inflight": self._user_inflight.get(user, 0), "queued": self._user_queued.get(user, 0)}
+                for user in sorted(users)
+            }
+        return report
+
+admission = AdmissionController(
+    max_inflight=settings.ADMISSION_MAX_INFLIGHT,
+    max_inflight_per_user=settings.ADMISSION_MAX_INFLIGHT_PER_USER,
+    queue_size=settings.ADMISSION_QUEUE_SIZE,
+    queue_size_per_user=settings.ADMISSION_QUEUE_SIZE_PER_USER,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+)
+
+async def _user_key(scope) -> str:
+    """
+    Clerk `sub` for the request, falling back to the client address
+
+    Convex calls server-to-server from one egress address, so those carry
+    `X-Service-Token` and the project owner in `X-On-Behalf-Of`; keying
+    them by address would put every user behind one per-user limit.
+    """
+    headers = dict(scope.get("headers") or ())
+    service_token = headers.get(b"x-service-token", b"").decode("latin-1")
+    if settings.SERVICE_TOKEN and service_token and secrets.compare_digest(service_token, settings.SERVICE_TOKEN):
+        on_behalf_of = headers.get(b"x-on-behalf-of", b"").decode("latin-1").strip()
+        return f"user:{on_behalf_of}" if on_behalf_of else "service"
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            user = await verify_clerk_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+        except HTTPException:
+            user = None  # the endpoint's own auth dependency rejects it
+        else:
+            # Picked up by get_current_user so the token is verified once per request
+            scope.setdefault("state", {})["user"] = user
+            if user and user.get("sub"):
+                return f"user:{user['sub']}"
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "anonymous"
+
+class AdmissionMiddleware:
+    """ASGI middleware applying `admission` to the expensive endpoints in ADMISSION_PATHS"""
+
+    def __init__(self, app, controller: AdmissionController = admission, paths: Optional[List[str]] = None):
+        self.app = app
+        self.controller = controller
+        self.paths = tuple(paths if paths is not None else settings.ADMISSION_PATHS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        user = await _user_key(scope)
+        try:
+            await self.controller.acquire(user)
+        except AdmissionRejected as e:
+            response = ORJSONResponse(
+                {"detail": e.detail, "retry_after": e.retry_after},
+                status_code=e.status_code,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(user, time.perf_counter() - start)
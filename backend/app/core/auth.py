@@ -2,69 +2,229 @@
 Authentication utilities for Clerk integration
 """
 
+import hashlib
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from jose import jwt
-from fastapi import HTTPException, status
-from fastapi.security import HTTPAuthorizationCredentials
-from typing import Optional, Dict, Any
+from fastapi import Depends, Header, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from typing import Optional, Dict, Any, Tuple
 
 from .config import settings
+from .jwks import SigningKeyCache, SigningKeyError, UnknownSigningKeyError
 
 class ClerkAuthError(Exception):
     """Custom exception for Clerk authentication errors"""
     pass
 
+class VerifiedTokenCache:
+    """Bounded LRU of verified claims, keyed by token digest, valid until the token's exp"""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: bytes) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        user, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[digest]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return user
+
+    def put(self, digest: bytes, user: Dict[str, Any], expires_at: float) -> None:
+        self._entries[digest] = (user, expires_at)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+# Optional auth for local development
+security = HTTPBearer(auto_error=False)
+
+token_cache = VerifiedTokenCache(settings.AUTH_TOKEN_CACHE_SIZE)
+_signing_keys: Optional[SigningKeyCache] = None
+_dev_mode_warned = False
+
+def _issuer() -> Optional[str]:
+    """Expected issuer claim, normalized to a URL"""
+    domain = settings.CLERK_JWT_ISSUER_DOMAIN
+    if not domain:
+        return None
+    return domain if domain.startswith("http") else f"https://{domain}"
+
+def configure_signing_keys(jwks_url: Optional[str] = None) -> SigningKeyCache:
+    """
+    (Re)create the signing key cache and drop cached tokens, e.g. to point at a test key server
+
+    Raises:
+        ClerkAuthError: no JWKS URL is configured and none can be derived from the issuer
+    """
+    global _signing_keys
+    issuer = _issuer()
+    url = jwks_url or settings.CLERK_JWKS_URL or (f"{issuer}/.well-known/jwks.json" if issuer else "")
+    if not url:
+        raise ClerkAuthError(
+            "Clerk token verification needs CLERK_JWT_ISSUER_DOMAIN or CLERK_JWKS_URL "
+            "(CLERK_SECRET_KEY alone does not locate the signing keys)"
+        )
+    _signing_keys = SigningKeyCache(url)
+    token_cache.clear()
+    return _signing_keys
+
+def _auth_enabled() -> bool:
+    return bool(settings.CLERK_SECRET_KEY or settings.CLERK_JWKS_URL or (_signing_keys and _signing_keys.jwks_url))
+
 async def verify_clerk_token(credentials: Optional[HTTPAuthorizationCredentials]) -> Optional[Dict[str, Any]]:
     """
     Verify Clerk JWT token and return user information
-    
+
+    Verified claims are cached by token digest until the token expires, so
+    repeated calls with the same token skip RS256 verification.
+
     Args:
         credentials: HTTP Authorization credentials
-        
+
     Returns:
         User information from JWT payload
-        
+
     Raises:
         HTTPException: If token is invalid or missing
     """
-    
+    global _dev_mode_warned
+
     if not credentials:
         return None  # Allow unauthenticated for development
-    
+
     token = credentials.credentials
-    
-    if not settings.CLERK_SECRET_KEY:
+
+    if not _auth_enabled():
         # Development mode - skip verification
-        print("⚠️  Development mode: Skipping Clerk token verification")
+        if not _dev_mode_warned:
+            print("⚠️  Development mode: Skipping Clerk token verification")
+            _dev_mode_warned = True
         return {"sub": "dev_user", "email": "dev@polario.com"}
-    
+
+    digest = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(digest)
+    if cached is not None:
+        return cached
+
     try:
+        signing_keys = _signing_keys or configure_signing_keys()
+        header = jwt.get_unverified_header(token)
+        key = await signing_keys.get_key(header.get("kid"))
+
         # Decode JWT token
         payload = jwt.decode(
             token,
-            settings.CLERK_SECRET_KEY,
+            key,
             algorithms=["RS256"],
-            issuer=settings.CLERK_JWT_ISSUER_DOMAIN,
-            options={"verify_signature": True}
+            issuer=_issuer(),
+            options={"verify_signature": True, "verify_aud": False}
         )
-        
-        return {
+
+        user = {
+            "sub": payload.get("sub"),
             "user_id": payload.get("sub"),
             "email": payload.get("email"),
             "clerk_id": payload.get("sub"),
         }
-        
+
+        if payload.get("exp"):
+            token_cache.put(digest, user, float(payload["exp"]))
+
+        return user
+
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has expired"
         )
-    except jwt.JWTError as e:
+    except (jwt.JWTError, UnknownSigningKeyError) as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid token: {str(e)}"
         )
+    except SigningKeyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Signing keys unavailable: {str(e)}"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Authentication error: {str(e)}"
         )
+
+async def get_current_user(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+) -> Optional[Dict[str, Any]]:
+    """
+    FastAPI dependency resolving the Clerk user for a request
+
+    FastAPI caches dependencies per request, and the result is also kept on
+    `request.state.user`, so verification runs at most once per request.
+    """
+
+    if hasattr(request.state, "user"):
+        return request.state.user
+
+    user = await verify_clerk_token(credentials)
+    request.state.user = user
+    return user
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    FastAPI dependency for admin-only endpoints
+
+    Admin endpoints are disabled (404) unless ADMIN_TOKEN is configured.
+    """
+
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required")
+
+@dataclass(frozen=True)
+class Caller:
+    """Who a request acts for; `service` marks Convex server-to-server calls carrying SERVICE_TOKEN"""
+    key: str
+    service: bool = False
+
+    def may_act_for(self, owner: Optional[str]) -> bool:
+        """Service calls act for anyone, users only for what they started themselves"""
+        return self.service or (owner is not None and owner == self.key)
+
+async def get_caller(
+    request: Request,
+    user: Optional[Dict[str, Any]] = Depends(get_current_user)
+) -> Caller:
+    """
+    FastAPI dependency identifying the caller, keyed like admission control
+
+    `user:<id>` for Clerk users and for Convex calls made on a user's
+    behalf (`X-On-Behalf-Of`), `service` for other Convex calls, and the
+    client address for anonymous development requests.
+    """
+
+    service_token = request.headers.get("x-service-token", "")
+    if settings.SERVICE_TOKEN and service_token and secrets.compare_digest(service_token, settings.SERVICE_TOKEN):
+        on_behalf_of = request.headers.get("x-on-behalf-of", "").strip()
+        return Caller(f"user:{on_behalf_of}" if on_behalf_of else "service", service=True)
+    if user and user.get("sub"):
+        return Caller(f"user:{user['sub']}")
+    return Caller(f"ip:{request.client.host}" if request.client else "anonymous")
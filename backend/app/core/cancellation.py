@@ -0,0 +1,265 @@
+"""
+Cancellation of abandoned work
+Jobs cancelled explicitly or by a client disconnect stop their pipeline tasks and upstream calls
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from .config import settings
+from .shared_state import shared_state
+
+# Shared state namespaces: who started a job, and jobs cancelled on any worker
+OWNERS = "job_owner"
+CANCELLED = "job_cancelled"
+
+class JobCancelled(Exception):
+    """The job was cancelled through the cancel endpoint"""
+
+class JobContext:
+    """Upstream calls made on behalf of one request for a job"""
+
+    __slots__ = ("job_id", "scope", "expected", "owner", "calls", "started_at", "cancel_reason")
+
+    def __init__(self, job_id: str, scope: str, expected: Dict[str, int], owner: Optional[str] = None):
+        self.job_id = job_id
+        self.scope = scope
+        self.expected = expected
+        self.owner = owner
+        self.calls: Dict[str, int] = {}
+        self.started_at = time.perf_counter()
+        self.cancel_reason: Optional[str] = None
+
+_current_job: ContextVar[Optional[JobContext]] = ContextVar("current_job", default=None)
+
+def record_upstream_call(upstream: str) -> None:
+    """Count a Gemini/HTMLCSStoImage call against the current job, if any"""
+    context = _current_job.get()
+    if context is not None:
+        context.calls[upstream] = context.calls.get(upstream, 0) + 1
+
+class JobRegistry:
+    """
+    In-flight request tasks by job id
+
+    `cancel` cancels every request task for a job plus any background
+    tasks attached to it. Cancellation unwinds through the pipeline, so
+    scheduler and admission slots are released and open upstream HTTP
+    requests are aborted. Each cancelled request records which of its
+    expected upstream calls it never made.
+
+    A cancel reaches one worker, so it is also recorded in the shared
+    state; every worker checks its running jobs against it every
+    `poll_interval` seconds. Job owners are recorded there too, so any
+    worker can tell who may cancel a job.
+    """
+
+    def __init__(self, poll_interval: float = 1.0, ttl: float = 3600.0):
+        self.poll_interval = poll_interval
+        self.ttl = ttl
+        self._requests: Dict[str, Set[asyncio.Task]] = {}
+        self._contexts: Dict[asyncio.Task, JobContext] = {}
+        self._attached: Dict[str, Set[asyncio.Task]] = {}
+        self._writes: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.stats: Dict[str, Any] = {"cancel_requests": 0, "cancelled_explicit": 0, "cancelled_disconnect": 0,
+                                      "cancelled_elsewhere": 0, "calls_avoided": {}, "calls_made_before_cancel": {},
+                                      "seconds_abandoned": 0.0}
+
+    @contextmanager
+    def track(self, job_id: Optional[str], scope: str, expected: Optional[Dict[str, int]] = None,
+              owner: Optional[str] = None) -> Iterator[Optional[JobContext]]:
+        """
+        Register the current request task for a job started by `owner`
+
+        Raises:
+            JobCancelled: the job was cancelled through `cancel`
+        """
+        if not job_id:
+            yield None
+            return
+
+        task = asyncio.current_task()
+        context = JobContext(job_id, scope, expected or {}, owner)
+        if owner:
+            # Written in the background; the first poll would see a cancel that lands meanwhile
+            write = asyncio.create_task(shared_state.set(OWNERS, job_id, owner, self.ttl))
+            self._writes.add(write)
+            write.add_done_callback(self._writes.discard)
+        token = _current_job.set(context)
+        self._requests.setdefault(job_id, set()).add(task)
+        self._contexts[task] = context
+        try:
+            yield context
+        except asyncio.CancelledError:
+            reason = context.cancel_reason or "disconnect"
+            self._record(context, reason)
+            if reason == "explicit" and task.uncancel() == 0:
+                raise JobCancelled(f"Job {job_id} was cancelled")
+            raise
+        finally:
+            _current_job.reset(token)
+            self._contexts.pop(task, None)
+            tasks = self._requests.get(job_id)
+            if tasks is not None:
+                tasks.discard(task)
+                if not tasks:
+                    del self._requests[job_id]
+
+    def attach(self, job_id: Optional[str], task: asyncio.Task) -> None:
+        """Cancel `task` too when the job is cancelled (background and streaming work)"""
+        if not job_id:
+            return
+        self._attached.setdefault(job_id, set()).add(task)
+
+        def detach(done: asyncio.Task) -> None:
+            tasks = self._attached.get(job_id)
+            if tasks is not None:
+                tasks.discard(done)
+                if not tasks:
+                    del self._attached[job_id]
+
+        task.add_done_callback(detach)
+
+    def _record(self, context: JobContext, reason: str) -> None:
+        self.stats[f"cancelled_{reason}"] = self.stats.get(f"cancelled_{reason}", 0) + 1
+        self.stats["seconds_abandoned"] = round(
+            self.stats["seconds_abandoned"] + time.perf_counter() - context.started_at, 3
+        )
+        for upstream, count in context.calls.items():
+            made = self.stats["calls_made_before_cancel"]
+            made[upstream] = made.get(upstream, 0) + count
+        for upstream, count in context.expected.items():
+            avoided = max(0, count - context.calls.get(upstream, 0))
+            if avoided:
+                self.stats["calls_avoided"][upstream] = self.stats["calls_avoided"].get(upstream, 0) + avoided
+
+    async def owner(self, job_id: str) -> Optional[str]:
+        """Who started a job, from this worker's requests or the shared state"""
+        for task in self._requests.get(job_id, ()):
+            context = self._contexts.get(task)
+            if context is not None and context.owner:
+                return context.owner
+        return await shared_state.get(OWNERS, job_id)
+
+    async def cancel(self, job_id: str) -> Dict[str, Any]:
+        """
+        Cancel a job on every worker
+
+        Returns what was cancelled on this worker; the others pick the
+        cancellation up within `poll_interval` seconds.
+        """
+        self.stats["cancel_requests"] += 1
+        await shared_state.set(CANCELLED, job_id, time.time(), self.ttl)
+        return self._cancel_local(job_id)
+
+    def _cancel_local(self, job_id: str) -> Dict[str, Any]:
+        # Tasks already being cancelled are left alone - a second cancel would outlive uncancel()
+        requests = [task for task in self._requests.get(job_id, ()) if not task.done() and not task.cancelling()]
+        attached = [task for task in self._attached.get(job_id, ()) if not task.done() and not task.cancelling()]
+        calls_made: Dict[str, int] = {}
+        for task in requests:
+            context = self._contexts.get(task)
+            if context is not None:
+                context.cancel_reason = "explicit"
+                for upstream, count in context.calls.items():
+                    calls_made[upstream] = calls_made.get(upstream, 0) + count
+            task.cancel()
+        for task in attached:
+            task.cancel()
+        return {"job_id": job_id, "requests": len(requests), "background_tasks": len(attached),
+                "upstream_calls_made": calls_made}
+
+    def running(self) -> List[str]:
+        return sorted(set(self._requests) | set(self._attached))
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            for job_id in await shared_state.get_many(CANCELLED, self.running()):
+                cancelled = self._cancel_local(job_id)
+                if cancelled["requests"] or cancelled["background_tasks"]:
+                    self.stats["cancelled_elsewhere"] += 1
+
+    def start(self) -> None:
+        """Watch for jobs cancelled through other workers"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"running_jobs": len(self.running()), **self.stats}
+
+job_registry = JobRegistry(settings.CANCEL_POLL_INTERVAL, settings.CANCEL_TTL)
+
+class CancelOnDisconnectMiddleware:
+    """
+    ASGI middleware cancelling a request's handler when the client disconnects
+
+    Once the request body has been read, a watcher waits for
+    `http.disconnect`; if it arrives before the response is complete the
+    handler task is cancelled. Later `receive` calls from the app are
+    answered from the watcher, so nothing else reads the channel.
+    """
+
+    def __init__(self, app, paths: Optional[List[str]] = None):
+        self.app = app
+        self.paths = tuple(paths if paths is not None else settings.CANCEL_ON_DISCONNECT_PATHS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        disconnected = asyncio.Event()
+        state = {"body_read": False, "response_done": False}
+        watcher: Optional[asyncio.Task] = None
+
+        async def watch() -> None:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    disconnected.set()
+                    if not state["response_done"] and not app_task.done():
+                        app_task.cancel()
+                    return
+
+        async def receive_wrapper():
+            nonlocal watcher
+            if state["body_read"]:
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected.set()
+            elif not message.get("more_body", False):
+                state["body_read"] = True
+                watcher = asyncio.create_task(watch())
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                state["response_done"] = True
+            await send(message)
+
+        app_task = asyncio.create_task(self.app(scope, receive_wrapper, send_wrapper))
+        try:
+            await app_task
+        except asyncio.CancelledError:
+            # Our own cancellation (server shutdown) propagates; a disconnect ends quietly
+            if asyncio.current_task().cancelling() or not disconnected.is_set():
+                raise
+        finally:
+            if watcher is not None:
+                watcher.cancel()
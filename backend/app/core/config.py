@@ -3,7 +3,7 @@ Configuration settings for Polario Backend
 """
 
 import os
-from typing import List
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -23,7 +23,11 @@ class Settings(BaseSettings):
     
     # Clerk Authentication
     CLERK_SECRET_KEY: str = os.getenv("CLERK_SECRET_KEY", "")
+    # Shared with Convex; server-to-server calls carrying it are keyed by the X-On-Behalf-Of user
+    SERVICE_TOKEN: str = os.getenv("SERVICE_TOKEN", "")
     CLERK_JWT_ISSUER_DOMAIN: str = os.getenv("CLERK_JWT_ISSUER_DOMAIN", "")
+    CLERK_JWKS_URL: str = os.getenv("CLERK_JWKS_URL", "")  # Defaults to <issuer>/.well-known/jwks.json
+    AUTH_TOKEN_CACHE_SIZE: int = 10000  # Verified tokens kept in memory
     
     # Google AI
     GOOGLE_AI_API_KEY: str = os.getenv("GOOGLE_AI_API_KEY", "")
@@ -32,13 +36,140 @@ class Settings(BaseSettings):
     CONVEX_DEPLOYMENT: str = os.getenv("CONVEX_DEPLOYMENT", "")
     CONVEX_DEPLOY_KEY: str = os.getenv("CONVEX_DEPLOY_KEY", "")
     
+    # Job status callbacks
+    JOB_CALLBACK_SINK: str = os.getenv("JOB_CALLBACK_SINK", "")  # convex, local, none; default convex when a URL is set
+    JOB_CALLBACK_URL: str = os.getenv("JOB_CALLBACK_URL", "")  # e.g. https://<deployment>.convex.site/jobs/progress
+    JOB_CALLBACK_SECRET: str = os.getenv("JOB_CALLBACK_SECRET", "")
+    JOB_CALLBACK_LOCAL_PATH: str = os.getenv("JOB_CALLBACK_LOCAL_PATH", "")  # JSON lines file for the local sink
+    JOB_CALLBACK_WINDOW: float = 0.5  # seconds updates are coalesced before sending
+    JOB_CALLBACK_BATCH_SIZE: int = 50  # updates per callback request
+    JOB_CALLBACK_MAX_RETRIES: int = 3  # immediate retries per batch
+    JOB_CALLBACK_MAX_REQUEUES: int = 3  # later flush cycles an update is retried in before it's dropped
+    
     # File Processing
     MAX_FILE_SIZE: int = 15 * 1024 * 1024  # 15MB
     ALLOWED_IMAGE_TYPES: List[str] = ["image/jpeg", "image/png", "image/webp", "image/svg+xml"]
+    # Hosts assets are downloaded from for inlining (".example.com" matches subdomains)
+    ASSET_FETCH_HOSTS: List[str] = [".convex.cloud"]
+    
+    # Server
+    SERVER_MODE: str = "development"  # development, production
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WORKERS: int = 0  # 0 = one per CPU core (production only)
+    LOOP: str = "uvloop"  # uvloop, asyncio, auto
+    HTTP: str = "httptools"  # httptools, h11, auto
+    KEEPALIVE_TIMEOUT: int = 75  # seconds; longer than typical load balancer idle timeouts
+    BACKLOG: int = 2048
+    GRACEFUL_SHUTDOWN_TIMEOUT: int = 90  # seconds to drain in-flight renders on SIGTERM
+    WORKER_STARTUP_STAGGER: float = 0.5  # seconds between worker warm-ups
+    
+    # Health probes
+    HEALTH_PROBE_INTERVAL: float = 30.0  # seconds between upstream probe cycles
+    HEALTH_PROBE_TIMEOUT: float = 5.0  # seconds per probe
+    HEALTH_PROBE_WINDOW: int = 20  # probe results kept per upstream
+    
+    # Admin endpoints and profiling
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")  # X-Admin-Token; admin endpoints are off when empty
+    PROFILING_SAMPLE_RATE: float = 0.0  # fraction of requests profiled without the admin header
+    PROFILING_INTERVAL: float = 0.005  # seconds between stack samples
+    PROFILING_DIR: str = os.getenv(
+        "PROFILING_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "profiles")
+    )
+    PROFILING_MAX_ARTIFACTS: int = 100
+    
+    # Admission control (per worker)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_INFLIGHT: int = 32  # requests doing work at once
+    ADMISSION_MAX_INFLIGHT_PER_USER: int = 4  # per Clerk user (or client address when anonymous)
+    ADMISSION_QUEUE_SIZE: int = 64  # requests waiting for a slot before 503
+    ADMISSION_QUEUE_SIZE_PER_USER: int = 4  # waiting per user before 429
+    ADMISSION_QUEUE_TIMEOUT: float = 10.0  # seconds a request may wait before 503
+    ADMISSION_PATHS: List[str] = ["/api/ai/", "/api/render/generate", "/api/brochure/"]
+    
+    # Priority lanes for upstream calls (per worker)
+    PRIORITY_LANES: Dict[str, int] = {"interactive": 6, "standard": 3, "print": 1}  # lane -> weight
+    PRIORITY_DEFAULT_LANE: str = "standard"
+    PRIORITY_ROUTE_LANES: Dict[str, str] = {  # path prefix -> lane; X-Priority-Lane header overrides
+        "/api/ai/": "interactive",
+        "/api/render/": "print",
+        "/api/brochure/": "print",
+    }
+    PRIORITY_LANE_MAX_WAIT: float = 5.0  # seconds before a waiter is served regardless of weight
+    SCHEDULER_AI_CONCURRENCY: int = 8  # concurrent Gemini calls
+    SCHEDULER_RENDER_CONCURRENCY: int = 8  # concurrent HTMLCSStoImage calls
+    
+    # Speculative analysis pre-warming (/api/ai/prewarm)
+    PREWARM_TTL: float = 600.0  # seconds a parked analysis stays valid
+    PREWARM_MAX_ENTRIES: int = 1000  # prewarms tracked per worker
+    PREWARM_DEBOUNCE: float = 2.0  # seconds a prewarm waits for further saves before calling Gemini
+    PREWARM_USER_LIMIT: int = 20  # prewarms each user may start per window
+    PREWARM_USER_WINDOW: float = 60.0  # seconds
+    PREWARM_LANE: str = "standard"  # priority lane for speculative Gemini calls
+    
+    # Local artifact store (SQLite) for analysis, copy, variant and render results
+    ARTIFACT_STORE_ENABLED: bool = True
+    ARTIFACT_STORE_PATH: str = os.getenv(
+        "ARTIFACT_STORE_PATH", os.path.join(os.path.dirname(__file__), "..", "..", "artifacts", "artifacts.db")
+    )
+    ARTIFACT_RETENTION: float = 7 * 86400.0  # seconds artifacts are kept
+    ARTIFACT_BATCH_SIZE: int = 100  # queued rows that trigger an early write
+    ARTIFACT_FLUSH_INTERVAL: float = 0.5  # seconds between batched writes
+    ARTIFACT_REUSE_ANALYSIS: bool = False  # reuse a stored analysis of the same project for identical inputs
+    
+    # Content-addressed blob store for rendered PDFs/PNGs (served at /api/blobs)
+    BLOB_STORE_ENABLED: bool = True
+    BLOB_STORE_DIR: str = os.getenv(
+        "BLOB_STORE_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "blobs")
+    )
+    BLOB_PUBLIC_BASE_URL: str = os.getenv("BLOB_PUBLIC_BASE_URL", "")  # prefix of returned URLs; unset keeps HTMLCSStoImage URLs
+    BLOB_RETENTION: float = 90 * 86400.0  # seconds a blob is kept after it was last rendered; 0 keeps blobs forever
+    BLOB_SWEEP_INTERVAL: float = 3600.0  # seconds between retention sweeps
+    BLOB_MAX_BYTES: int = 50 * 1024 * 1024
+    BLOB_CACHE_MAX_AGE: int = 31536000  # blobs are immutable
+    
+    # Idempotent execution of render/AI requests by job_id
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_TTL: float = 3600.0  # seconds a completed job's result is replayed to retries
+    
+    # Cancellation - stop pipeline work for cancelled jobs and disconnected clients
+    CANCELLATION_ENABLED: bool = True
+    CANCEL_ON_DISCONNECT_PATHS: List[str] = ["/api/ai/generate-copy", "/api/render/generate", "/api/brochure/"]
+    CANCEL_POLL_INTERVAL: float = 1.0  # seconds between checks for jobs cancelled through another worker
+    CANCEL_TTL: float = 3600.0  # seconds a cancellation and a job's owner are remembered
+    
+    # Deadlines - each pipeline request gets a time budget (RENDER_TIMEOUT unless the header sets one)
+    DEADLINE_HEADER: str = "X-Request-Timeout"  # seconds the caller is willing to wait
+    DEADLINE_MAX: float = 300.0  # seconds; upper bound for the header
+    DEADLINE_STAGE_SHARES: Dict[str, float] = {  # share of the remaining budget a stage may use
+        "analysis": 0.3, "copy": 0.5, "preview": 0.5, "pdf": 0.7, "png": 1.0, "store": 1.0
+    }
+    DEADLINE_STAGE_MIN: float = 2.0  # seconds; a stage with less than this available isn't started
+    DEADLINE_PREVIEW_BELOW: float = 20.0  # seconds; interactive full renders starting with less left return a preview (keep below RENDER_TIMEOUT)
+    
+    # Tracing
+    TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "none")  # none, jsonl, console or "module:Class"
+    TRACING_PATH: str = os.getenv(
+        "TRACING_PATH", os.path.join(os.path.dirname(__file__), "..", "..", "traces", "spans.jsonl")
+    )
+    TRACING_SAMPLE_RATE: float = 1.0  # for requests without a caller traceparent
     
     # Rendering
-    RENDER_TIMEOUT: int = 60  # seconds
+    RENDER_TIMEOUT: int = 60  # seconds; default request deadline for the AI/render pipeline
     PDF_QUALITY: str = "print"  # print, screen
+    PREVIEW_DEVICE_SCALE: float = 1.0  # preview PNG scale; HTMLCSStoImage accepts 1-3
+    PREVIEW_MAX_ASSET_PX: int = 800  # long edge of inlined assets in previews (needs Pillow)
+    BACKGROUND_RENDER_TTL: float = 3600.0  # seconds finished print renders stay pollable
+    
+    # Industry knowledge base
+    INDUSTRY_KB_SOURCE: str = os.getenv(
+        "INDUSTRY_KB_SOURCE", os.path.join(os.path.dirname(__file__), "..", "data", "industries.json")
+    )
+    INDUSTRY_KB_PATH: str = os.getenv(
+        "INDUSTRY_KB_PATH", os.path.join(os.path.dirname(__file__), "..", "data", "industries.bin")
+    )
+    INDUSTRY_KB_RELOAD_INTERVAL: float = 5.0  # seconds between change checks
+    INDUSTRY_CLASSIFIER_MIN_CONFIDENCE: float = 0.3  # cosine similarity
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,124 @@
+"""
+Request deadlines
+Each request gets a time budget that pipeline stages draw slices from
+"""
+
+import asyncio
+import math
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from .config import settings
+
+T = TypeVar("T")
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+class DeadlineExceeded(Exception):
+    """A stage ran out of budget, or had too little left to start"""
+
+    def __init__(self, stage: str, skipped: bool = False):
+        self.stage = stage
+        self.skipped = skipped
+        super().__init__(f"Deadline {'too close to start' if skipped else 'exceeded in'} {stage} stage")
+
+def set_deadline(seconds: float):
+    """Give the current context `seconds` from now; returns a token for `reset_deadline`"""
+    return _deadline.set(time.monotonic() + seconds)
+
+def reset_deadline(token) -> None:
+    _deadline.reset(token)
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current request's budget, None without a deadline"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+class StageBudgets:
+    """
+    Runs pipeline stages within a share of the remaining request budget
+
+    A stage may use `DEADLINE_STAGE_SHARES[stage]` of whatever budget is
+    left when it starts, so earlier stages leave room for later ones. A
+    stage with less than `DEADLINE_STAGE_MIN` seconds available isn't
+    started at all. Both cases raise `DeadlineExceeded`; callers degrade.
+    """
+
+    def __init__(self, shares: Dict[str, float], min_seconds: float = 2.0):
+        self.shares = shares
+        self.min_seconds = min_seconds
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.degraded: Dict[str, int] = {}
+
+    def _count(self, stage: str, outcome: str) -> None:
+        counts = self.stats.setdefault(stage, {"completed": 0, "timeouts": 0, "skipped": 0})
+        counts[outcome] += 1
+
+    def budget(self, stage: str) -> Optional[float]:
+        """Seconds `stage` may take if it starts now, None without a deadline"""
+        left = remaining()
+        return None if left is None else left * self.shares.get(stage, 1.0)
+
+    async def run(self, stage: str, work: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `work` within the stage's budget
+
+        Raises:
+            DeadlineExceeded: the stage timed out or was skipped
+        """
+        budget = self.budget(stage)
+        if budget is None:
+            return await work()
+        if budget < self.min_seconds:
+            self._count(stage, "skipped")
+            raise DeadlineExceeded(stage, skipped=True)
+        try:
+            result = await asyncio.wait_for(work(), timeout=budget)
+        except asyncio.TimeoutError:
+            self._count(stage, "timeouts")
+            raise DeadlineExceeded(stage)
+        self._count(stage, "completed")
+        return result
+
+    def degrade(self, action: str) -> None:
+        """Count a degradation (fallback copy, skipped PNG, preview instead of PDF)"""
+        self.degraded[action] = self.degraded.get(action, 0) + 1
+
+    def metrics(self) -> Dict[str, Any]:
+        timeouts = sum(counts["timeouts"] for counts in self.stats.values())
+        skipped = sum(counts["skipped"] for counts in self.stats.values())
+        return {"default_s": settings.RENDER_TIMEOUT, "timeouts": timeouts, "skipped": skipped,
+                "stages": self.stats, "degraded": self.degraded}
+
+stage_budgets = StageBudgets(settings.DEADLINE_STAGE_SHARES, settings.DEADLINE_STAGE_MIN)
+
+def requested_timeout(header: Optional[str]) -> float:
+    """Budget for a request from its timeout header, clamped; RENDER_TIMEOUT by default"""
+    try:
+        seconds = float(header) if header else float(settings.RENDER_TIMEOUT)
+    except ValueError:
+        seconds = float(settings.RENDER_TIMEOUT)
+    if not math.isfinite(seconds):
+        seconds = float(settings.RENDER_TIMEOUT)
+    return min(max(seconds, settings.DEADLINE_STAGE_MIN), settings.DEADLINE_MAX)
+
+class DeadlineMiddleware:
+    """ASGI middleware starting the deadline clock for pipeline requests"""
+
+    def __init__(self, app):
+        self.app = app
+        self.paths = tuple(settings.ADMISSION_PATHS)
+        self.header = settings.DEADLINE_HEADER.lower().encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or ())
+        header = headers.get(self.header, b"").decode("latin-1").strip() or None
+        token = set_deadline(requested_timeout(header))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_deadline(token)
@@ -0,0 +1,98 @@
+"""
+Signing key management for Clerk JWT verification
+"""
+
+import asyncio
+import time
+from typing import Dict, Any, Optional
+
+import aiohttp
+
+class SigningKeyError(Exception):
+    """Raised when signing keys cannot be fetched or a key id is unknown"""
+    pass
+
+class UnknownSigningKeyError(SigningKeyError):
+    """Raised when a token references a key id the key server doesn't publish"""
+    pass
+
+class SigningKeyCache:
+    """
+    JWKS signing keys fetched once and cached by key id
+
+    Keys are refetched when the cache is older than `max_age`, or when a token
+    arrives with an unknown `kid` (key rotation). Unknown-kid refreshes are
+    rate limited - globally and per kid - so bogus tokens cannot make us
+    hammer the key server.
+    """
+
+    def __init__(self, jwks_url: str, max_age: float = 3600.0, min_refresh_interval: float = 1.0,
+                 missing_kid_ttl: float = 60.0):
+        self.jwks_url = jwks_url
+        self.max_age = max_age
+        self.min_refresh_interval = min_refresh_interval
+        self.missing_kid_ttl = missing_kid_ttl
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._missing: Dict[str, float] = {}
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _refresh(self) -> None:
+        """Fetch the JWKS document and replace the cached keys"""
+        try:
+            timeout = aiohttp.ClientTimeout(total=10)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.get(self.jwks_url) as response:
+                    if response.status != 200:
+                        raise SigningKeyError(f"JWKS fetch failed: {response.status}")
+                    document = await response.json(content_type=None)
+        except aiohttp.ClientError as e:
+            raise SigningKeyError(f"JWKS fetch error: {str(e)}")
+
+        self._keys = {key["kid"]: key for key in document.get("keys", []) if "kid" in key}
+        self._fetched_at = time.monotonic()
+
+    async def prefetch(self) -> int:
+        """Fetch keys ahead of the first request; returns the number of keys"""
+        async with self._lock:
+            await self._refresh()
+        return len(self._keys)
+
+    async def get_key(self, kid: Optional[str]) -> Dict[str, Any]:
+        """Return the JWK for a key id, refreshing on expiry or rotation"""
+
+        now = time.monotonic()
+        key = self._keys.get(kid) if kid else None
+        if key is not None and now - self._fetched_at < self.max_age:
+            return key
+
+        async with self._lock:
+            # Another request may have refreshed while we waited
+            key = self._keys.get(kid) if kid else None
+            now = time.monotonic()
+            age = now - self._fetched_at
+            if key is not None and age < self.max_age:
+                return key
+            if key is None and (
+                age < self.min_refresh_interval
+                or now - self._missing.get(kid or "", -self.missing_kid_ttl) < self.missing_kid_ttl
+            ):
+                raise UnknownSigningKeyError(f"Unknown signing key: {kid}")
+
+            try:
+                await self._refresh()
+            except SigningKeyError:
+                # Keep using a cached key if the key server is briefly unavailable
+                if key is None:
+                    raise
+            else:
+                key = self._keys.get(kid) if kid else None
+
+            if key is None:
+                if len(self._missing) > 1000:
+                    self._missing.clear()
+                self._missing[kid or ""] = time.monotonic()
+
+        if key is None:
+            raise UnknownSigningKeyError(f"Unknown signing key: {kid}")
+        return key
@@ -0,0 +1,75 @@
+"""
+Process lifecycle helpers: in-flight work tracking and staggered warm-up
+"""
+
+import asyncio
+import os
+import random
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from .config import settings
+
+class InFlightTracker:
+    """Counts in-flight work so shutdown can wait for it to drain"""
+
+    def __init__(self):
+        self.active = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @asynccontextmanager
+    async def track(self) -> AsyncIterator[None]:
+        """Mark a unit of work as in flight for the duration of the block"""
+        self.active += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            if self.active == 0:
+                self._idle.set()
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Wait for in-flight work to finish
+
+        Returns:
+            True if everything finished within the timeout
+        """
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+# In-flight renders for this worker
+inflight_renders = InFlightTracker()
+
+def resolve_worker_count() -> int:
+    """Worker count from settings; 0 means one per available CPU core"""
+    if settings.WORKERS > 0:
+        return settings.WORKERS
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    return max(1, cores)
+
+async def stagger_startup() -> float:
+    """
+    Sleep a random slice of the stagger window before warming services
+
+    Spreads worker warm-up over WORKER_STARTUP_STAGGER seconds per worker so
+    a fresh deploy doesn't hit every upstream from every worker at once.
+
+    Returns:
+        Seconds slept
+    """
+    if settings.SERVER_MODE != "production":
+        return 0.0
+    window = settings.WORKER_STARTUP_STAGGER * (resolve_worker_count() - 1)
+    delay = random.uniform(0, window) if window > 0 else 0.0
+    if delay:
+        await asyncio.sleep(delay)
+    return delay
@@ -0,0 +1,112 @@
+"""
+Locale helpers for multi-locale copy
+Locale normalization, language names for prompts and grapheme-safe truncation
+"""
+
+import re
+import unicodedata
+from typing import List, Optional
+
+LOCALE_RE = re.compile(r"^[A-Za-z]{2,3}(-[A-Za-z0-9]{2,8})*$")
+
+LANGUAGE_NAMES = {
+    "ar": "Arabic", "cs": "Czech", "da": "Danish", "de": "German", "el": "Greek", "en": "English",
+    "es": "Spanish", "fi": "Finnish", "fr": "French", "he": "Hebrew", "hi": "Hindi", "hu": "Hungarian",
+    "id": "Indonesian", "it": "Italian", "ja": "Japanese", "ko": "Korean", "nb": "Norwegian",
+    "nl": "Dutch", "no": "Norwegian", "pl": "Polish", "pt": "Portuguese", "ro": "Romanian",
+    "ru": "Russian", "sv": "Swedish", "th": "Thai", "tr": "Turkish", "uk": "Ukrainian",
+    "vi": "Vietnamese", "zh": "Chinese",
+}
+
+# Scripts written without spaces between words - truncate anywhere, one-character ellipsis
+NO_SPACE_LANGUAGES = {"ja", "zh", "th", "lo", "km", "my"}
+
+def normalize_locale(locale: str) -> str:
+    """Canonical BCP 47 casing ("pt_br" -> "pt-BR"); raises ValueError if malformed"""
+    locale = locale.strip().replace("_", "-")
+    if not LOCALE_RE.match(locale):
+        raise ValueError(f"Invalid locale: {locale!r}")
+    language, *subtags = locale.split("-")
+    parts = [language.lower()]
+    for subtag in subtags:
+        if len(subtag) == 4 and subtag.isalpha():
+            parts.append(subtag.title())  # script, e.g. zh-Hant
+        elif len(subtag) == 2 and subtag.isalpha() or len(subtag) == 3 and subtag.isdigit():
+            parts.append(subtag.upper())  # region, e.g. de-AT or es-419
+        else:
+            parts.append(subtag.lower())
+    return "-".join(parts)
+
+def language_of(locale: Optional[str]) -> str:
+    return (locale or "en").split("-")[0].lower()
+
+def language_name(locale: str) -> str:
+    """Human-readable language for prompts, e.g. "German (de-AT)" """
+    name = LANGUAGE_NAMES.get(language_of(locale))
+    return f"{name} ({locale})" if name else locale
+
+def _is_regional_indicator(ch: str) -> bool:
+    return "\U0001F1E6" <= ch <= "\U0001F1FF"
+
+def _extends(ch: str) -> bool:
+    """Whether `ch` continues the previous grapheme cluster"""
+    return (
+        unicodedata.category(ch) in ("Mn", "Me", "Mc")
+        or ch == "\u200d"                            # zero-width joiner
+        or "\ufe00" <= ch <= "\ufe0f"                # variation selectors
+        or "\U0001F3FB" <= ch <= "\U0001F3FF"        # emoji skin tone modifiers
+        or "\U000E0020" <= ch <= "\U000E007F"        # emoji tag sequences
+        or "\u1160" <= ch <= "\u11ff"                # Hangul medial vowels and final consonants
+    )
+
+def graphemes(text: str) -> List[str]:
+    """
+    Split text into user-perceived characters
+
+    Approximates Unicode extended grapheme clusters: combining marks,
+    variation selectors, emoji modifiers, ZWJ sequences and flag pairs
+    stay attached to their base character.
+    """
+    clusters: List[str] = []
+    for ch in text:
+        if clusters:
+            last = clusters[-1]
+            if (_extends(ch) or last[-1] == "\u200d"
+                    or _is_regional_indicator(ch) and len(last) == 1 and _is_regional_indicator(last)):
+                clusters[-1] = last + ch
+                continue
+        clusters.append(ch)
+    return clusters
+
+def truncate_text(text: Optional[str], limit: int, locale: Optional[str] = None) -> Optional[str]:
+    """
+    Truncate with an ellipsis so the result fits within `limit` code points
+
+    Never splits a grapheme cluster. With a locale, scripts that use spaces
+    are cut at a word boundary when one is close, and scripts without
+    spaces get a single-character ellipsis.
+    """
+    if text is None or len(text) <= limit:
+        return text
+
+    language = language_of(locale)
+    ellipsis = "\u2026" if language in NO_SPACE_LANGUAGES else "..."
+    budget = limit - len(ellipsis)
+
+    kept: List[str] = []
+    used = 0
+    for cluster in graphemes(text):
+        if used + len(cluster) > budget:
+            break
+        kept.append(cluster)
+        used += len(cluster)
+    truncated = "".join(kept)
+
+    if locale and language not in NO_SPACE_LANGUAGES:
+        # Prefer a whole word if that costs at most a quarter of the text
+        cut = truncated.rstrip().rfind(" ")
+        if cut >= len(truncated) * 3 // 4:
+            truncated = truncated[:cut]
+        truncated = truncated.rstrip(" ,;:-–—")
+
+    return truncated + ellipsis
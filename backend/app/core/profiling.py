@@ -0,0 +1,277 @@
+"""
+Opt-in per-request profiling
+A sampling profiler plus an event-loop block monitor, written out as speedscope files
+"""
+
+import asyncio
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+
+from .config import settings
+
+class SamplingProfiler:
+    """
+    Samples the event loop thread's Python stack from a background thread
+
+    Stacks are recorded as tuples of frame indices (root first) with the
+    wall time since the previous sample as weight. Work from other requests
+    running on the same loop shows up too - the profile covers the loop
+    while this request was in flight.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.frames: List[Dict[str, Any]] = []
+        self.samples: List[Tuple[int, ...]] = []
+        self.weights: List[float] = []
+        self._frame_ids: Dict[Tuple[str, str, int], int] = {}
+        self._target_thread = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+
+    def _frame_id(self, code) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        frame_id = self._frame_ids.get(key)
+        if frame_id is None:
+            frame_id = self._frame_ids[key] = len(self.frames)
+            self.frames.append({"name": code.co_qualname if hasattr(code, "co_qualname") else code.co_name,
+                                "file": code.co_filename, "line": code.co_firstlineno})
+        return frame_id
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target_thread)
+            now = time.perf_counter()
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append(tuple(stack))
+            self.weights.append(round((now - last) * 1000, 3))
+            last = now
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.stopped_at = time.perf_counter()
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        """Speedscope sampled-profile document (open at https://www.speedscope.app)"""
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": self.frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round((self.stopped_at - self.started_at) * 1000, 3),
+                "samples": [list(stack) for stack in self.samples],
+                "weights": self.weights,
+            }],
+            "exporter": "polario-profiler",
+        }
+
+class LoopBlockMonitor:
+    """
+    Measures how long the event loop was blocked
+
+    Ticks every `interval` seconds; any lateness past the tick is time during
+    which the loop couldn't run callbacks.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.blocked_ms = 0.0
+        self.max_block_ms = 0.0
+        self.ticks = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - expected) * 1000)
+            self.ticks += 1
+            self.blocked_ms += lag_ms
+            self.max_block_ms = max(self.max_block_ms, lag_ms)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+class ProfileStore:
+    """Profile artifacts on disk, indexed by request id, oldest evicted past `max_artifacts`"""
+
+    def __init__(self, directory: str, max_artifacts: int = 100):
+        self.directory = directory
+        self.max_artifacts = max_artifacts
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, "index.jsonl")
+
+    def _load(self) -> None:
+        # Index survives restarts; entries whose file is gone are dropped
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, "rb") as f:
+            for line in f:
+                try:
+                    entry = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue
+                if os.path.exists(os.path.join(self.directory, entry["file"])):
+                    self._index[entry["request_id"]] = entry
+
+    def save(self, entry: Dict[str, Any], document: Dict[str, Any]) -> None:
+        """Write one artifact and its index entry (blocking; run off the loop)"""
+        self._load()
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, entry["file"])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(document))
+        os.replace(tmp_path, path)
+
+        self._index[entry["request_id"]] = entry
+        evicted = False
+        while len(self._index) > self.max_artifacts:
+            oldest = next(iter(self._index))
+            old = self._index.pop(oldest)
+            try:
+                os.remove(os.path.join(self.directory, old["file"]))
+            except FileNotFoundError:
+                pass
+            evicted = True
+
+        if evicted:
+            # Rewrite the index so it doesn't grow forever
+            with open(tmp_path, "wb") as f:
+                f.write(b"".join(orjson.dumps(e) + b"\n" for e in self._index.values()))
+            os.replace(tmp_path, self._index_path)
+        else:
+            with open(self._index_path, "ab") as f:
+                f.write(orjson.dumps(entry) + b"\n")
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Index entries, newest first"""
+        self._load()
+        return list(reversed(self._index.values()))
+
+    def path_for(self, request_id: str) -> Optional[str]:
+        self._load()
+        entry = self._index.get(request_id)
+        return os.path.join(self.directory, entry["file"]) if entry else None
+
+profile_store = ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_ARTIFACTS)
+
+def profiling_enabled() -> bool:
+    """Whether the middleware should be installed at all"""
+    return bool(settings.ADMIN_TOKEN) or settings.PROFILING_SAMPLE_RATE > 0
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling selected requests
+
+    A request is profiled when it carries `X-Profile: 1` with a valid
+    `X-Admin-Token`, or when it falls in the PROFILING_SAMPLE_RATE sample.
+    Only one request is profiled at a time. The middleware is only installed
+    when profiling is configured, so there is no per-request cost otherwise.
+    """
+
+    def __init__(self, app, store: ProfileStore = profile_store):
+        self.app = app
+        self.store = store
+        self._active = False
+
+    def _should_profile(self, scope) -> bool:
+        if self._active:
+            return False
+        headers = dict(scope.get("headers") or ())
+        if headers.get(b"x-profile") == b"1" and settings.ADMIN_TOKEN:
+            token = headers.get(b"x-admin-token", b"").decode("latin-1")
+            if secrets.compare_digest(token, settings.ADMIN_TOKEN):
+                return True
+        return settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or ())
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex
+        request_id = "".join(c for c in request_id if c.isalnum() or c in "-_") or uuid.uuid4().hex
+        response_status = {"code": None}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response_status["code"] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", request_id.encode())]
+            await send(message)
+
+        self._active = True
+        profiler = SamplingProfiler(settings.PROFILING_INTERVAL)
+        monitor = LoopBlockMonitor()
+        profiler.start()
+        monitor.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            await monitor.stop()
+            self._active = False
+
+            entry = {
+                "request_id": request_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": response_status["code"],
+                "created_at": time.time(),
+                "duration_ms": round((profiler.stopped_at - profiler.started_at) * 1000, 2),
+                "loop_blocked_ms": round(monitor.blocked_ms, 2),
+                "loop_max_block_ms": round(monitor.max_block_ms, 2),
+                "samples": len(profiler.samples),
+                "file": f"{request_id}.speedscope.json",
+            }
+            document = profiler.to_speedscope(f"{scope['method']} {scope['path']} ({request_id})")
+            try:
+                await asyncio.to_thread(self.store.save, entry, document)
+            except Exception as e:
+                print(f"⚠️  Failed to write profile {request_id}: {e}")
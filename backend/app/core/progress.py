@@ -0,0 +1,29 @@
+"""
+Pipeline stage progress reporting
+"""
+
+from typing import Any, Awaitable, Callable, Optional
+
+# on_stage(stage, status, **data) - status is "started", "done", "failed" or "skipped"
+StageCallback = Callable[..., Awaitable[None]]
+
+async def emit_stage(on_stage: Optional[StageCallback], stage: str, status: str, **data: Any) -> None:
+    """Report a stage transition; no-op without a callback, never raises into the pipeline"""
+    if on_stage is None:
+        return
+    try:
+        await on_stage(stage, status, **data)
+    except Exception as e:
+        print(f"⚠️  Stage callback failed for {stage}/{status}: {e}")
+
+def combine_callbacks(*callbacks: Optional[StageCallback]) -> Optional[StageCallback]:
+    """Fan one stage event out to several callbacks, skipping None"""
+    active = [callback for callback in callbacks if callback is not None]
+    if len(active) <= 1:
+        return active[0] if active else None
+
+    async def on_stage(stage: str, status: str, **data: Any) -> None:
+        for callback in active:
+            await emit_stage(callback, stage, status, **data)
+
+    return on_stage
@@ -0,0 +1,22 @@
+"""
+Fast JSON responses
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson, or with pydantic-core for models
+
+    Endpoints that return a model wrapped in this response skip FastAPI's
+    response_model re-validation; the model is serialized exactly once.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode()
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
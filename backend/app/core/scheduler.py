@@ -0,0 +1,184 @@
+"""
+Priority lane scheduling for upstream calls
+Weighted fair sharing of Gemini and HTMLCSStoImage capacity between named lanes
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from .config import settings
+from .tracing import current_span
+
+_current_lane: ContextVar[Optional[str]] = ContextVar("priority_lane", default=None)
+
+def current_lane() -> str:
+    """Lane of the request being served, or the default lane"""
+    return _current_lane.get() or settings.PRIORITY_DEFAULT_LANE
+
+def set_lane(lane: str):
+    """Set the lane for the current context; returns a token for `reset_lane`"""
+    return _current_lane.set(lane)
+
+def reset_lane(token) -> None:
+    _current_lane.reset(token)
+
+class LaneScheduler:
+    """
+    Limits concurrent calls to one upstream and shares them between lanes
+
+    Free slots go to the backlogged lane with the lowest pass value; each
+    grant advances that lane's pass by 1/weight (stride scheduling), so
+    lanes get capacity in proportion to their weights. A waiter older than
+    `max_wait` is served next regardless of weight, so low-weight lanes
+    are never starved.
+    """
+
+    def __init__(self, name: str, capacity: int, weights: Dict[str, int], max_wait: float = 5.0,
+                 default_lane: str = "standard", window: int = 500):
+        self.name = name
+        self.capacity = capacity
+        self.weights = weights
+        self.max_wait = max_wait
+        self.default_lane = default_lane if default_lane in weights else next(iter(weights))
+        self.active = 0
+        self._queues: Dict[str, Deque[Tuple[asyncio.Future, float]]] = {lane: deque() for lane in weights}
+        self._pass: Dict[str, float] = {lane: 0.0 for lane in weights}
+        self._vtime = 0.0
+        self._stats = {
+            lane: {"granted": 0, "queued": 0, "aged": 0, "wait_ms_total": 0.0, "recent": deque(maxlen=window)}
+            for lane in weights
+        }
+
+    def _backlogged(self) -> bool:
+        return any(self._queues.values())
+
+    def _pick(self) -> str:
+        now = time.perf_counter()
+        lanes = [lane for lane, queue in self._queues.items() if queue]
+        # Starvation protection: anything past max_wait goes first, oldest first
+        aged = [lane for lane in lanes if now - self._queues[lane][0][1] >= self.max_wait]
+        if aged:
+            lane = min(aged, key=lambda l: self._queues[l][0][1])
+            self._stats[lane]["aged"] += 1
+        else:
+            lane = min(lanes, key=lambda l: (self._pass[l], -self.weights[l]))
+        self._vtime = self._pass[lane]
+        self._pass[lane] += 1.0 / self.weights[lane]
+        return lane
+
+    def _dispatch(self) -> None:
+        while self.active < self.capacity and self._backlogged():
+            lane = self._pick()
+            waiter, _ = self._queues[lane].popleft()
+            if waiter.done():
+                continue  # cancelled while queued - the slot goes to the next waiter
+            self.active += 1
+            waiter.set_result(None)
+
+    def _record(self, lane: str, wait_s: float) -> None:
+        stats = self._stats[lane]
+        stats["granted"] += 1
+        stats["wait_ms_total"] += wait_s * 1000
+        stats["recent"].append(wait_s * 1000)
+
+    async def acquire(self, lane: Optional[str] = None) -> Tuple[str, float]:
+        """
+        Wait for a slot in `lane`
+
+        Returns:
+            (lane actually used, seconds waited)
+        """
+        lane = lane if lane in self.weights else self.default_lane
+        if self.active < self.capacity and not self._backlogged():
+            self.active += 1
+            self._record(lane, 0.0)
+            return lane, 0.0
+
+        queue = self._queues[lane]
+        if not queue:
+            # A lane returning from idle doesn't get credit for the time it was away
+            self._pass[lane] = max(self._pass[lane], self._vtime)
+        waiter = asyncio.get_running_loop().create_future()
+        start = time.perf_counter()
+        entry = (waiter, start)
+        queue.append(entry)
+        self._stats[lane]["queued"] += 1
+        try:
+            # Shielded so cancelling this task never cancels a waiter `_dispatch` may resolve
+            await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # granted just as we were cancelled
+            elif entry in queue:
+                queue.remove(entry)
+            raise
+        waited = time.perf_counter() - start
+        self._record(lane, waited)
+        return lane, waited
+
+    def release(self) -> None:
+        self.active -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, lane: Optional[str] = None) -> AsyncIterator[str]:
+        """Hold one upstream slot; lane defaults to the current request's lane"""
+        lane, waited = await self.acquire(lane or current_lane())
+        current_span().set_attributes(**{"lane": lane, "queue.wait_ms": round(waited * 1000, 3)})
+        try:
+            yield lane
+        finally:
+            self.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        lanes = {}
+        for lane, stats in self._stats.items():
+            recent = sorted(stats["recent"])
+            lanes[lane] = {
+                "weight": self.weights[lane],
+                "waiting": len(self._queues[lane]),
+                "granted": stats["granted"],
+                "queued": stats["queued"],
+                "aged": stats["aged"],
+                "mean_wait_ms": round(stats["wait_ms_total"] / stats["granted"], 2) if stats["granted"] else 0.0,
+                "p95_wait_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 2) if recent else 0.0,
+            }
+        return {"capacity": self.capacity, "active": self.active, "lanes": lanes}
+
+schedulers = {
+    "ai": LaneScheduler("ai", settings.SCHEDULER_AI_CONCURRENCY, settings.PRIORITY_LANES,
+                        settings.PRIORITY_LANE_MAX_WAIT, settings.PRIORITY_DEFAULT_LANE),
+    "render": LaneScheduler("render", settings.SCHEDULER_RENDER_CONCURRENCY, settings.PRIORITY_LANES,
+                            settings.PRIORITY_LANE_MAX_WAIT, settings.PRIORITY_DEFAULT_LANE),
+}
+
+def lane_for(path: str, header: Optional[str]) -> str:
+    """Lane from the X-Priority-Lane header if valid, else by endpoint prefix"""
+    if header and header in settings.PRIORITY_LANES:
+        return header
+    for prefix, lane in settings.PRIORITY_ROUTE_LANES.items():
+        if path.startswith(prefix):
+            return lane
+    return settings.PRIORITY_DEFAULT_LANE
+
+class PriorityLaneMiddleware:
+    """ASGI middleware tagging each request with its priority lane"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or ())
+        header = headers.get(b"x-priority-lane", b"").decode("latin-1").strip().lower() or None
+        token = set_lane(lane_for(scope["path"], header))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_lane(token)
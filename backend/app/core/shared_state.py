@@ -0,0 +1,193 @@
+"""
+Shared state across workers
+Short-lived records every worker on the host has to see at once (job owners, cancellations, jobs in flight)
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+import orjson
+
+from .config import settings
+
+T = TypeVar("T")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shared_state (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_shared_state_expires ON shared_state (expires_at);
+"""
+
+class SharedState:
+    """
+    Expiring key/value records in SQLite, visible to every worker using the same file
+
+    Unlike the artifact store nothing is batched: a record is visible to
+    the other workers as soon as the call returns. Until `start` opens the
+    database (and if it can't be opened) records live in an in-memory
+    database, which is enough for a single worker.
+    """
+
+    def __init__(self, path: str, sweep_interval: float = 60.0):
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._memory: Optional[sqlite3.Connection] = self._open(":memory:", check_same_thread=False)
+        self._last_sweep = time.monotonic()
+        self.stats = {"reads": 0, "writes": 0, "expired": 0, "failed": 0}
+
+    @staticmethod
+    def _open(path: str, **kwargs: Any) -> sqlite3.Connection:
+        # Autocommit; writes that need a transaction open one explicitly
+        conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, **kwargs)
+        if path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._memory is not None:
+            return self._memory
+        # One connection per thread, as in the artifact store
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._open(self.path)
+        return conn
+
+    async def _call(self, fn: Callable[..., T], *args: Any) -> T:
+        if self._memory is not None:
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    # Blocking operations (run off the loop once the file is open)
+
+    def _get_many(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        placeholders = ",".join("?" * len(keys))
+        rows = self._connection().execute(
+            f"SELECT key, value FROM shared_state WHERE namespace = ? AND key IN ({placeholders}) AND expires_at >= ?",
+            (namespace, *keys, time.time()),
+        ).fetchall()
+        return {key: orjson.loads(value) for key, value in rows}
+
+    def _set(self, namespace: str, key: str, value: bytes, ttl: float) -> None:
+        self._connection().execute(
+            "INSERT OR REPLACE INTO shared_state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, value, time.time() + ttl),
+        )
+
+    def _add(self, namespace: str, key: str, value: bytes, ttl: float) -> bool:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM shared_state WHERE namespace = ? AND key = ? AND expires_at < ?",
+                         (namespace, key, now))
+            added = conn.execute(
+                "INSERT OR IGNORE INTO shared_state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, value, now + ttl),
+            ).rowcount == 1
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def _incr(self, namespace: str, key: str, ttl: float) -> int:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value, expires_at FROM shared_state WHERE namespace = ? AND key = ?",
+                               (namespace, key)).fetchone()
+            # The window starts with the first increment and isn't extended by later ones
+            count, expires_at = (orjson.loads(row[0]) + 1, row[1]) if row and row[1] >= now else (1, now + ttl)
+            conn.execute(
+                "INSERT OR REPLACE INTO shared_state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, orjson.dumps(count), expires_at),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def _delete(self, namespace: str, key: str) -> None:
+        self._connection().execute("DELETE FROM shared_state WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def _sweep(self) -> int:
+        return self._connection().execute("DELETE FROM shared_state WHERE expires_at < ?", (time.time(),)).rowcount
+
+    # Async API
+
+    async def _write(self, fn: Callable[..., T], *args: Any) -> Optional[T]:
+        self.stats["writes"] += 1
+        try:
+            result = await self._call(fn, *args)
+            if time.monotonic() - self._last_sweep >= self.sweep_interval:
+                self._last_sweep = time.monotonic()
+                self.stats["expired"] += await self._call(self._sweep)
+            return result
+        except sqlite3.Error as e:
+            self.stats["failed"] += 1
+            print(f"⚠️  Shared state write failed: {e}")
+            return None
+
+    async def get_many(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        """Unexpired values for whichever of `keys` exist"""
+        if not keys:
+            return {}
+        self.stats["reads"] += 1
+        try:
+            return await self._call(self._get_many, namespace, keys)
+        except sqlite3.Error as e:
+            self.stats["failed"] += 1
+            print(f"⚠️  Shared state read failed: {e}")
+            return {}
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        return (await self.get_many(namespace, [key])).get(key)
+
+    async def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        """Store `value` for `ttl` seconds, replacing any previous value"""
+        await self._write(self._set, namespace, key, orjson.dumps(value), ttl)
+
+    async def add(self, namespace: str, key: str, value: Any, ttl: float) -> bool:
+        """Store `value` only if the key is absent or expired; True if this call stored it"""
+        return bool(await self._write(self._add, namespace, key, orjson.dumps(value), ttl))
+
+    async def incr(self, namespace: str, key: str, ttl: float) -> int:
+        """Count one more for `key` in a window of `ttl` seconds; returns the count in the window"""
+        return await self._write(self._incr, namespace, key, ttl) or 0
+
+    async def delete(self, namespace: str, key: str) -> None:
+        await self._write(self._delete, namespace, key)
+
+    async def start(self) -> None:
+        """Move from the in-memory database to the shared file"""
+        if self._memory is None:
+            return
+        memory, self._memory = self._memory, None
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            await asyncio.to_thread(self._connection)
+        except (sqlite3.Error, OSError) as e:
+            self._memory = memory
+            print(f"⚠️  Shared state is per worker: {e}")
+            return
+        memory.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"shared": self._memory is None, "path": self.path, **self.stats}
+
+# Same database file as the artifact store, in a table of its own
+shared_state = SharedState(settings.ARTIFACT_STORE_PATH)
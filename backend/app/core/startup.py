@@ -0,0 +1,56 @@
+"""
+Startup timing records
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List
+
+# Process start reference, as close to interpreter start as this import gets
+PROCESS_START = time.perf_counter()
+
+class StartupTimer:
+    """Records how long each module import and service initialization took"""
+
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+        self.ready_at: float = 0.0
+
+    @contextmanager
+    def measure(self, kind: str, name: str) -> Iterator[None]:
+        """Time a block, e.g. measure("import", "app.api.ai")"""
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except Exception:
+            ok = False
+            raise
+        finally:
+            self.records.append({
+                "kind": kind,
+                "name": name,
+                "ms": round((time.perf_counter() - start) * 1000, 2),
+                "ok": ok,
+            })
+
+    def mark_ready(self) -> None:
+        """Mark the end of startup (lifespan warm-up done)"""
+        self.ready_at = time.perf_counter()
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "total_ms": round(((self.ready_at or time.perf_counter()) - PROCESS_START) * 1000, 2),
+            "ready": bool(self.ready_at),
+            "steps": list(self.records),
+        }
+
+    def summary(self) -> str:
+        """One line per step, slowest first"""
+        lines = [
+            f"  {record['kind']:<6} {record['name']:<28} {record['ms']:>8.1f} ms{'' if record['ok'] else '  (failed)'}"
+            for record in sorted(self.records, key=lambda r: -r["ms"])
+        ]
+        return "\n".join(lines)
+
+startup_timer = StartupTimer()
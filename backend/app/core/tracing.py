@@ -0,0 +1,321 @@
+"""
+Lightweight tracing
+Parent/child spans over contextvars, W3C trace-context propagation and pluggable exporters
+"""
+
+import abc
+import asyncio
+import functools
+import importlib
+import os
+import random
+import re
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+
+from .config import settings
+
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header, None if absent or invalid"""
+    if not header:
+        return None
+    match = TRACEPARENT_RE.match(header.strip().lower())
+    if not match:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+class Span:
+    """One timed operation; ended by the `Tracer.span` context manager"""
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status")
+
+    recording = True
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str],
+                 attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def record_exception(self, error: BaseException) -> None:
+        self.status = "error"
+        self.attributes["error.type"] = type(error).__name__
+        self.attributes["error.message"] = str(error)[:500]
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+class _NoopSpan:
+    """Stand-in when nothing is being traced; every call is a no-op"""
+
+    recording = False
+    traceparent = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+    def record_exception(self, error: BaseException) -> None:
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def current_span():
+    """The active span, or a no-op span outside a sampled trace"""
+    return _current_span.get() or NOOP_SPAN
+
+class SpanExporter(abc.ABC):
+    """Receives finished spans in batches; subclass and set TRACING_EXPORTER to plug one in"""
+
+    @abc.abstractmethod
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        """Called from a worker thread; may block"""
+
+    def shutdown(self) -> None:
+        pass
+
+class JsonLinesExporter(SpanExporter):
+    """Appends one JSON object per span to a local file"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(b"".join(orjson.dumps(span) + b"\n" for span in spans))
+
+class ConsoleExporter(SpanExporter):
+    """Prints one line per span"""
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        for span in spans:
+            print(f"🔎 {span['trace_id'][:8]} {span['name']:<32} {span['duration_ms']:>9.1f} ms {span['status']}")
+
+class InMemoryExporter(SpanExporter):
+    """Keeps exported spans in a list, for tests and benchmarks"""
+
+    def __init__(self):
+        self.spans: List[Dict[str, Any]] = []
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        self.spans.extend(spans)
+
+class Tracer:
+    """
+    Creates spans and hands finished ones to the exporter in batches
+
+    Child spans are only recorded inside a sampled root span started by
+    `start_trace` (the tracing middleware does this per request), so code
+    instrumented with `span()` costs one context lookup when tracing is off.
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter] = None, sample_rate: float = 1.0,
+                 flush_interval: float = 1.0, max_buffer: int = 10000):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def _activate(self, span: Span) -> Iterator[Span]:
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            if len(self._buffer) < self.max_buffer:
+                self._buffer.append(span.to_dict())
+            else:
+                self.dropped += 1
+
+    @contextmanager
+    def start_trace(self, name: str, traceparent: Optional[str] = None, **attributes: Any) -> Iterator[Any]:
+        """
+        Root span for a unit of work, continuing the caller's trace when a
+        traceparent is given. The caller's sampled flag wins over sample_rate.
+        """
+        if self.exporter is None:
+            yield NOOP_SPAN
+            return
+
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+            sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+        if not sampled:
+            yield NOOP_SPAN
+            return
+
+        with self._activate(Span(self, name, trace_id, parent_id, attributes)) as span:
+            yield span
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Any]:
+        """Child of the current span; a no-op outside a sampled trace"""
+        parent = _current_span.get()
+        if parent is None:
+            yield NOOP_SPAN
+            return
+        with self._activate(Span(self, name, parent.trace_id, parent.span_id, attributes)) as span:
+            yield span
+
+    def flush(self) -> None:
+        """Export buffered spans now (blocking)"""
+        spans, self._buffer = self._buffer, []
+        if spans and self.exporter is not None:
+            try:
+                self.exporter.export(spans)
+            except Exception as e:
+                print(f"⚠️  Span export of {len(spans)} spans failed: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self._buffer:
+                await asyncio.to_thread(self.flush)
+
+    def start(self) -> None:
+        """Start exporting in the background"""
+        if self.exporter is not None and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.exporter is not None:
+            await asyncio.to_thread(self.flush)
+            self.exporter.shutdown()
+
+def traced(name: str):
+    """Decorator running an async function inside a child span"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _exporter_from_settings() -> Optional[SpanExporter]:
+    name = settings.TRACING_EXPORTER
+    if not name or name == "none":
+        return None
+    if name == "jsonl":
+        return JsonLinesExporter(settings.TRACING_PATH)
+    if name == "console":
+        return ConsoleExporter()
+    # Any other value is a "package.module:ClassName" exporter taking no arguments
+    module_name, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+tracer = Tracer(_exporter_from_settings(), sample_rate=settings.TRACING_SAMPLE_RATE)
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening a root span per HTTP request
+
+    Continues the caller's trace from the `traceparent` header and returns
+    the request's own traceparent so callers can correlate. Only installed
+    when an exporter is configured.
+    """
+
+    def __init__(self, app, tracer: Tracer = tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or ())
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1") or None
+
+        with self.tracer.start_trace(
+            f"{scope['method']} {scope['path']}", traceparent,
+            **{"http.method": scope["method"], "http.path": scope["path"]}
+        ) as span:
+            if not span.recording:
+                await self.app(scope, receive, send)
+                return
+
+            sizes = {"request": 0, "response": 0}
+
+            async def receive_wrapper():
+                message = await receive()
+                if message["type"] == "http.request":
+                    sizes["request"] += len(message.get("body", b""))
+                return message
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    message["headers"] = list(message.get("headers", [])) + [(b"traceparent", span.traceparent.encode())]
+                elif message["type"] == "http.response.body":
+                    sizes["response"] += len(message.get("body", b""))
+                await send(message)
+
+            try:
+                await self.app(scope, receive_wrapper, send_wrapper)
+            finally:
+                span.set_attributes(**{"http.request_bytes": sizes["request"], "http.response_bytes": sizes["response"]})
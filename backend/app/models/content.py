@@ -2,9 +2,11 @@
 Pydantic models for content generation requests and responses
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional, Dict, Any
 
+from app.core.localization import normalize_locale
+
 class BusinessInfo(BaseModel):
     """Business information for content generation"""
     name: str = Field(..., description="Business name")
@@ -18,6 +20,22 @@ class ContentRequest(BaseModel):
     business_info: BusinessInfo
     selected_features: List[str] = Field(..., description="Selected features to highlight")
     additional_context: Optional[str] = Field(None, description="Additional context or requirements")
+    project_id: Optional[str] = Field(None, description="Project ID; picks up a pre-warmed analysis if one is parked")
+    job_id: Optional[str] = Field(None, description="Job ID; retries with the same job ID attach to or replay the first run")
+    candidates: int = Field(default=1, ge=1, le=5, description="Copy candidates to write in one model call; the best is returned, the rest as alternatives")
+    locales: Optional[List[str]] = Field(None, min_length=1, max_length=8, description="Target locales (BCP 47, e.g. de-DE); copy is written per locale from one analysis")
+
+    @field_validator("locales")
+    @classmethod
+    def _normalize_locales(cls, locales: Optional[List[str]]) -> Optional[List[str]]:
+        # Canonical casing, duplicates dropped, order kept
+        return list(dict.fromkeys(normalize_locale(locale) for locale in locales)) if locales else locales
+
+class PrewarmRequest(BaseModel):
+    """Request to run the business analysis stage ahead of generation"""
+    project_id: str = Field(..., description="Project ID from Convex")
+    business_info: BusinessInfo
+    selected_features: List[str] = Field(..., description="Selected features to highlight")
 
 class BulletPoint(BaseModel):
     """A single bullet point with title and description"""
@@ -39,7 +57,7 @@ class CopyData(BaseModel):
     """Generated marketing copy data"""
     headline: str = Field(..., max_length=90, description="Main headline")
     subheadline: Optional[str] = Field(None, max_length=140, description="Sub-headline")
-    bullets: List[BulletPoint] = Field(..., min_items=3, max_items=3, description="Exactly 3 bullet points")
+    bullets: List[BulletPoint] = Field(..., min_length=3, max_length=3, description="Exactly 3 bullet points")
     cta: Optional[CallToAction] = Field(None, description="Call to action")
     palette: Optional[str] = Field(None, description="Selected palette: classic_graphite|polished_nickel|slate_copper|soft_tungsten|charcoal_bronze|pewter_gold")
 
@@ -48,6 +66,9 @@ class ContentResponse(BaseModel):
     success: bool = Field(..., description="Whether generation was successful")
     copy_data: CopyData = Field(..., description="Generated marketing copy")
     analysis: Optional[Dict[str, Any]] = Field(None, description="Business analysis data")
+    localized_copy: Optional[Dict[str, CopyData]] = Field(None, description="Copy per requested locale that succeeded; copy_data is the first of them")
+    failed_locales: Optional[List[str]] = Field(None, description="Requested locales whose copy could not be generated; not in localized_copy")
+    alternatives: Optional[List[CopyData]] = Field(None, description="Runner-up candidates, best first, for instant \"try another\" swaps")
     message: str = Field(..., description="Status message")
 
 # Render request models
@@ -58,6 +79,7 @@ class RenderRequest(BaseModel):
     copy_data: CopyData = Field(..., description="Marketing copy to render")
     assets: Dict[str, str] = Field(..., description="Asset URLs (logo, hero)")
     template: str = Field(default="product_a", description="Template to use")
+    preview: bool = Field(default=False, description="Return a low-res PNG preview now and render the print PDF in the background")
     
 class LayoutData(BaseModel):
     """Layout configuration data"""
@@ -71,3 +93,30 @@ class RenderResponse(BaseModel):
     png_url: Optional[str] = Field(None, description="PNG thumbnail URL")
     message: str = Field(..., description="Status message")
     render_time: Optional[float] = Field(None, description="Rendering time in seconds")
+    preview_url: Optional[str] = Field(None, description="Low-res PNG preview URL (preview mode)")
+    pdf_status: str = Field(default="ready", description="ready|pending|failed|cancelled - pending while the print PDF renders in the background")
+
+# End-to-end pipeline models
+class BrochureRequest(BaseModel):
+    """Request for the end-to-end brochure pipeline (copy + render in one call)"""
+    project_id: str = Field(..., description="Project ID from Convex")
+    job_id: str = Field(..., description="Job ID from Convex")
+    business_info: BusinessInfo
+    selected_features: List[str] = Field(..., description="Selected features to highlight")
+    additional_context: Optional[str] = Field(None, description="Additional context or requirements")
+    assets: Dict[str, str] = Field(default_factory=dict, description="Asset URLs (logo, hero)")
+    template: str = Field(default="product_a", description="Template to use")
+    preview: bool = Field(default=False, description="Return a low-res PNG preview now and render the print PDF in the background")
+    stream: bool = Field(default=False, description="Stream stage progress as NDJSON events")
+
+class BrochureResponse(BaseModel):
+    """Combined result of the end-to-end brochure pipeline"""
+    success: bool = Field(..., description="Whether copy and rendering both succeeded")
+    copy_data: CopyData = Field(..., description="Generated marketing copy")
+    analysis: Optional[Dict[str, Any]] = Field(None, description="Business analysis data")
+    pdf_url: Optional[str] = Field(None, description="PDF download URL")
+    png_url: Optional[str] = Field(None, description="PNG thumbnail URL")
+    message: str = Field(..., description="Status message")
+    preview_url: Optional[str] = Field(None, description="Low-res PNG preview URL (preview mode)")
+    pdf_status: str = Field(default="ready", description="ready|pending|failed|cancelled - pending while the print PDF renders in the background")
+    timings: Dict[str, float] = Field(default_factory=dict, description="Seconds spent per stage")
@@ -6,12 +6,24 @@ Multi-stage copywriting intelligence with industry-specific optimization
 import google.generativeai as genai
 import json
 import asyncio
+import functools
 from typing import Dict, Any, List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 
 from app.core.config import settings
+from app.core.progress import StageCallback, emit_stage
+from app.core.tracing import current_span, traced
+from app.core.scheduler import schedulers
+from app.core.cancellation import record_upstream_call
+from app.core.deadline import DeadlineExceeded, stage_budgets
+from app.core.localization import language_name, truncate_text
 from app.models.content import ContentRequest, ContentResponse, CopyData
 from app.services.industry_intelligence import IndustryIntelligence
+from app.services.prewarm import analysis_fingerprint, prewarm_store
+from app.services.artifact_store import artifact_store
+
+# Character limits enforced in stage 3 (and used to score copy candidates)
+COPY_LIMITS = {"headline": 90, "subheadline": 140, "bullet_title": 28, "bullet_desc": 120, "cta_label": 25, "cta_sub": 50}
 
 class AIService:
     """Enhanced AI service with copywriting intelligence"""
@@ -25,12 +37,15 @@ class AIService:
         self.model = genai.GenerativeModel('gemini-1.5-flash')
         self.industry_intel = IndustryIntelligence()
         
-    async def generate_content(self, request: ContentRequest) -> ContentResponse:
+    @traced("ai.generate_content")
+    async def generate_content(self, request: ContentRequest,
+                               on_stage: Optional[StageCallback] = None) -> ContentResponse:
         """
         Generate enhanced marketing copy using multi-stage AI processing
         
         Args:
             request: Content generation request with business info
+            on_stage: Optional callback for stage progress events
             
         Returns:
             Enhanced marketing copy with professional copywriting
@@ -38,24 +53,57 @@ class AIService:
         
         try:
             # Stage 1: Business Analysis & Strategy
-            analysis = await self._analyze_business(request)
+            # (reuses a speculative analysis from /api/ai/prewarm when still valid,
+            # or a stored one of the same project for the same inputs)
+            await emit_stage(on_stage, "analysis", "started")
+            analysis = await prewarm_store.take(request.project_id, request)
+            current_span().set_attribute("prewarm.hit", analysis is not None)
+            if analysis is None and settings.ARTIFACT_REUSE_ANALYSIS and request.project_id:
+                analysis = await artifact_store.latest("analysis", content_hash=analysis_fingerprint(request),
+                                                       project_id=request.project_id)
+                current_span().set_attribute("artifact.hit", analysis is not None)
+            if analysis is None:
+                try:
+                    analysis = await stage_budgets.run("analysis", lambda: self._analyze_business(request))
+                except DeadlineExceeded:
+                    # Out of time - write from the industry defaults instead
+                    stage_budgets.degrade("fallback_analysis")
+                    industry_data = self.industry_intel.get_industry_data(request.business_info.type)
+                    analysis = self._create_fallback_analysis(request, industry_data)
+            await emit_stage(on_stage, "analysis", "done")
+            
+            if request.locales:
+                return await self._generate_localized(request, analysis, on_stage)
             
             # Stage 2: Content Generation with Copywriting Intelligence  
-            copy_data = await self._generate_copy(request, analysis)
+            # (several candidates in one call when asked, best first)
+            await emit_stage(on_stage, "copy", "started")
+            candidates = await stage_budgets.run(
+                "copy", lambda: self._generate_copy(request, analysis, candidates=request.candidates)
+            )
+            await emit_stage(on_stage, "copy", "done", candidates=len(candidates))
             
             # Stage 3: Validation & Conformance
-            validated_copy = await self._validate_and_conform(copy_data)
+            validated = await self._validate_candidates(candidates)
+            await emit_stage(on_stage, "validate", "done")
             
-            return ContentResponse(
+            # Copy was validated once in stage 3 - no need to re-validate the envelope
+            return ContentResponse.model_construct(
                 success=True,
-                copy_data=validated_copy,
+                copy_data=validated[0],
                 analysis=analysis,
+                localized_copy=None,
+                failed_locales=None,
+                alternatives=validated[1:] or None,
                 message="Content generated successfully"
             )
             
         except Exception as e:
-            # Fallback to safe defaults
+            # Fallback to safe defaults (also when the copy stage runs out of time)
+            if isinstance(e, DeadlineExceeded):
+                stage_budgets.degrade("fallback_content")
             print(f"AI generation failed: {e}")
+            await emit_stage(on_stage, "copy", "failed", error=str(e))
             fallback_copy = self._create_fallback_content(request)
             
             return ContentResponse(
@@ -65,6 +113,59 @@ class AIService:
                 message=f"Used fallback content due to AI error: {str(e)}"
             )
     
+    async def _generate_localized(self, request: ContentRequest, analysis: Dict[str, Any],
+                                  on_stage: Optional[StageCallback] = None) -> ContentResponse:
+        """
+        Stages 2 and 3 once per locale, concurrently, from one shared analysis
+        
+        copy_data is the first successful locale's copy so single-locale
+        callers keep working. Locales whose copy failed are listed in
+        failed_locales instead of being filled with the English defaults;
+        only when every locale fails does the caller fall back.
+        """
+        
+        await emit_stage(on_stage, "copy", "started", locales=request.locales)
+        ranked = await stage_budgets.run("copy", lambda: asyncio.gather(*(
+            self._generate_copy(request, analysis, locale, candidates=request.candidates, fallback=False)
+            for locale in request.locales
+        ), return_exceptions=True))
+        await emit_stage(on_stage, "copy", "done", locales=request.locales)
+        
+        async def validate(candidates: Any, locale: str) -> Optional[List[CopyData]]:
+            if isinstance(candidates, BaseException):
+                return None
+            try:
+                return await self._validate_candidates(candidates, locale)
+            except ValueError:
+                return None
+        
+        # Best surviving candidate per locale; the first one's runners-up become alternatives
+        validated = await asyncio.gather(*(
+            validate(candidates, locale) for candidates, locale in zip(ranked, request.locales)
+        ))
+        localized = {locale: candidates for locale, candidates in zip(request.locales, validated) if candidates}
+        failed_locales = [locale for locale in request.locales if locale not in localized]
+        if not localized:
+            raise ValueError(f"Copy generation failed in every locale ({', '.join(failed_locales)})")
+        await emit_stage(on_stage, "validate", "done", failed_locales=failed_locales or None)
+        
+        best = next(iter(localized.values()))
+        localized_copy = {locale: candidates[0] for locale, candidates in localized.items()}
+        message = f"Content generated successfully in {len(localized_copy)} locales"
+        if failed_locales:
+            message = (f"Content generated in {len(localized_copy)} of {len(request.locales)} locales; "
+                       f"failed: {', '.join(failed_locales)}")
+        return ContentResponse.model_construct(
+            success=True,
+            copy_data=best[0],
+            analysis=analysis,
+            localized_copy=localized_copy,
+            failed_locales=failed_locales or None,
+            alternatives=best[1:] or None,
+            message=message
+        )
+    
+    @traced("ai.analyze_business")
     async def _analyze_business(self, request: ContentRequest) -> Dict[str, Any]:
         """
         Stage 1: Analyze business and create marketing strategy
@@ -126,20 +227,52 @@ class AIService:
         }}
         """
         
+        span = current_span()
+        if span.recording:
+            industry, confidence = self.industry_intel.classify_industries([request.business_info.type])[0]
+            span.set_attributes(**{
+                "business.type": request.business_info.type,
+                "industry": industry or "default",
+                "industry.confidence": round(confidence, 3),
+                "prompt.chars": len(analysis_prompt),
+            })
+        
         try:
             response = await self._call_gemini(analysis_prompt)
             # Clean the response to ensure valid JSON
             cleaned_response = self._clean_json_response(response)
-            return json.loads(cleaned_response)
+            analysis = json.loads(cleaned_response)
+            # Fallback analyses aren't stored, so they are never reused
+            artifact_store.put("analysis", analysis, project_id=request.project_id,
+                               content_hash=analysis_fingerprint(request))
+            return analysis
         except Exception as e:
             print(f"Business analysis failed: {e}")
             return self._create_fallback_analysis(request, industry_data)
     
-    async def _generate_copy(self, request: ContentRequest, analysis: Dict[str, Any]) -> CopyData:
+    @traced("ai.generate_copy")
+    async def _generate_copy(self, request: ContentRequest, analysis: Dict[str, Any],
+                             locale: Optional[str] = None, candidates: int = 1,
+                             fallback: bool = True) -> List[CopyData]:
         """
         Stage 2: Generate compelling copy based on strategic analysis
+        
+        With a locale, the copy is written natively for that market. With
+        candidates > 1 the model writes that many distinct versions in the
+        same call; they are returned best first (see `_score_candidate`).
+        Failures return the default (English) copy, or raise without `fallback`.
         """
         
+        language_requirements = ""
+        if locale:
+            language_requirements = f"""
+        LANGUAGE:
+        - Write the headline, subheadline, bullets and CTA in {language_name(locale)}
+        - Write natively for that market; do not translate English idioms literally
+        - Character limits below apply to the {language_name(locale)} text
+        - Keep JSON keys and the palette value exactly as specified (English)
+"""
+        
         copywriting_prompt = f"""
         Based on this strategic analysis, write compelling brochure copy that converts:
 
@@ -155,7 +288,7 @@ class AIService:
         - Industry: {request.business_info.type}
         - Description: {request.business_info.description}
         - Features: {', '.join(request.selected_features)}
-
+        {language_requirements}
         COPYWRITING REQUIREMENTS:
         - Headline: Benefit-focused, emotionally resonant (≤90 characters)
         - Subheadline: Clarifies value prop, addresses main pain point (≤140 characters)  
@@ -250,78 +383,165 @@ class AIService:
         }}
         """
         
+        if candidates > 1:
+            copywriting_prompt += f"""
+        MULTIPLE CANDIDATES:
+        Write {candidates} distinctly different versions (different angles, headlines and CTAs),
+        each following the required JSON structure and character limits above.
+        Return ONLY a JSON object of the form {{"candidates": [<version 1>, <version 2>, ...]}}
+        """
+        
+        span = current_span()
+        span.set_attributes(**{"prompt.chars": len(copywriting_prompt), "locale": locale or "default",
+                               "candidates.requested": candidates})
+        
         try:
             response = await self._call_gemini(copywriting_prompt)
             # Clean the response to ensure valid JSON
             cleaned_response = self._clean_json_response(response)
             copy_json = json.loads(cleaned_response)
             
-            from app.models.content import BulletPoint, CallToAction
-            
-            # Create bullet points
-            bullets = [
-                BulletPoint(title=bullet["title"], desc=bullet["desc"])
-                for bullet in copy_json["bullets"]
-            ]
+            # A single object is accepted even when several were asked for
+            raw_candidates = copy_json.get("candidates") if isinstance(copy_json.get("candidates"), list) else [copy_json]
+            parsed = []
+            for raw in raw_candidates[:candidates]:
+                try:
+                    parsed.append(self._copy_from_json(raw))
+                except (KeyError, TypeError) as e:
+                    print(f"Skipping malformed copy candidate: {e}")
+            if not parsed:
+                raise ValueError("No usable copy candidates in response")
             
-            # Create CTA if present
-            cta = None
-            if copy_json.get("cta"):
-                cta = CallToAction(
-                    label=copy_json["cta"]["label"],
-                    sub=copy_json["cta"].get("sub")
-                )
-            
-            return CopyData(
-                headline=copy_json["headline"],
-                subheadline=copy_json.get("subheadline"),
-                bullets=bullets,
-                cta=cta
-            )
+            ranked = sorted(parsed, key=self._score_candidate, reverse=True)
+            span.set_attributes(**{"candidates.returned": len(ranked),
+                                   "candidates.best_score": self._score_candidate(ranked[0])})
+            return ranked
             
         except Exception as e:
-            print(f"Copy generation failed: {e}")
-            return self._create_fallback_copy_data(request)
+            print(f"Copy generation failed{f' for {locale}' if locale else ''}: {e}")
+            if not fallback:
+                raise
+            return [self._create_fallback_copy_data(request)]
     
-    async def _validate_and_conform(self, copy_data: CopyData) -> CopyData:
+    @staticmethod
+    def _copy_from_json(copy_json: Dict[str, Any]) -> CopyData:
+        """Build CopyData from the model's JSON without validation - stage 3 conforms and validates once"""
+        
+        from app.models.content import BulletPoint, CallToAction
+        
+        bullets = [
+            BulletPoint.model_construct(title=bullet["title"], desc=bullet["desc"])
+            for bullet in copy_json["bullets"]
+        ]
+        
+        # Create CTA if present
+        cta = None
+        if copy_json.get("cta"):
+            cta = CallToAction.model_construct(
+                label=copy_json["cta"]["label"],
+                sub=copy_json["cta"].get("sub")
+            )
+        
+        return CopyData.model_construct(
+            headline=copy_json["headline"],
+            subheadline=copy_json.get("subheadline"),
+            bullets=bullets,
+            cta=cta
+        )
+    
+    @staticmethod
+    def _score_candidate(copy_data: CopyData) -> float:
+        """
+        Constraint fit of raw copy, higher is better (0 = fits everything)
+        
+        Anything stage 3 would have to truncate costs at least 1 plus the
+        relative overflow; a wrong bullet count costs 2 per bullet, a
+        missing CTA 1 and a missing subheadline 0.5.
+        """
+        
+        def overflow(text: Optional[str], limit: int) -> float:
+            if not text or len(text) <= limit:
+                return 0.0
+            return 1.0 + (len(text) - limit) / limit
+        
+        penalty = overflow(copy_data.headline, COPY_LIMITS["headline"])
+        penalty += overflow(copy_data.subheadline, COPY_LIMITS["subheadline"])
+        penalty += 2.0 * abs(len(copy_data.bullets) - 3)
+        for bullet in copy_data.bullets[:3]:
+            penalty += overflow(bullet.title, COPY_LIMITS["bullet_title"])
+            penalty += overflow(bullet.desc, COPY_LIMITS["bullet_desc"])
+        if copy_data.cta and copy_data.cta.label:
+            penalty += overflow(copy_data.cta.label, COPY_LIMITS["cta_label"])
+            penalty += overflow(copy_data.cta.sub, COPY_LIMITS["cta_sub"])
+        else:
+            penalty += 1.0
+        if not copy_data.subheadline:
+            penalty += 0.5
+        return round(-penalty, 3)
+    
+    async def _validate_candidates(self, candidates: List[CopyData], locale: Optional[str] = None) -> List[CopyData]:
+        """
+        Stage 3 for each candidate, keeping their order
+        
+        A candidate that still fails validation is dropped rather than
+        failing the others; only when none survive does the caller fall back.
+        """
+        
+        validated = []
+        for copy_data in candidates:
+            try:
+                validated.append(await self._validate_and_conform(copy_data, locale))
+            except (ValidationError, TypeError) as e:
+                print(f"Dropping copy candidate that failed validation: {e}")
+        if not validated:
+            raise ValueError("No copy candidate passed validation")
+        return validated
+    
+    @traced("ai.validate_and_conform")
+    async def _validate_and_conform(self, copy_data: CopyData, locale: Optional[str] = None) -> CopyData:
         """
         Stage 3: Validate and conform content to strict constraints
+        
+        Builds a conformed payload and validates it in a single pass.
+        Truncation never splits a grapheme and follows the locale's conventions.
         """
         
+        truncate = functools.partial(self._truncate, locale=locale)
+        
+        # Ensure exactly 3 bullets, padding with generic bullets if needed
+        bullets = [{"title": bullet.title, "desc": bullet.desc} for bullet in copy_data.bullets[:3]]
+        while len(bullets) < 3:
+            bullets.append({
+                "title": "Additional Value",
+                "desc": "More benefits and features designed specifically for your needs"
+            })
+        
         # Character limit enforcement
-        if len(copy_data.headline) > 90:
-            copy_data.headline = copy_data.headline[:87] + "..."
-            
-        if copy_data.subheadline and len(copy_data.subheadline) > 140:
-            copy_data.subheadline = copy_data.subheadline[:137] + "..."
-        
-        # Ensure exactly 3 bullets
-        if len(copy_data.bullets) > 3:
-            copy_data.bullets = copy_data.bullets[:3]
-        elif len(copy_data.bullets) < 3:
-            # Pad with generic bullets if needed
-            from app.models.content import BulletPoint
-            while len(copy_data.bullets) < 3:
-                copy_data.bullets.append(BulletPoint(
-                    title="Additional Value",
-                    desc="More benefits and features designed specifically for your needs"
-                ))
-        
-        # Validate bullet constraints
-        for bullet in copy_data.bullets:
-            if len(bullet.title) > 28:
-                bullet.title = bullet.title[:25] + "..."
-            if len(bullet.desc) > 120:
-                bullet.desc = bullet.desc[:117] + "..."
+        conformed = {
+            "headline": truncate(copy_data.headline, COPY_LIMITS["headline"]),
+            "subheadline": truncate(copy_data.subheadline, COPY_LIMITS["subheadline"]),
+            "bullets": [
+                {"title": truncate(bullet["title"], COPY_LIMITS["bullet_title"]),
+                 "desc": truncate(bullet["desc"], COPY_LIMITS["bullet_desc"])}
+                for bullet in bullets
+            ],
+            "cta": None,
+            "palette": copy_data.palette
+        }
         
         # Validate CTA constraints
         if copy_data.cta:
-            if len(copy_data.cta.label) > 25:
-                copy_data.cta.label = copy_data.cta.label[:22] + "..."
-            if copy_data.cta.sub and len(copy_data.cta.sub) > 50:
-                copy_data.cta.sub = copy_data.cta.sub[:47] + "..."
+            conformed["cta"] = {
+                "label": truncate(copy_data.cta.label, COPY_LIMITS["cta_label"]),
+                "sub": truncate(copy_data.cta.sub, COPY_LIMITS["cta_sub"])
+            }
         
-        return copy_data
+        return CopyData.model_validate(conformed)
+    
+    @staticmethod
+    def _truncate(text: Optional[str], limit: int, locale: Optional[str] = None) -> Optional[str]:
+        """Truncate with an ellipsis so the result fits within limit"""
+        return truncate_text(text, limit, locale)
     
     def _clean_json_response(self, response: str) -> str:
         """Clean AI response to ensure valid JSON"""
@@ -345,21 +565,31 @@ class AIService:
         
         return response.strip()
 
+    @traced("gemini.generate_content")
     async def _call_gemini(self, prompt: str) -> str:
         """Call Gemini API with retry logic"""
         
         max_retries = 2
         for attempt in range(max_retries):
             try:
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config=genai.types.GenerationConfig(
-                        temperature=0.7,
-                        max_output_tokens=2048,
+                # Gemini capacity is shared between priority lanes
+                async with schedulers["ai"].slot():
+                    record_upstream_call("gemini")
+                    # Async client so concurrent calls (e.g. per-locale copy) overlap
+                    response = await self.model.generate_content_async(
+                        prompt,
+                        generation_config=genai.types.GenerationConfig(
+                            temperature=0.7,
+                            max_output_tokens=2048,
+                        )
                     )
-                )
                 
                 if response.text:
+                    current_span().set_attributes(**{
+                        "prompt.chars": len(prompt),
+                        "response.chars": len(response.text),
+                        "attempts": attempt + 1,
+                    })
                     return response.text.strip()
                 else:
                     raise Exception("Empty response from Gemini")
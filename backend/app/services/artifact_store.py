@@ -0,0 +1,229 @@
+"""
+Local artifact store
+Pipeline state (analysis, copy, variant configs, render results) in SQLite so later operations can reuse it
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+
+from app.core.config import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    project_id TEXT,
+    job_id TEXT,
+    content_hash TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_project ON artifacts (project_id, kind, created_at);
+CREATE INDEX IF NOT EXISTS idx_artifacts_job ON artifacts (job_id, kind, created_at);
+CREATE INDEX IF NOT EXISTS idx_artifacts_hash ON artifacts (content_hash, kind, created_at);
+CREATE INDEX IF NOT EXISTS idx_artifacts_expires ON artifacts (expires_at);
+"""
+
+Row = Tuple[str, Optional[str], Optional[str], str, bytes, float, float]
+
+class ArtifactStore:
+    """
+    Pipeline artifacts in an embedded SQLite database (WAL mode)
+
+    `put` only queues the row; a background task writes queued rows in one
+    transaction every `flush_interval` seconds or once `batch_size` are
+    waiting, so recording never adds latency to a request. Reads go to a
+    per-thread connection off the event loop and also see rows not yet
+    written. Rows expire `retention` seconds after they were recorded.
+
+    `content_hash` identifies what an artifact was produced from (e.g. the
+    analysis input fingerprint); it defaults to a hash of the payload.
+    """
+
+    def __init__(self, path: str, retention: float = 7 * 86400.0, batch_size: int = 100,
+                 flush_interval: float = 0.5, sweep_interval: float = 600.0):
+        self.path = path
+        self.retention = retention
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._pending: List[Row] = []
+        self._writing: List[Row] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ready = False
+        self.stats = {"queued": 0, "written": 0, "batches": 0, "failed": 0, "expired": 0, "reads": 0, "hits": 0}
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers run while a batch is written
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def put(self, kind: str, payload: Any, project_id: Optional[str] = None, job_id: Optional[str] = None,
+            content_hash: Optional[str] = None) -> None:
+        """Queue an artifact for writing; never blocks"""
+        if not self._ready:
+            return
+        now = time.time()
+        data = orjson.dumps(payload)
+        digest = content_hash or hashlib.sha256(data).hexdigest()
+        self._pending.append((kind, project_id, job_id, digest, data, now, now + self.retention))
+        self.stats["queued"] += 1
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def _write(self, rows: List[Row]) -> None:
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO artifacts (kind, project_id, job_id, content_hash, payload, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    async def flush(self) -> None:
+        """Write everything queued now"""
+        rows, self._pending = self._pending, []
+        if not rows:
+            return
+        # Still visible to reads while the batch is being written
+        self._writing = rows
+        try:
+            await asyncio.to_thread(self._write, rows)
+            self.stats["written"] += len(rows)
+            self.stats["batches"] += 1
+        except sqlite3.Error as e:
+            self.stats["failed"] += len(rows)
+            print(f"⚠️  Artifact batch of {len(rows)} failed: {e}")
+        finally:
+            self._writing = []
+
+    def _sweep(self) -> int:
+        conn = self._connection()
+        with conn:
+            return conn.execute("DELETE FROM artifacts WHERE expires_at < ?", (time.time(),)).rowcount
+
+    async def sweep(self) -> None:
+        """Delete artifacts past their retention"""
+        try:
+            self.stats["expired"] += await asyncio.to_thread(self._sweep)
+        except sqlite3.Error as e:
+            print(f"⚠️  Artifact sweep failed: {e}")
+
+    def _select(self, where: str, args: tuple, limit: int) -> List[Dict[str, Any]]:
+        cursor = self._connection().execute(
+            "SELECT kind, project_id, job_id, content_hash, payload, created_at FROM artifacts "
+            f"WHERE {where} AND expires_at >= ? ORDER BY created_at DESC, id DESC LIMIT ?",
+            (*args, time.time(), limit),
+        )
+        return [self._entry(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _entry(row) -> Dict[str, Any]:
+        kind, project_id, job_id, digest, payload, created_at = row[:6]
+        return {"kind": kind, "project_id": project_id, "job_id": job_id, "content_hash": digest,
+                "payload": orjson.loads(payload), "created_at": created_at}
+
+    def _pending_matches(self, filters: Dict[str, Optional[str]]) -> List[Dict[str, Any]]:
+        # Newest first, same shape as rows read back from the database
+        columns = ("kind", "project_id", "job_id", "content_hash")
+        matches = []
+        for row in reversed(self._writing + self._pending):
+            values = dict(zip(columns, row[:4]))
+            if all(value is None or values[key] == value for key, value in filters.items()):
+                matches.append(self._entry(row))
+        return matches
+
+    async def find(self, kind: Optional[str] = None, project_id: Optional[str] = None, job_id: Optional[str] = None,
+                   content_hash: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Artifacts matching every given filter, newest first"""
+        if not self._ready:
+            return []
+        filters = {"kind": kind, "project_id": project_id, "job_id": job_id, "content_hash": content_hash}
+        where = " AND ".join(f"{key} = ?" for key, value in filters.items() if value is not None) or "1 = 1"
+        args = tuple(value for value in filters.values() if value is not None)
+
+        self.stats["reads"] += 1
+        results = self._pending_matches(filters)[:limit]
+        if len(results) < limit:
+            try:
+                results += await asyncio.to_thread(self._select, where, args, limit - len(results))
+            except sqlite3.Error as e:
+                print(f"⚠️  Artifact read failed: {e}")
+        if results:
+            self.stats["hits"] += 1
+        return results
+
+    async def latest(self, kind: str, **filters: Optional[str]) -> Optional[Any]:
+        """Payload of the newest matching artifact, or None"""
+        results = await self.find(kind, limit=1, **filters)
+        return results[0]["payload"] if results else None
+
+    async def _run(self) -> None:
+        last_sweep = time.monotonic()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+            if time.monotonic() - last_sweep >= self.sweep_interval:
+                last_sweep = time.monotonic()
+                await self.sweep()
+
+    async def start(self) -> None:
+        """Open the database and start the background writer"""
+        if self._task is not None:
+            return
+        try:
+            await asyncio.to_thread(self._init_db)
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️  Artifact store disabled: {e}")
+            return
+        self._ready = True
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        await self.sweep()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        self._ready = False
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"enabled": self._ready, "path": self.path, "pending": len(self._pending) + len(self._writing),
+                "retention_s": self.retention, **self.stats}
+
+artifact_store = ArtifactStore(
+    settings.ARTIFACT_STORE_PATH,
+    retention=settings.ARTIFACT_RETENTION,
+    batch_size=settings.ARTIFACT_BATCH_SIZE,
+    flush_interval=settings.ARTIFACT_FLUSH_INTERVAL,
+)
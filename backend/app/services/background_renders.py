@@ -0,0 +1,84 @@
+"""
+Background print renders
+Print-quality PDFs that finish after a preview response has been returned
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.cancellation import job_registry
+from app.core.config import settings
+from app.core.deadline import reset_deadline, set_deadline
+from app.core.lifecycle import inflight_renders
+from app.core.scheduler import reset_lane, set_lane
+from app.core.shared_state import shared_state
+from app.models.content import RenderResponse
+from app.services.job_status import job_status
+
+# Shared state namespace: render state per job id
+RENDERS = "background_render"
+
+class BackgroundRenders:
+    """
+    Runs print renders in the background and remembers their outcome
+
+    Results are pushed through the job status callbacks when they finish.
+    Their state is kept in the shared state, so any worker can answer a
+    poll, until `ttl` seconds after completion. A render still marked
+    pending after `running_ttl` seconds is taken to have died with its
+    worker.
+    """
+
+    def __init__(self, ttl: float = 3600.0, running_ttl: float = 300.0):
+        self.ttl = ttl
+        self.running_ttl = running_ttl
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def start(self, job_id: str, render: Callable[[], Awaitable[RenderResponse]]) -> Dict[str, Any]:
+        """Start a print render for a job unless one is already running on any worker"""
+        state = {"job_id": job_id, "status": "pending", "pdf_url": None, "png_url": None,
+                 "error": None, "started_at": time.time(), "finished_at": None}
+        if job_id in self._tasks or not await shared_state.add(RENDERS, job_id, state, self.running_ttl):
+            existing = await self.get(job_id)
+            if existing is not None and existing["status"] == "pending":
+                return existing
+            await shared_state.set(RENDERS, job_id, state, self.running_ttl)  # finished - render again
+
+        self._tasks[job_id] = asyncio.create_task(self._run(job_id, render, state))
+        job_registry.attach(job_id, self._tasks[job_id])
+        return state
+
+    async def _run(self, job_id: str, render: Callable[[], Awaitable[RenderResponse]], state: Dict[str, Any]) -> None:
+        # Print renders yield upstream capacity to interactive work, and get
+        # a budget of their own rather than what was left of the request's
+        token = set_lane("print")
+        deadline_token = set_deadline(settings.RENDER_TIMEOUT)
+        try:
+            async with inflight_renders.track():
+                result = await render()
+            if result.success:
+                state.update(status="ready", pdf_url=result.pdf_url, png_url=result.png_url)
+                # pngUrl is None when the thumbnail was skipped; report() leaves it out
+                job_status.report(job_id, "running", stage="pdf", pdfUrl=result.pdf_url, pngUrl=result.png_url)
+            else:
+                state.update(status="failed", error=result.message)
+                job_status.report(job_id, "running", stage="pdf", error=result.message)
+        except asyncio.CancelledError:
+            state.update(status="cancelled")
+            raise
+        except Exception as e:
+            state.update(status="failed", error=str(e))
+            job_status.report(job_id, "running", stage="pdf", error=str(e))
+        finally:
+            reset_deadline(deadline_token)
+            reset_lane(token)
+            state["finished_at"] = time.time()
+            self._tasks.pop(job_id, None)
+            await shared_state.set(RENDERS, job_id, state, self.ttl)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """State of the job's print render, from whichever worker runs it"""
+        return await shared_state.get(RENDERS, job_id)
+
+background_renders = BackgroundRenders(settings.BACKGROUND_RENDER_TTL, running_ttl=settings.DEADLINE_MAX)
@@ -0,0 +1,185 @@
+"""
+Content-addressed blob store
+Rendered PDFs and PNGs fetched once from HTMLCSStoImage and served locally
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import time
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+
+from app.core.config import settings
+
+MEDIA_TYPES = {"pdf": "application/pdf", "png": "image/png"}
+
+BLOB_NAME_RE = re.compile(r"^([0-9a-f]{64})\.(pdf|png)$")
+
+class BlobStore:
+    """
+    Immutable files named by the SHA-256 of their bytes
+
+    Blobs live at `<root>/<d[0:2]>/<d[2:4]>/<digest>.<ext>` and are written
+    to a temporary file in the same directory, fsynced and renamed into
+    place, so readers never see a partial file. Identical renders share
+    one file.
+
+    Without a public base URL there is nothing callers could reach the
+    files at, so `ingest` keeps the original URL. A background sweep
+    deletes blobs not rendered again for `retention` seconds.
+    """
+
+    def __init__(self, root: str, public_base_url: str = "", max_bytes: int = 50 * 1024 * 1024,
+                 retention: float = 0.0, sweep_interval: float = 3600.0):
+        self.root = root
+        self.public_base_url = public_base_url.rstrip("/")
+        self.max_bytes = max_bytes
+        self.retention = retention
+        self.sweep_interval = sweep_interval
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"ingested": 0, "deduplicated": 0, "failed": 0, "bytes": 0, "expired": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.public_base_url)
+
+    def path_for(self, digest: str, ext: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], f"{digest}.{ext}")
+
+    def url_for(self, digest: str, ext: str) -> str:
+        return f"{self.public_base_url}/api/blobs/{digest}.{ext}"
+
+    def resolve(self, name: str) -> Optional[Tuple[str, str, str]]:
+        """(path, digest, media type) for a blob name like "<digest>.pdf", None if unknown"""
+        match = BLOB_NAME_RE.match(name)
+        if not match:
+            return None
+        digest, ext = match.groups()
+        path = self.path_for(digest, ext)
+        return (path, digest, MEDIA_TYPES[ext]) if os.path.isfile(path) else None
+
+    def put(self, data: bytes, ext: str) -> Tuple[str, bool]:
+        """
+        Store bytes (blocking; run off the loop)
+
+        Returns:
+            (digest, whether the blob was new)
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest, ext)
+        if os.path.exists(path):
+            try:
+                os.utime(path)  # rendered again - restarts its retention period
+                return digest, False
+            except FileNotFoundError:
+                pass  # swept meanwhile; write it again
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return digest, True
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+        return self._session
+
+    async def ingest(self, url: Optional[str], ext: str) -> Optional[str]:
+        """
+        Download a rendered file and return its local URL
+
+        Returns the original URL if the download fails, so callers can
+        always use the result.
+        """
+        if not url or ext not in MEDIA_TYPES or not self.enabled:
+            return url
+        try:
+            async with self._get_session().get(url) as response:
+                if response.status != 200:
+                    raise ValueError(f"HTTP {response.status}")
+                if (response.content_length or 0) > self.max_bytes:
+                    raise ValueError(f"{response.content_length} bytes exceeds limit")
+                chunks = []
+                size = 0
+                async for chunk in response.content.iter_chunked(256 * 1024):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ValueError("Response exceeds size limit")
+                    chunks.append(chunk)
+            data = b"".join(chunks)
+            digest, created = await asyncio.to_thread(self.put, data, ext)
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"⚠️  Blob ingest failed for {url}: {e}")
+            return url
+
+        self.stats["ingested" if created else "deduplicated"] += 1
+        if created:
+            self.stats["bytes"] += len(data)
+        return self.url_for(digest, ext)
+
+    def sweep(self) -> int:
+        """Delete blobs past their retention and abandoned temp files (blocking; run off the loop)"""
+        now = time.time()
+        removed = 0
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                # Temp files of an interrupted write are abandoned after an hour
+                max_age = 3600.0 if name.startswith(".tmp-") else self.retention
+                try:
+                    if now - os.stat(path).st_mtime > max_age:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.stats["expired"] += await asyncio.to_thread(self.sweep)
+            except OSError as e:
+                print(f"⚠️  Blob sweep failed: {e}")
+            await asyncio.sleep(self.sweep_interval)
+
+    def start(self) -> None:
+        """Start the retention sweep; blobs are kept forever without a retention period"""
+        if self._task is None and self.retention > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def metrics(self) -> Dict[str, object]:
+        return {"root": self.root, "public": self.enabled, "retention_s": self.retention, **self.stats}
+
+blob_store = BlobStore(settings.BLOB_STORE_DIR, settings.BLOB_PUBLIC_BASE_URL, settings.BLOB_MAX_BYTES,
+                       settings.BLOB_RETENTION, settings.BLOB_SWEEP_INTERVAL)
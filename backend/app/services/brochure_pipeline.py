@@ -0,0 +1,111 @@
+"""
+End-to-end brochure pipeline
+Copy generation, validation and rendering in-process, in one request
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+from app.core.progress import StageCallback, emit_stage
+from app.core.tracing import traced, tracer
+from app.services.artifact_store import artifact_store
+from app.models.content import (
+    BrochureRequest, BrochureResponse, ContentRequest, RenderRequest
+)
+
+class BrochurePipeline:
+    """
+    Runs the AI and render services back to back without leaving the process
+
+    Asset prefetch starts alongside the AI stages and is awaited only when
+    rendering begins, so image downloads overlap with Gemini latency.
+    """
+
+    def __init__(self, ai_service, render_service):
+        self.ai_service = ai_service
+        self.render_service = render_service
+
+    @traced("pipeline.run")
+    async def run(self, request: BrochureRequest, on_stage: Optional[StageCallback] = None) -> BrochureResponse:
+        """
+        Generate copy and render it
+
+        Args:
+            request: Business info, features and assets for the brochure
+            on_stage: Optional callback for stage progress events
+
+        Returns:
+            Combined copy and render result
+        """
+
+        timings: Dict[str, float] = {}
+        stage_started: Dict[str, float] = {}
+
+        async def track(stage: str, status: str, **data) -> None:
+            # Record per-stage durations, then forward the event
+            now = time.perf_counter()
+            if status == "started":
+                stage_started[stage] = now
+            elif stage in stage_started:
+                timings[stage] = round(now - stage_started.pop(stage), 3)
+            await emit_stage(on_stage, stage, status, **data)
+
+        start = time.perf_counter()
+
+        # Kick off asset downloads while the AI stages run
+        await track("assets", "started")
+        prefetch = asyncio.create_task(self.render_service.prefetch_assets(request.assets))
+
+        try:
+            content_request = ContentRequest.model_construct(
+                business_info=request.business_info,
+                selected_features=request.selected_features,
+                additional_context=request.additional_context,
+                project_id=request.project_id
+            )
+            content = await self.ai_service.generate_content(content_request, on_stage=track)
+
+            # Time spent waiting here is download time the AI stages didn't hide
+            with tracer.span("pipeline.wait_assets") as span:
+                wait_start = time.perf_counter()
+                assets = await prefetch
+                span.set_attribute("wait_ms", round((time.perf_counter() - wait_start) * 1000, 3))
+            await track("assets", "done", inlined=sum(1 for url in assets.values() if url.startswith("data:")))
+        except BaseException:
+            prefetch.cancel()
+            raise
+
+        if content.success:
+            artifact_store.put("copy", content.model_dump(include={"copy_data", "localized_copy", "alternatives"}),
+                               project_id=request.project_id, job_id=request.job_id)
+
+        # Copy is already validated - hand it straight to the renderer
+        render_request = RenderRequest.model_construct(
+            project_id=request.project_id,
+            job_id=request.job_id,
+            copy_data=content.copy_data,
+            assets=assets,
+            template=request.template,
+            preview=request.preview
+        )
+        await track("render", "started")
+        if request.preview:
+            rendered = await self.render_service.generate_preview(render_request, on_stage=track)
+        else:
+            rendered = await self.render_service.generate_brochure(render_request, on_stage=track)
+        await track("render", "done" if rendered.success else "failed")
+
+        timings["total"] = round(time.perf_counter() - start, 3)
+
+        return BrochureResponse.model_construct(
+            success=content.success and rendered.success,
+            copy_data=content.copy_data,
+            analysis=content.analysis,
+            pdf_url=rendered.pdf_url,
+            png_url=rendered.png_url,
+            message=f"{content.message}; {rendered.message}",
+            preview_url=rendered.preview_url,
+            pdf_status=rendered.pdf_status,
+            timings=timings
+        )
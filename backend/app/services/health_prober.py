@@ -0,0 +1,168 @@
+"""
+Background upstream health prober
+Periodically measures reachability and latency of Gemini and HTMLCSStoImage
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import aiohttp
+
+from app.core.config import settings
+
+@dataclass
+class ProbeResult:
+    """Outcome of one probe"""
+    timestamp: float
+    ok: bool
+    latency_ms: float
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+
+@dataclass
+class UpstreamProbe:
+    """How to probe one upstream"""
+    name: str
+    url: Callable[[], Optional[str]]  # None when the upstream isn't configured
+    auth: Callable[[], Optional[aiohttp.BasicAuth]] = lambda: None
+    headers: Callable[[], Dict[str, str]] = lambda: {}
+
+def _gemini_url() -> Optional[str]:
+    if not settings.GOOGLE_AI_API_KEY:
+        return None
+    return "https://generativelanguage.googleapis.com/v1beta/models?pageSize=1"
+
+def _gemini_headers() -> Dict[str, str]:
+    # Key in a header, not the query string, so it stays out of logs and traces
+    return {"x-goog-api-key": settings.GOOGLE_AI_API_KEY}
+
+def _hcti_url() -> Optional[str]:
+    if not os.getenv("HTMLCSSTOIMAGE_USER_ID"):
+        return None
+    return "https://hcti.io/v1/image"
+
+def _hcti_auth() -> Optional[aiohttp.BasicAuth]:
+    user, key = os.getenv("HTMLCSSTOIMAGE_USER_ID"), os.getenv("HTMLCSSTOIMAGE_API_KEY")
+    return aiohttp.BasicAuth(user, key) if user and key else None
+
+# Answers that mean the upstream is up but won't serve us (bad key, quota exhausted)
+FAILING_STATUSES = {401, 403, 429}
+
+DEFAULT_PROBES = [
+    UpstreamProbe("gemini", _gemini_url, headers=_gemini_headers),
+    UpstreamProbe("htmlcsstoimage", _hcti_url, _hcti_auth),
+]
+
+class HealthProber:
+    """
+    Probes upstreams on an interval and keeps a rolling window per upstream
+
+    Summaries are recomputed after each probe cycle, so health endpoints read
+    a prebuilt dict instead of doing any work per request.
+    """
+
+    def __init__(self, probes: List[UpstreamProbe] = DEFAULT_PROBES, interval: float = 30.0,
+                 timeout: float = 5.0, window: int = 20):
+        self.probes = probes
+        self.interval = interval
+        self.timeout = timeout
+        self.results: Dict[str, Deque[ProbeResult]] = {probe.name: deque(maxlen=window) for probe in probes}
+        self.snapshot: Dict[str, Dict[str, Any]] = {
+            probe.name: {"status": "unknown", "message": "Not probed yet"} for probe in probes
+        }
+        self._task: Optional[asyncio.Task] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def _probe(self, probe: UpstreamProbe) -> Optional[ProbeResult]:
+        url = probe.url()
+        if url is None:
+            return None
+
+        start = time.perf_counter()
+        try:
+            async with self._session.get(url, auth=probe.auth(), headers=probe.headers()) as response:
+                await response.read()
+                latency_ms = (time.perf_counter() - start) * 1000
+                # Other non-5xx answers mean the upstream is up and would take our requests
+                ok = response.status < 500 and response.status not in FAILING_STATUSES
+                return ProbeResult(time.time(), ok, latency_ms, response.status)
+        except Exception as e:
+            latency_ms = (time.perf_counter() - start) * 1000
+            return ProbeResult(time.time(), False, latency_ms, error=str(e) or type(e).__name__)
+
+    def _summarize(self, name: str, configured: bool) -> Dict[str, Any]:
+        results = self.results[name]
+        if not configured:
+            return {"status": "missing", "message": f"{name} credentials not configured"}
+        if not results:
+            return {"status": "unknown", "message": "Not probed yet"}
+
+        latest = results[-1]
+        latencies = sorted(r.latency_ms for r in results if r.ok)
+        success_rate = sum(r.ok for r in results) / len(results)
+
+        if latest.ok:
+            status = "ok" if success_rate >= 0.5 else "degraded"
+        else:
+            status = "error" if not any(r.ok for r in list(results)[-3:]) else "degraded"
+
+        return {
+            "status": status,
+            "message": f"HTTP {latest.status_code}" if latest.status_code else (latest.error or ""),
+            "last_checked": latest.timestamp,
+            "latency_ms": round(latest.latency_ms, 1),
+            "latency_p50_ms": round(latencies[len(latencies) // 2], 1) if latencies else None,
+            "latency_max_ms": round(latencies[-1], 1) if latencies else None,
+            "success_rate": round(success_rate, 3),
+            "samples": len(results),
+        }
+
+    async def probe_all(self) -> Dict[str, Dict[str, Any]]:
+        """Run one probe cycle concurrently and rebuild the snapshot"""
+        outcomes = await asyncio.gather(*(self._probe(probe) for probe in self.probes))
+
+        snapshot = {}
+        for probe, result in zip(self.probes, outcomes):
+            if result is not None:
+                self.results[probe.name].append(result)
+            snapshot[probe.name] = self._summarize(probe.name, configured=result is not None)
+
+        # Swap in one assignment so readers never see a half-built snapshot
+        self.snapshot = snapshot
+        return snapshot
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                print(f"⚠️  Health probe cycle failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start probing in the background"""
+        if self._task is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+health_prober = HealthProber(
+    interval=settings.HEALTH_PROBE_INTERVAL,
+    timeout=settings.HEALTH_PROBE_TIMEOUT,
+    window=settings.HEALTH_PROBE_WINDOW,
+)
@@ -0,0 +1,161 @@
+"""
+Idempotent job execution
+One execution per caller, job id and endpoint; retries attach to it or replay its result
+"""
+
+import asyncio
+import hashlib
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.shared_state import shared_state
+
+T = TypeVar("T", bound=BaseModel)
+
+# Shared state namespace: {"status": "running" | "done", "fingerprint", "result"} per job
+JOBS = "idempotency"
+
+class IdempotencyConflict(Exception):
+    """Same job id reused with a different request body"""
+
+def request_fingerprint(request: BaseModel) -> str:
+    return hashlib.sha256(request.model_dump_json().encode()).hexdigest()
+
+class IdempotencyStore:
+    """
+    Runs work at most once per (scope, owner, job id) within `ttl` seconds
+
+    - First call: runs the work as a task and records the result
+    - Retry while running: waits for the same task ("attached")
+    - Retry after success: returns the recorded result ("replayed")
+
+    Jobs are keyed by the caller too, so reusing someone else's job id
+    starts a job of your own instead of replaying theirs. The running
+    marker and the result are kept in the shared state: a retry landing
+    on another worker waits for the job there (polling every
+    `poll_interval` seconds) and replays its result. Failures are not
+    recorded - a retry runs the job again. The task is cancelled only
+    when every caller waiting on it has gone away.
+    """
+
+    def __init__(self, ttl: float = 3600.0, running_ttl: float = 300.0, poll_interval: float = 0.25):
+        self.ttl = ttl
+        self.running_ttl = running_ttl
+        self.poll_interval = poll_interval
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"executed": 0, "attached": 0, "attached_elsewhere": 0, "replayed": 0,
+                      "replayed_from_store": 0, "conflicts": 0}
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        for key in [key for key, entry in self._entries.items()
+                    if entry["finished_at"] is not None and entry["finished_at"] < cutoff]:
+            del self._entries[key]
+
+    def _conflict(self, job_id: str) -> IdempotencyConflict:
+        self.stats["conflicts"] += 1
+        return IdempotencyConflict(f"Job {job_id} was already run with a different request")
+
+    async def _elsewhere(self, key: str, job_id: str, fingerprint: str, model: Type[T]) -> Optional[Tuple[T, str]]:
+        """
+        Result of the job from the shared state, waiting while another worker runs it
+
+        Returns None when nobody has run it, the run failed or vanished, or
+        it was started on this worker meanwhile.
+        """
+        outcome = "replayed"
+        while True:
+            record = await shared_state.get(JOBS, key)
+            if record is None or key in self._entries:
+                return None
+            if record["fingerprint"] != fingerprint:
+                raise self._conflict(job_id)
+            if record["status"] == "done":
+                self.stats["attached_elsewhere" if outcome == "attached" else "replayed_from_store"] += 1
+                return model.model_validate(record["result"]), outcome
+            outcome = "attached"
+            await asyncio.sleep(self.poll_interval)
+
+    async def _execute(self, key: str, fingerprint: str, work: Callable[[], Awaitable[T]],
+                       succeeded: Callable[[T], bool]) -> T:
+        try:
+            result = await work()
+        except BaseException:
+            # Not recorded - the next retry runs the job again
+            await shared_state.delete(JOBS, key)
+            raise
+        if succeeded(result):
+            await shared_state.set(JOBS, key, {"status": "done", "fingerprint": fingerprint,
+                                               "result": result.model_dump(mode="json")}, self.ttl)
+        else:
+            await shared_state.delete(JOBS, key)
+        return result
+
+    async def run(self, scope: str, job_id: Optional[str], fingerprint: str, work: Callable[[], Awaitable[T]],
+                  model: Type[T], succeeded: Callable[[T], bool] = lambda result: True,
+                  owner: Optional[str] = None) -> Tuple[T, str]:
+        """
+        Run `work` for a job unless it already ran or is running
+
+        Returns:
+            (result, "executed" | "attached" | "replayed")
+
+        Raises:
+            IdempotencyConflict: the job id was used with a different request body
+        """
+        if not job_id:
+            return await work(), "executed"
+
+        self._expire()
+        key = f"{scope}|{owner or 'anonymous'}|{job_id}"
+        while key not in self._entries:
+            found = await self._elsewhere(key, job_id, fingerprint, model)
+            if found is not None:
+                return found
+            # Claim the job for this worker; losing the race means someone else started it
+            if key not in self._entries and await shared_state.add(
+                JOBS, key, {"status": "running", "fingerprint": fingerprint}, self.running_ttl
+            ):
+                entry = {"fingerprint": fingerprint, "result": None, "finished_at": None, "waiters": 0,
+                         "task": asyncio.create_task(self._execute(key, fingerprint, work, succeeded))}
+                self._entries[key] = entry
+                entry["task"].add_done_callback(lambda task: self._finished(key, entry, task, succeeded))
+                return await self._wait(entry, "executed")
+
+        entry = self._entries[key]
+        if entry["fingerprint"] != fingerprint:
+            raise self._conflict(job_id)
+        if entry["result"] is not None:
+            self.stats["replayed"] += 1
+            return entry["result"], "replayed"
+        return await self._wait(entry, "attached")
+
+    async def _wait(self, entry: Dict[str, Any], outcome: str) -> Tuple[Any, str]:
+        self.stats[outcome] += 1
+        entry["waiters"] += 1
+        try:
+            return await asyncio.shield(entry["task"]), outcome
+        except asyncio.CancelledError:
+            if entry["waiters"] == 1 and not entry["task"].done():
+                entry["task"].cancel()  # nobody is left to read the result
+            raise
+        finally:
+            entry["waiters"] -= 1
+
+    def _finished(self, key: str, entry: Dict[str, Any], task: asyncio.Task,
+                  succeeded: Callable[[Any], bool]) -> None:
+        if task.cancelled() or task.exception() is not None or not succeeded(task.result()):
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+            return
+        entry["result"] = task.result()
+        entry["finished_at"] = time.monotonic()
+
+    def metrics(self) -> Dict[str, Any]:
+        running = sum(1 for entry in self._entries.values() if entry["result"] is None)
+        return {"running": running, "recorded": len(self._entries) - running, "ttl_s": self.ttl, **self.stats}
+
+idempotency = IdempotencyStore(settings.IDEMPOTENCY_TTL, running_ttl=settings.DEADLINE_MAX)
@@ -0,0 +1,145 @@
+"""
+Local Industry Classifier
+Character n-gram TF-IDF vectors with cosine-similarity scoring, no LLM call
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Short phrases that name an industry - each becomes its own row in the matrix
+PHRASE_FIELDS = ("aliases", "keywords")
+# Descriptive fields - merged into one profile row per industry
+PROFILE_FIELDS = ("power_words", "pain_points", "value_drivers", "social_proof")
+
+class IndustryClassifier:
+    """
+    Classifies free-text business types against the industry knowledge base
+
+    Texts are reduced to character 3- and 4-grams of their words. Each industry
+    contributes one row per name/alias/keyword plus one profile row built from
+    its descriptive fields. Rows are L2-normalized TF-IDF vectors, so scoring a
+    batch of queries is a single matrix product; an industry's score is its
+    best-matching row.
+    """
+
+    _WORD_RE = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, documents: Dict[str, Dict[str, List[str]]], ngram_sizes: Tuple[int, ...] = (3, 4)):
+        """
+        Build the phrase matrix
+
+        Args:
+            documents: industry -> {field: [texts]}, fields as in PHRASE_FIELDS / PROFILE_FIELDS
+        """
+        self.ngram_sizes = ngram_sizes
+        self.labels: List[str] = list(documents.keys())
+        self.vocabulary: Dict[str, int] = {}
+
+        rows: List[Dict[int, float]] = []
+        row_labels: List[int] = []
+        for label, fields in enumerate(documents.values()):
+            phrases = list(fields.get("name", []))
+            for field in PHRASE_FIELDS:
+                phrases += fields.get(field, [])
+            profile = " ".join(text for field in PROFILE_FIELDS for text in fields.get(field, []))
+
+            for text in phrases + [profile]:
+                counts = self._count(text, grow=True)
+                if counts:
+                    rows.append(counts)
+                    row_labels.append(label)
+
+        counts_matrix = np.zeros((len(rows), len(self.vocabulary)), dtype=np.float32)
+        for i, counts in enumerate(rows):
+            for column, count in counts.items():
+                counts_matrix[i, column] = count
+
+        # Smoothed IDF over rows: n-grams that appear everywhere carry little signal
+        document_frequency = np.count_nonzero(counts_matrix, axis=0)
+        self.idf = (np.log((1 + len(rows)) / (1 + document_frequency)) + 1).astype(np.float32)
+        # Out-of-vocabulary n-grams still count towards the query norm
+        self.unknown_weight = float(np.log(1 + len(rows)) + 1)
+
+        matrix = counts_matrix * self.idf
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        # Transposed once so classification is queries @ matrix; rows grouped by label
+        self.matrix = np.ascontiguousarray(matrix.T)
+        self.row_labels = np.asarray(row_labels, dtype=np.intp)
+        self._label_starts = np.searchsorted(self.row_labels, np.arange(len(self.labels)))
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "IndustryClassifier":
+        """Build from a knowledge base snapshot"""
+        aliases_by_industry: Dict[str, List[str]] = {}
+        for alias, industry in snapshot.aliases.items():
+            aliases_by_industry.setdefault(industry, []).append(alias)
+
+        documents = {}
+        for name in snapshot.industries:
+            record = snapshot.get(name)
+            fields = {"name": [name], "aliases": aliases_by_industry.get(name, [])}
+            for field in PHRASE_FIELDS + PROFILE_FIELDS:
+                if field in record:
+                    fields[field] = record[field]
+            documents[name] = fields
+        return cls(documents)
+
+    def _ngrams(self, text: str) -> List[str]:
+        """Character n-grams of each word, padded with word boundaries"""
+        grams = []
+        for word in self._WORD_RE.findall(text.lower().replace("_", " ")):
+            padded = f" {word} "
+            for size in self.ngram_sizes:
+                grams += [padded[i:i + size] for i in range(max(1, len(padded) - size + 1))]
+        return grams
+
+    def _count(self, text: str, grow: bool = False) -> Dict[int, float]:
+        """N-gram counts by vocabulary column; -1 collects unknown n-grams"""
+        counts: Dict[int, float] = {}
+        for gram in self._ngrams(text):
+            column = self.vocabulary.get(gram)
+            if column is None:
+                if grow:
+                    column = self.vocabulary[gram] = len(self.vocabulary)
+                else:
+                    column = -1
+            counts[column] = counts.get(column, 0.0) + 1.0
+        return counts
+
+    def vectorize(self, texts: List[str]) -> np.ndarray:
+        """L2-normalized TF-IDF query matrix, one row per text"""
+        queries = np.zeros((len(texts), len(self.vocabulary)), dtype=np.float32)
+        unknown = np.zeros(len(texts), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for column, count in self._count(text).items():
+                if column < 0:
+                    unknown[row] = count * self.unknown_weight
+                else:
+                    queries[row, column] = count
+        queries *= self.idf
+        norms = np.sqrt(np.einsum("ij,ij->i", queries, queries) + unknown ** 2)
+        return queries / np.maximum(norms, 1e-12)[:, None]
+
+    def classify(self, texts: List[str]) -> List[Tuple[Optional[str], float]]:
+        """
+        Classify a batch of business types
+
+        Returns:
+            (industry, confidence) per text; confidence is the cosine similarity
+            of the best-matching row, industry is None when nothing overlaps
+        """
+        if not texts:
+            return []
+        scores = self.vectorize(texts) @ self.matrix
+        per_label = np.maximum.reduceat(scores, self._label_starts, axis=1)
+        best = per_label.argmax(axis=1)
+        return [
+            (self.labels[index] if per_label[row, index] > 0 else None, float(per_label[row, index]))
+            for row, index in enumerate(best)
+        ]
+
+    def classify_one(self, text: str) -> Tuple[Optional[str], float]:
+        """Classify a single business type"""
+        return self.classify([text])[0]
@@ -1,209 +1,162 @@
 """
 Industry Intelligence Database
 Provides industry-specific copywriting intelligence and best practices
+
+Industry data is loaded from the shared knowledge base (see industry_kb.py).
 """
 
-from typing import Dict, List, Any
+import re
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
+
+from app.core.config import settings
+from app.services.industry_classifier import IndustryClassifier
+from app.services.industry_kb import IndustryKnowledgeBase, KnowledgeBaseSnapshot, get_knowledge_base
+
+class IndustryMatcher:
+    """
+    Tokenized alias index for business type lookups
+
+    Built once from the industry keys and aliases. A lookup tokenizes the input
+    and probes the index with each token n-gram, so its cost depends on the
+    length of the input, not on the number of aliases. Results are memoized.
+
+    Priority rules (ties broken by declaration order):
+        1. An industry key appears as a phrase in the input
+        2. Input is part of an industry key ("professional" -> professional_services)
+        3. An alias appears as a token in the input
+    """
+
+    KEY_PHRASE, KEY_PART, ALIAS = range(3)
+    _TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, industries: List[str], aliases: Dict[str, str], cache_size: int = 4096):
+        """Build the alias index"""
+        # phrase -> (tier, rank, industry); phrases are token tuples
+        self._phrases: Dict[Tuple[str, ...], Tuple[int, int, str]] = {}
+        self._parts: Dict[Tuple[str, ...], Tuple[int, int, str]] = {}
+
+        for rank, industry in enumerate(industries):
+            tokens = self.tokenize(industry)
+            self._add(self._phrases, tokens, (self.KEY_PHRASE, rank, industry))
+            for start in range(len(tokens)):
+                for end in range(start + 1, len(tokens) + 1):
+                    self._add(self._parts, tokens[start:end], (self.KEY_PART, rank, industry))
+
+        for rank, (alias, industry) in enumerate(aliases.items()):
+            self._add(self._phrases, self.tokenize(alias), (self.ALIAS, rank, industry))
+
+        self._max_phrase = max((len(phrase) for phrase in self._phrases), default=1)
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    @staticmethod
+    def _add(index: Dict, phrase: Tuple[str, ...], entry: Tuple[int, int, str]) -> None:
+        """Insert keeping the highest priority entry for a phrase"""
+        if phrase not in index or entry < index[phrase]:
+            index[phrase] = entry
+
+    @classmethod
+    def tokenize(cls, text: str) -> Tuple[str, ...]:
+        """Lowercase and split on anything that isn't a letter or digit"""
+        return tuple(cls._TOKEN_RE.findall(text.lower().replace("_", " ")))
+
+    def _lookup(self, index: Dict, phrase: Tuple[str, ...]) -> Optional[Tuple[int, int, str]]:
+        """Probe the index, falling back to a singular last token ("clinics" -> "clinic")"""
+        entry = index.get(phrase)
+        if entry is None and len(phrase[-1]) > 3 and phrase[-1].endswith("s"):
+            entry = index.get(phrase[:-1] + (phrase[-1][:-1],))
+        return entry
+
+    def _match(self, business_type: str) -> Optional[str]:
+        """Return the industry key for a business type, or None"""
+        tokens = self.tokenize(business_type)
+        if not tokens:
+            return None
+
+        best = None
+        for size in range(1, min(self._max_phrase, len(tokens)) + 1):
+            for start in range(len(tokens) - size + 1):
+                entry = self._lookup(self._phrases, tokens[start:start + size])
+                if entry is not None and (best is None or entry < best):
+                    best = entry
+
+        if best is not None and best[0] == self.KEY_PHRASE:
+            return best[2]
+
+        part = self._lookup(self._parts, tokens)
+        if part is not None:
+            return part[2]
+
+        return best[2] if best is not None else None
 
 class IndustryIntelligence:
     """Industry-specific marketing intelligence and copywriting patterns"""
     
-    def __init__(self):
-        """Initialize industry intelligence database"""
-        self.industry_data = {
-            "software": {
-                "pain_points": [
-                    "time_consuming_manual_processes",
-                    "complex_setup_and_maintenance", 
-                    "expensive_enterprise_solutions",
-                    "lack_of_integration_capabilities",
-                    "poor_user_experience"
-                ],
-                "power_words": [
-                    "streamline", "automate", "simplify", "optimize",
-                    "integrate", "scale", "efficient", "intuitive"
-                ],
-                "social_proof": [
-                    "trusted_by_thousands", "saves_hours_weekly",
-                    "increases_productivity", "reduces_errors"
-                ],
-                "cta_patterns": [
-                    "start_free_trial", "get_demo", "try_now",
-                    "download_free", "schedule_demo"
-                ],
-                "messaging_tone": "professional",
-                "value_drivers": ["time_savings", "cost_reduction", "ease_of_use"]
-            },
-            
-            "restaurant": {
-                "pain_points": [
-                    "slow_service_during_peak_hours",
-                    "food_quality_consistency",
-                    "customer_retention_challenges",
-                    "operational_efficiency",
-                    "online_ordering_complexity"
-                ],
-                "power_words": [
-                    "fresh", "authentic", "delicious", "convenient",
-                    "fast", "quality", "family", "tradition"
-                ],
-                "social_proof": [
-                    "customer_favorites", "family_owned",
-                    "locally_sourced", "award_winning"
-                ],
-                "cta_patterns": [
-                    "order_now", "reserve_table", "try_today",
-                    "delivery_available", "catering_available"
-                ],
-                "messaging_tone": "friendly",
-                "value_drivers": ["taste", "convenience", "experience"]
-            },
-            
-            "healthcare": {
-                "pain_points": [
-                    "patient_wait_times",
-                    "insurance_and_billing_complexity",
-                    "appointment_scheduling_difficulties",
-                    "quality_of_care_concerns",
-                    "accessibility_issues"
-                ],
-                "power_words": [
-                    "care", "health", "wellness", "expert",
-                    "compassionate", "advanced", "personalized", "trusted"
-                ],
-                "social_proof": [
-                    "board_certified", "years_of_experience",
-                    "patient_satisfaction", "advanced_technology"
-                ],
-                "cta_patterns": [
-                    "schedule_appointment", "call_today", "book_consultation",
-                    "learn_more", "contact_us"
-                ],
-                "messaging_tone": "professional",
-                "value_drivers": ["expertise", "care_quality", "convenience"]
-            },
-            
-            "professional_services": {
-                "pain_points": [
-                    "lack_of_expertise_in_house",
-                    "time_constraints_for_specialized_tasks",
-                    "cost_of_hiring_full_time_specialists",
-                    "keeping_up_with_industry_changes",
-                    "measuring_roi_on_initiatives"
-                ],
-                "power_words": [
-                    "expert", "proven", "results", "growth",
-                    "strategic", "efficient", "tailored", "experienced"
-                ],
-                "social_proof": [
-                    "years_of_experience", "client_success_stories",
-                    "industry_expertise", "proven_methodology"
-                ],
-                "cta_patterns": [
-                    "free_consultation", "get_proposal", "schedule_call",
-                    "discuss_needs", "learn_how"
-                ],
-                "messaging_tone": "professional",
-                "value_drivers": ["expertise", "results", "roi"]
-            },
-            
-            "retail": {
-                "pain_points": [
-                    "finding_quality_products_at_good_prices",
-                    "limited_selection_in_local_stores",
-                    "inconvenient_shopping_hours",
-                    "poor_customer_service_experience",
-                    "complicated_return_policies"
-                ],
-                "power_words": [
-                    "quality", "affordable", "selection", "convenient",
-                    "stylish", "trending", "exclusive", "savings"
-                ],
-                "social_proof": [
-                    "customer_reviews", "bestselling_items",
-                    "satisfaction_guarantee", "trusted_brands"
-                ],
-                "cta_patterns": [
-                    "shop_now", "browse_collection", "limited_time",
-                    "free_shipping", "visit_store"
-                ],
-                "messaging_tone": "friendly",
-                "value_drivers": ["value", "selection", "convenience"]
-            },
-            
-            "education": {
-                "pain_points": [
-                    "keeping_up_with_rapidly_changing_skills",
-                    "finding_time_for_professional_development",
-                    "cost_of_quality_education_programs",
-                    "lack_of_practical_hands_on_experience",
-                    "difficulty_measuring_learning_outcomes"
-                ],
-                "power_words": [
-                    "learn", "master", "advance", "certified",
-                    "practical", "expert", "comprehensive", "flexible"
-                ],
-                "social_proof": [
-                    "certified_instructors", "student_success_rate",
-                    "industry_recognized", "career_advancement"
-                ],
-                "cta_patterns": [
-                    "enroll_now", "start_learning", "free_trial",
-                    "view_courses", "speak_with_advisor"
-                ],
-                "messaging_tone": "professional",
-                "value_drivers": ["skill_development", "career_growth", "flexibility"]
-            },
-            
-            "fitness": {
-                "pain_points": [
-                    "lack_of_motivation_to_exercise_regularly",
-                    "not_seeing_results_from_current_routine",
-                    "gym_intimidation_and_crowding",
-                    "expensive_personal_training_costs",
-                    "time_constraints_for_workouts"
-                ],
-                "power_words": [
-                    "transform", "strong", "fit", "energy",
-                    "results", "motivating", "supportive", "flexible"
-                ],
-                "social_proof": [
-                    "member_transformations", "certified_trainers",
-                    "proven_programs", "community_support"
-                ],
-                "cta_patterns": [
-                    "start_trial", "join_today", "book_session",
-                    "see_results", "get_started"
-                ],
-                "messaging_tone": "motivational",
-                "value_drivers": ["results", "support", "convenience"]
-            }
-        }
+    def __init__(self, knowledge_base: Optional[IndustryKnowledgeBase] = None):
+        """Attach to the shared, memory-mapped industry knowledge base"""
+        self.knowledge_base = knowledge_base or get_knowledge_base()
+        self._matcher_snapshot: Optional[KnowledgeBaseSnapshot] = None
+        self._matcher: Optional[IndustryMatcher] = None
+        self._classifier: Optional[IndustryClassifier] = None
+    
+    def _current(self) -> Tuple[KnowledgeBaseSnapshot, IndustryMatcher, IndustryClassifier]:
+        """Current snapshot plus its alias index and classifier, rebuilt after a reload"""
+        snapshot = self.knowledge_base.snapshot()
+        if snapshot is not self._matcher_snapshot:
+            self._matcher = IndustryMatcher(snapshot.industries, snapshot.aliases)
+            self._classifier = IndustryClassifier.from_snapshot(snapshot)
+            self._matcher_snapshot = snapshot
+        return snapshot, self._matcher, self._classifier
+    
+    def classify_industries(self, business_types: List[str]) -> List[Tuple[Optional[str], float]]:
+        """
+        Resolve a batch of business types to industry keys
+        
+        Alias matches count as full confidence. The rest are scored together
+        by the local classifier; results below the confidence threshold map
+        to None (default industry).
+        
+        Returns:
+            (industry key or None, confidence) per business type
+        """
+        
+        _, matcher, classifier = self._current()
+        return self._classify(matcher, classifier, business_types)
+    
+    @staticmethod
+    def _classify(matcher: IndustryMatcher, classifier: IndustryClassifier,
+                  business_types: List[str]) -> List[Tuple[Optional[str], float]]:
+        """classify_industries against one snapshot's matcher and classifier"""
+        results: List[Tuple[Optional[str], float]] = [(None, 0.0)] * len(business_types)
+        
+        unmatched = []
+        for i, business_type in enumerate(business_types):
+            industry_key = matcher.match(business_type)
+            if industry_key is not None:
+                results[i] = (industry_key, 1.0)
+            else:
+                unmatched.append(i)
+        
+        if unmatched:
+            predictions = classifier.classify([business_types[i] for i in unmatched])
+            for i, (industry_key, confidence) in zip(unmatched, predictions):
+                if industry_key is not None and confidence >= settings.INDUSTRY_CLASSIFIER_MIN_CONFIDENCE:
+                    results[i] = (industry_key, confidence)
+                else:
+                    results[i] = (None, confidence)
         
-        # Default fallback for unknown industries
-        self.default_industry = {
-            "pain_points": [
-                "time_consuming_processes",
-                "expensive_solutions",
-                "poor_customer_service",
-                "lack_of_reliability",
-                "complex_implementation"
-            ],
-            "power_words": [
-                "professional", "reliable", "efficient", "quality",
-                "trusted", "expert", "proven", "results"
-            ],
-            "social_proof": [
-                "satisfied_customers", "proven_track_record",
-                "expert_team", "quality_guarantee"
-            ],
-            "cta_patterns": [
-                "get_started", "learn_more", "contact_us",
-                "free_consultation", "try_today"
-            ],
-            "messaging_tone": "professional",
-            "value_drivers": ["quality", "reliability", "results"]
-        }
+        return results
+    
+    @property
+    def industry_data(self) -> Dict[str, Dict[str, Any]]:
+        """All industries keyed by name"""
+        snapshot = self.knowledge_base.snapshot()
+        return {name: snapshot.get(name) for name in snapshot.industries}
+    
+    @property
+    def default_industry(self) -> Dict[str, Any]:
+        """Default fallback for unknown industries"""
+        return self.knowledge_base.snapshot().default
     
     def get_industry_data(self, business_type: str) -> Dict[str, Any]:
         """
@@ -216,53 +169,15 @@ class IndustryIntelligence:
             Dictionary containing industry-specific intelligence
         """
         
-        # Normalize business type
-        business_type_normalized = business_type.lower().replace(" ", "_").replace("/", "_")
-        
-        # Try exact match first
-        if business_type_normalized in self.industry_data:
-            return self.industry_data[business_type_normalized]
-        
-        # Try partial matches for common variations
-        for industry_key in self.industry_data.keys():
-            if industry_key in business_type_normalized or business_type_normalized in industry_key:
-                return self.industry_data[industry_key]
-        
-        # Check for common business type mappings
-        type_mappings = {
-            "technology": "software",
-            "tech": "software", 
-            "saas": "software",
-            "app": "software",
-            "consulting": "professional_services",
-            "agency": "professional_services",
-            "marketing": "professional_services",
-            "legal": "professional_services",
-            "accounting": "professional_services",
-            "food": "restaurant",
-            "dining": "restaurant",
-            "cafe": "restaurant",
-            "medical": "healthcare",
-            "dental": "healthcare",
-            "clinic": "healthcare",
-            "hospital": "healthcare",
-            "store": "retail",
-            "shop": "retail",
-            "ecommerce": "retail",
-            "training": "education",
-            "course": "education",
-            "school": "education",
-            "gym": "fitness",
-            "wellness": "fitness",
-            "health": "fitness"
-        }
+        # One snapshot for both the lookup and the data, so a reload in between can't mix them
+        snapshot, matcher, classifier = self._current()
         
-        for mapping_key, industry_key in type_mappings.items():
-            if mapping_key in business_type_normalized:
-                return self.industry_data[industry_key]
+        industry_key, _ = self._classify(matcher, classifier, [business_type])[0]
+        if industry_key is not None:
+            return snapshot.get(industry_key)
         
         # Return default if no match found
-        return self.default_industry
+        return snapshot.default
     
     def get_tone_for_industry(self, business_type: str) -> str:
         """Get recommended messaging tone for industry"""
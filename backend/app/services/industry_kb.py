@@ -0,0 +1,329 @@
+"""
+Industry Knowledge Base
+Versioned industry data compiled to a compact binary file and shared via mmap
+
+Source data lives in `app/data/industries.json`. It is compiled into a binary
+file with a deduplicated string table; worker processes memory-map that file so
+the OS shares its pages between them. The file is re-checked periodically and
+swapped atomically when it changes.
+
+Compile manually with:
+    python -m app.services.industry_kb
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from app.core.config import settings
+
+MAGIC = b"PKB1"
+FORMAT_VERSION = 2
+DEFAULT_KEY = "__default__"
+
+LIST_FIELDS = ("pain_points", "power_words", "social_proof", "cta_patterns", "value_drivers", "keywords")
+
+# magic, format version, reserved, kb version, industries, aliases, strings, list items
+_HEADER = struct.Struct("<4sHHIIIII")
+# name, messaging_tone, then (start, count) for each list field
+_RECORD = struct.Struct("<II" + "II" * len(LIST_FIELDS))
+_ALIAS = struct.Struct("<II")
+_U32 = struct.Struct("<I")
+
+class KnowledgeBaseError(Exception):
+    """Raised when the knowledge base cannot be compiled or loaded"""
+    pass
+
+def _validate(data: Any) -> None:
+    """Check the source's shape up front, so mistakes surface as KnowledgeBaseError"""
+
+    def check_industry(name: str, industry: Any) -> None:
+        if not isinstance(industry, dict):
+            raise KnowledgeBaseError(f"Industry '{name}' must be an object")
+        if not isinstance(industry.get("messaging_tone", ""), str):
+            raise KnowledgeBaseError(f"Industry '{name}': messaging_tone must be a string")
+        for field in LIST_FIELDS:
+            values = industry.get(field, [])
+            if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+                raise KnowledgeBaseError(f"Industry '{name}': {field} must be a list of strings")
+
+    if not isinstance(data, dict):
+        raise KnowledgeBaseError("Knowledge base source must be a JSON object")
+    if "default" not in data:
+        raise KnowledgeBaseError("Knowledge base source has no 'default' industry")
+    industries = data.get("industries", {})
+    if not isinstance(industries, dict):
+        raise KnowledgeBaseError("'industries' must be an object")
+    for name, industry in [*industries.items(), (DEFAULT_KEY, data["default"])]:
+        check_industry(name, industry)
+    aliases = data.get("aliases", {})
+    if not isinstance(aliases, dict) or not all(isinstance(v, str) for v in aliases.values()):
+        raise KnowledgeBaseError("'aliases' must map names to industry keys")
+    unknown = sorted(set(aliases.values()) - set(industries))
+    if unknown:
+        raise KnowledgeBaseError(f"Aliases point at unknown industries: {', '.join(unknown)}")
+    try:
+        int(data.get("version", 1))
+    except (TypeError, ValueError):
+        raise KnowledgeBaseError(f"Invalid knowledge base version: {data.get('version')!r}")
+
+def compile_knowledge_base(source: Path, target: Path) -> int:
+    """
+    Compile the JSON knowledge base into the binary format
+
+    The file is written to a temp path and renamed into place, so readers
+    never see a partially written file.
+
+    Returns:
+        Knowledge base version that was compiled
+
+    Raises:
+        KnowledgeBaseError: the source can't be read, is malformed or the file can't be written
+    """
+
+    try:
+        with open(source, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise KnowledgeBaseError(f"Failed to read knowledge base source: {str(e)}")
+    _validate(data)
+
+    strings: List[bytes] = []
+    string_ids: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value.encode("utf-8"))
+        return string_ids[value]
+
+    industries = dict(data.get("industries", {}))
+    industries[DEFAULT_KEY] = data["default"]
+
+    list_items: List[int] = []
+    records = []
+    for name, industry in industries.items():
+        fields = [intern(name), intern(industry.get("messaging_tone", "professional"))]
+        for field in LIST_FIELDS:
+            values = industry.get(field, [])
+            fields += [len(list_items), len(values)]
+            list_items += [intern(value) for value in values]
+        records.append(_RECORD.pack(*fields))
+
+    aliases = [
+        _ALIAS.pack(intern(alias), intern(industry))
+        for alias, industry in data.get("aliases", {}).items()
+    ]
+
+    offsets = [0]
+    for encoded in strings:
+        offsets.append(offsets[-1] + len(encoded))
+
+    version = int(data.get("version", 1))
+    payload = b"".join([
+        _HEADER.pack(MAGIC, FORMAT_VERSION, 0, version, len(records), len(aliases), len(strings), len(list_items)),
+        b"".join(records),
+        b"".join(aliases),
+        struct.pack(f"<{len(list_items)}I", *list_items),
+        struct.pack(f"<{len(offsets)}I", *offsets),
+        b"".join(strings),
+    ])
+
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, target)
+    except OSError as e:
+        raise KnowledgeBaseError(f"Failed to write compiled knowledge base: {str(e)}")
+
+    return version
+
+class KnowledgeBaseSnapshot:
+    """Read-only view over one memory-mapped version of the compiled knowledge base"""
+
+    def __init__(self, path: Path):
+        """Map the compiled file and read its tables"""
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size < _HEADER.size:
+                raise KnowledgeBaseError(f"Knowledge base file is truncated: {path}")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+        magic, fmt, _, self.version, n_records, n_aliases, n_strings, n_items = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise KnowledgeBaseError(f"Unsupported knowledge base format in {path}")
+
+        self._records_at = _HEADER.size
+        self._aliases_at = self._records_at + n_records * _RECORD.size
+        self._items_at = self._aliases_at + n_aliases * _ALIAS.size
+        self._offsets_at = self._items_at + n_items * _U32.size
+        self._strings_at = self._offsets_at + (n_strings + 1) * _U32.size
+
+        # Only the small name -> record index is materialized; records decode on demand
+        self._index: Dict[str, int] = {}
+        for i in range(n_records):
+            name_id = _U32.unpack_from(self._mm, self._records_at + i * _RECORD.size)[0]
+            self._index[self._string(name_id)] = i
+
+        self.aliases: Dict[str, str] = {}
+        for i in range(n_aliases):
+            alias_id, industry_id = _ALIAS.unpack_from(self._mm, self._aliases_at + i * _ALIAS.size)
+            self.aliases[self._string(alias_id)] = self._string(industry_id)
+
+        self._decoded: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _string(self, string_id: int) -> str:
+        start, end = struct.unpack_from("<II", self._mm, self._offsets_at + string_id * _U32.size)
+        return self._mm[self._strings_at + start:self._strings_at + end].decode("utf-8")
+
+    @property
+    def industries(self) -> List[str]:
+        """Industry keys in declaration order"""
+        return [name for name in self._index if name != DEFAULT_KEY]
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Decode an industry record, or None if it doesn't exist"""
+
+        decoded = self._decoded.get(name)
+        if decoded is not None:
+            return decoded
+
+        index = self._index.get(name)
+        if index is None:
+            return None
+
+        fields = _RECORD.unpack_from(self._mm, self._records_at + index * _RECORD.size)
+        record: Dict[str, Any] = {}
+        for i, field in enumerate(LIST_FIELDS):
+            start, count = fields[2 + i * 2], fields[3 + i * 2]
+            ids = struct.unpack_from(f"<{count}I", self._mm, self._items_at + start * _U32.size)
+            record[field] = [self._string(string_id) for string_id in ids]
+        record["messaging_tone"] = self._string(fields[1])
+
+        with self._lock:
+            self._decoded[name] = record
+        return record
+
+    @property
+    def default(self) -> Dict[str, Any]:
+        return self.get(DEFAULT_KEY)
+
+    def close(self) -> None:
+        self._mm.close()
+
+class IndustryKnowledgeBase:
+    """
+    Process-wide handle on the compiled knowledge base with hot reload
+
+    `snapshot()` returns the current version. At most once per reload interval
+    it stats the source and compiled files; if either changed, a new snapshot
+    is mapped and swapped in with a single reference assignment. Requests
+    already holding the old snapshot finish against it unaffected.
+    """
+
+    def __init__(self, source: Path, compiled: Path, reload_interval: float = 5.0):
+        self.source = source
+        self.compiled = compiled
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._snapshot: Optional[KnowledgeBaseSnapshot] = None
+        self.reload()
+
+    def _stat(self, path: Path) -> Optional[os.stat_result]:
+        try:
+            return os.stat(path)
+        except FileNotFoundError:
+            return None
+
+    def reload(self) -> bool:
+        """
+        Recompile if the source is newer, then remap if the compiled file changed
+
+        Returns:
+            True if a new snapshot was swapped in
+        """
+
+        with self._lock:
+            self._next_check = time.monotonic() + self.reload_interval
+
+            source_stat = self._stat(self.source)
+            compiled_stat = self._stat(self.compiled)
+
+            if source_stat and (compiled_stat is None or source_stat.st_mtime_ns > compiled_stat.st_mtime_ns):
+                try:
+                    compile_knowledge_base(self.source, self.compiled)
+                except KnowledgeBaseError as e:
+                    if self._snapshot is None and compiled_stat is None:
+                        raise
+                    # Keep serving (or load) the last compiled version
+                    print(f"⚠️  Industry knowledge base compile failed, keeping the compiled file: {e}")
+                compiled_stat = self._stat(self.compiled)
+
+            if compiled_stat is None:
+                raise KnowledgeBaseError(f"No industry knowledge base at {self.compiled}")
+
+            signature = (compiled_stat.st_ino, compiled_stat.st_size, compiled_stat.st_mtime_ns)
+            if self._snapshot is not None and self._snapshot.signature == signature:
+                return False
+
+            try:
+                try:
+                    snapshot = KnowledgeBaseSnapshot(self.compiled)
+                except KnowledgeBaseError:
+                    if not source_stat:
+                        raise
+                    # Compiled by an older format version - rebuild from source
+                    compile_knowledge_base(self.source, self.compiled)
+                    snapshot = KnowledgeBaseSnapshot(self.compiled)
+            except (OSError, ValueError, struct.error, KnowledgeBaseError) as e:
+                if self._snapshot is None:
+                    raise KnowledgeBaseError(f"Failed to load industry knowledge base: {str(e)}")
+                # Keep serving the last good version
+                print(f"⚠️  Industry knowledge base reload failed, keeping v{self._snapshot.version}: {e}")
+                return False
+
+            # Old mapping is released when the last reference to it goes away
+            self._snapshot = snapshot
+            return True
+
+    def snapshot(self) -> KnowledgeBaseSnapshot:
+        """Current snapshot, reloading first if the check interval has elapsed"""
+        if time.monotonic() >= self._next_check:
+            try:
+                self.reload()
+            except KnowledgeBaseError as e:
+                print(f"⚠️  Industry knowledge base reload failed: {e}")
+        return self._snapshot
+
+_knowledge_base: Optional[IndustryKnowledgeBase] = None
+_knowledge_base_lock = threading.Lock()
+
+def get_knowledge_base() -> IndustryKnowledgeBase:
+    """Shared knowledge base for this process"""
+    global _knowledge_base
+    if _knowledge_base is None:
+        with _knowledge_base_lock:
+            if _knowledge_base is None:
+                _knowledge_base = IndustryKnowledgeBase(
+                    source=Path(settings.INDUSTRY_KB_SOURCE),
+                    compiled=Path(settings.INDUSTRY_KB_PATH),
+                    reload_interval=settings.INDUSTRY_KB_RELOAD_INTERVAL,
+                )
+    return _knowledge_base
+
+if __name__ == "__main__":
+    version = compile_knowledge_base(Path(settings.INDUSTRY_KB_SOURCE), Path(settings.INDUSTRY_KB_PATH))
+    print(f"✅ Compiled industry knowledge base v{version} -> {settings.INDUSTRY_KB_PATH}")
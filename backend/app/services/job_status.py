@@ -0,0 +1,276 @@
+"""
+Job status callbacks
+Pushes pipeline progress to Convex in coalesced, batched updates
+"""
+
+import abc
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+import orjson
+
+from app.core.config import settings
+from app.core.progress import StageCallback
+
+# Overall job progress (0-100) when a pipeline stage finishes. The Convex
+# action reports 10 before calling the backend and 100 once the render is stored.
+STAGE_PROGRESS = {
+    ("analysis", "started"): 15,
+    ("analysis", "done"): 35,
+    ("copy", "done"): 55,
+    ("validate", "done"): 60,
+    ("assets", "done"): 65,
+    ("render_html", "done"): 70,
+    ("preview", "done"): 80,
+    ("pdf", "done"): 85,
+    ("png", "done"): 90,
+    ("png", "failed"): 90,
+    ("png", "skipped"): 90,
+    ("render", "done"): 95,
+}
+
+class CallbackRejected(Exception):
+    """The sink refused a batch; sending it again won't help"""
+
+class CallbackSink(abc.ABC):
+    """Where job status batches go"""
+
+    @abc.abstractmethod
+    async def send(self, updates: List[Dict[str, Any]]) -> None:
+        """Deliver one batch; raise to have it retried, or CallbackRejected if it never will be accepted"""
+
+    async def close(self) -> None:
+        pass
+
+class ConvexCallbackSink(CallbackSink):
+    """POSTs batches to the Convex `/jobs/progress` HTTP action"""
+
+    def __init__(self, url: str, secret: str = "", timeout: float = 5.0):
+        self.url = url
+        self.secret = secret
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def send(self, updates: List[Dict[str, Any]]) -> None:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        headers = {"Content-Type": "application/json"}
+        if self.secret:
+            headers["Authorization"] = f"Bearer {self.secret}"
+        async with self._session.post(self.url, data=orjson.dumps({"updates": updates}), headers=headers) as response:
+            if response.status >= 400:
+                message = f"HTTP {response.status}: {(await response.text())[:200]}"
+                # 4xx other than timeouts and rate limits means Convex rejected the payload
+                if response.status < 500 and response.status not in (408, 429):
+                    raise CallbackRejected(message)
+                raise RuntimeError(message)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+class LocalCallbackSink(CallbackSink):
+    """
+    Stand-in for Convex in local development
+
+    Keeps every batch in memory and, with a path, appends them to a
+    JSON-lines file so progress can be followed with `tail -f`.
+    """
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.batches: List[List[Dict[str, Any]]] = []
+
+    async def send(self, updates: List[Dict[str, Any]]) -> None:
+        self.batches.append(updates)
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(orjson.dumps({"sent_at": time.time(), "updates": updates}) + b"\n")
+
+class JobStatusReporter:
+    """
+    Coalesces job progress and sends it in batches
+
+    `report()` never waits on the network: it overwrites the pending update
+    for the job, so only the latest progress per job within `window` seconds
+    is sent. Batches that fail are retried with backoff; updates that still
+    fail are put back unless a newer one arrived meanwhile, at most
+    `max_requeues` times. A rejected batch is split so only the updates the
+    sink refuses are dropped, and those are never retried.
+    """
+
+    def __init__(self, sink: Optional[CallbackSink], window: float = 0.5, batch_size: int = 50,
+                 max_retries: int = 3, retry_backoff: float = 0.5, max_requeues: int = 3):
+        self.sink = sink
+        self.window = window
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_requeues = max_requeues
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._requeues: Dict[str, int] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"reported": 0, "coalesced": 0, "sent": 0, "batches": 0, "retries": 0, "failed": 0, "dropped": 0,
+                      "rejected": 0, "gave_up": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.sink is not None
+
+    def report(self, job_id: Optional[str], status: str = "running", progress: Optional[int] = None,
+               stage: Optional[str] = None, error: Optional[str] = None, **fields: Any) -> None:
+        """
+        Queue a status update for a job, replacing any unsent one
+
+        Extra keyword fields (e.g. pdfUrl) are sent as-is and survive
+        coalescing with later updates in the same window. None fields are
+        left out - Convex's optional validators reject null.
+        """
+        if self.sink is None or not job_id:
+            return
+
+        self.stats["reported"] += 1
+        previous = self._pending.get(job_id)
+        if previous is not None:
+            self.stats["coalesced"] += 1
+            # Progress never goes backwards within a window
+            if progress is not None and previous.get("progress") is not None:
+                progress = max(progress, previous["progress"])
+
+        update = {key: value for key, value in (previous or {}).items() if key not in ("progress", "stage", "error")}
+        update.update({key: value for key, value in fields.items() if value is not None})
+        update.update({"jobId": job_id, "status": status, "updatedAt": int(time.time() * 1000)})
+        if progress is not None:
+            update["progress"] = progress
+        if stage is not None:
+            update["stage"] = stage
+        if error is not None:
+            update["error"] = error
+        self._pending[job_id] = update
+        self._wakeup.set()
+
+    def stage_callback(self, job_id: Optional[str]) -> Optional[StageCallback]:
+        """Pipeline stage callback reporting progress for one job"""
+        if self.sink is None or not job_id:
+            return None
+
+        async def on_stage(stage: str, status: str, **data: Any) -> None:
+            progress = STAGE_PROGRESS.get((stage, status))
+            if progress is not None:
+                self.report(job_id, "running", progress, stage=stage)
+
+        return on_stage
+
+    async def _send_with_retries(self, batch: List[Dict[str, Any]]) -> str:
+        """Send one batch with retries; returns "sent", "rejected" or "failed" """
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.sink.send(batch)
+                return "sent"
+            except CallbackRejected as e:
+                if len(batch) == 1:
+                    print(f"⚠️  Job status update for {batch[0]['jobId']} rejected: {e}")
+                return "rejected"
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.stats["failed"] += 1
+                    print(f"⚠️  Job status batch of {len(batch)} failed: {e}")
+                    return "failed"
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+        return "failed"
+
+    async def _deliver(self, batch: List[Dict[str, Any]]) -> None:
+        outcome = await self._send_with_retries(batch)
+        if outcome == "sent":
+            self.stats["sent"] += len(batch)
+            self.stats["batches"] += 1
+            for update in batch:
+                self._requeues.pop(update["jobId"], None)
+            return
+
+        if outcome == "rejected":
+            if len(batch) > 1:
+                # One bad update rejects the whole batch - send them singly to find it
+                for update in batch:
+                    await self._deliver([update])
+                return
+            self.stats["rejected"] += 1
+            self._requeues.pop(batch[0]["jobId"], None)
+            return
+
+        # Put failed updates back for the next cycle unless superseded or retried too often
+        for update in batch:
+            job_id = update["jobId"]
+            if job_id in self._pending:
+                self.stats["dropped"] += 1
+                continue
+            requeues = self._requeues.get(job_id, 0) + 1
+            if requeues > self.max_requeues:
+                self.stats["gave_up"] += 1
+                self._requeues.pop(job_id, None)
+                continue
+            self._requeues[job_id] = requeues
+            self._pending[job_id] = update
+        if self._pending:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Send everything pending now"""
+        pending, self._pending = self._pending, {}
+        updates = list(pending.values())
+
+        for i in range(0, len(updates), self.batch_size):
+            await self._deliver(updates[i:i + self.batch_size])
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            # Let updates accumulate for one window, then send them together
+            await asyncio.sleep(self.window)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"⚠️  Job status flush failed: {e}")
+
+    def start(self) -> None:
+        """Start the background sender"""
+        if self.sink is not None and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the sender and flush what's left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.sink is not None:
+            if self._pending:
+                await self.flush()
+            await self.sink.close()
+
+def _default_sink() -> Optional[CallbackSink]:
+    sink = settings.JOB_CALLBACK_SINK or ("convex" if settings.JOB_CALLBACK_URL else "none")
+    if sink == "convex" and settings.JOB_CALLBACK_URL:
+        return ConvexCallbackSink(settings.JOB_CALLBACK_URL, settings.JOB_CALLBACK_SECRET)
+    if sink == "local":
+        return LocalCallbackSink(settings.JOB_CALLBACK_LOCAL_PATH)
+    return None
+
+job_status = JobStatusReporter(
+    _default_sink(),
+    window=settings.JOB_CALLBACK_WINDOW,
+    batch_size=settings.JOB_CALLBACK_BATCH_SIZE,
+    max_retries=settings.JOB_CALLBACK_MAX_RETRIES,
+    max_requeues=settings.JOB_CALLBACK_MAX_REQUEUES,
+)
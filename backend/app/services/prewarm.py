@@ -0,0 +1,232 @@
+"""
+Speculative analysis pre-warming
+Runs the business analysis stage when a project is saved and parks the result for generation
+"""
+
+import asyncio
+import hashlib
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import orjson
+
+from app.core.config import settings
+from app.core.deadline import stage_budgets
+from app.core.scheduler import reset_lane, set_lane
+from app.core.shared_state import shared_state
+from app.models.content import ContentRequest
+
+Analyze = Callable[[ContentRequest], Awaitable[Dict[str, Any]]]
+
+# Shared state namespaces: {"token", "fingerprint", "status", "analysis"} per project, prewarms per caller
+PARKED = "prewarm"
+CALLS = "prewarm_calls"
+
+def analysis_fingerprint(request: ContentRequest) -> str:
+    """Hash of everything the analysis stage depends on"""
+    payload = orjson.dumps(
+        {"business_info": request.business_info.model_dump(), "selected_features": request.selected_features},
+        option=orjson.OPT_SORT_KEYS,
+    )
+    return hashlib.sha256(payload).hexdigest()
+
+class PrewarmStore:
+    """
+    Short-TTL store of speculative analyses keyed by project
+
+    `start` launches the analysis in the background; `take` hands it to
+    the real generation if the business info and features still match.
+    Parked analyses live in the shared state, so a generation landing on
+    any worker can use them.
+
+    A prewarm waits `debounce` seconds before calling Gemini and is
+    dropped if the project was saved again meanwhile, so a burst of saves
+    costs one analysis. Each caller may start `user_limit` prewarms per
+    `user_window` seconds; the rest are throttled. Entries that expire,
+    are superseded by a newer prewarm or no longer match at generation
+    time count as waste.
+    """
+
+    def __init__(self, ttl: float = 600.0, max_entries: int = 1000, sweep_interval: float = 30.0,
+                 debounce: float = 2.0, user_limit: int = 20, user_window: float = 60.0,
+                 running_ttl: float = 300.0, poll_interval: float = 0.1):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self.debounce = debounce
+        self.user_limit = user_limit
+        self.user_window = user_window
+        self.running_ttl = running_ttl
+        self.poll_interval = poll_interval
+        # Prewarms started on this worker: {"token", "task", "expires_at"} per project
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"started": 0, "deduplicated": 0, "throttled": 0, "hits": 0, "inflight_hits": 0,
+                      "misses": 0, "stale": 0, "expired": 0, "superseded": 0, "evicted": 0}
+
+    def _discard(self, project_id: str, reason: Optional[str] = None) -> None:
+        entry = self._entries.pop(project_id, None)
+        if entry is None:
+            return
+        # A finished prewarm's result stays in the shared state until it expires
+        if reason and not entry["task"].done():
+            self.stats[reason] += 1
+        entry["task"].cancel()
+
+    async def _current(self, project_id: str, token: str) -> Optional[Dict[str, Any]]:
+        """The project's shared record, if it still belongs to this prewarm"""
+        record = await shared_state.get(PARKED, project_id)
+        return record if record is not None and record["token"] == token else None
+
+    async def _speculate(self, project_id: str, token: str, analyze: Analyze, request: ContentRequest) -> None:
+        await asyncio.sleep(self.debounce)
+        record = await self._current(project_id, token)
+        if record is None:
+            return  # saved again, or overtaken by a generation, while debouncing
+        await shared_state.set(PARKED, project_id, {**record, "status": "running"}, self.running_ttl)
+
+        # Speculative work shouldn't crowd out requests a user is waiting on
+        lane = set_lane(settings.PREWARM_LANE)
+        analysis = None
+        try:
+            analysis = await analyze(request)
+        finally:
+            reset_lane(lane)
+            # Stored only if nobody replaced the record meanwhile; on failure
+            # or cancellation it is removed so generations stop waiting for it
+            if await self._current(project_id, token) is not None:
+                if analysis is None:
+                    await shared_state.delete(PARKED, project_id)
+                else:
+                    await shared_state.set(PARKED, project_id, {**record, "status": "done", "analysis": analysis},
+                                           self.ttl)
+
+    async def start(self, project_id: str, request: ContentRequest, analyze: Analyze,
+                    owner: Optional[str] = None) -> str:
+        """
+        Start a speculative analysis for a project
+
+        Returns:
+            "started", "deduplicated" when an identical one is already parked,
+            or "throttled" when the caller is over its prewarm limit
+        """
+        await self.sweep()
+        fingerprint = analysis_fingerprint(request)
+        record = await shared_state.get(PARKED, project_id)
+        if record is not None and record["fingerprint"] == fingerprint:
+            self.stats["deduplicated"] += 1
+            return "deduplicated"
+        if await shared_state.incr(CALLS, owner or "anonymous", self.user_window) > self.user_limit:
+            self.stats["throttled"] += 1
+            return "throttled"
+
+        # Replaces the project's record, so prewarms for older saves give up
+        if record is not None:
+            self.stats["superseded"] += 1
+        token = uuid.uuid4().hex
+        await shared_state.set(PARKED, project_id, {"token": token, "fingerprint": fingerprint,
+                                                    "status": "pending"}, self.running_ttl)
+        self._discard(project_id)
+        while len(self._entries) >= self.max_entries:
+            self._discard(min(self._entries, key=lambda p: self._entries[p]["expires_at"]), "evicted")
+
+        task = asyncio.create_task(self._speculate(project_id, token, analyze, request))
+        # Results nobody takes would otherwise log "exception never retrieved"
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._entries[project_id] = {"token": token, "task": task, "expires_at": time.monotonic() + self.ttl}
+        self.stats["started"] += 1
+        return "started"
+
+    async def take(self, project_id: Optional[str], request: ContentRequest) -> Optional[Dict[str, Any]]:
+        """
+        Claim a parked analysis for this request
+
+        Returns the analysis if a valid one exists (waiting for it if it is
+        still running on any worker), otherwise None and the caller runs
+        stage 1 itself. A prewarm still debouncing is called off instead of
+        waited for.
+        """
+        if not project_id:
+            return None
+        record = await shared_state.get(PARKED, project_id)
+        if record is None:
+            self.stats["misses"] += 1
+            return None
+        stale = record["fingerprint"] != analysis_fingerprint(request)
+        if stale or record["status"] == "pending":
+            await shared_state.delete(PARKED, project_id)
+            if stale:
+                self.stats["stale"] += 1
+            self.stats["misses"] += 1
+            return None
+
+        if record["status"] == "running":
+            # Wait no longer than running stage 1 here would be allowed to take
+            self.stats["inflight_hits"] += 1
+            budget = stage_budgets.budget("analysis")
+            give_up = None if budget is None else time.monotonic() + budget
+            while record is not None and record["status"] == "running":
+                if give_up is not None and time.monotonic() >= give_up:
+                    record = None
+                    break
+                await asyncio.sleep(self.poll_interval)
+                record = await self._current(project_id, record["token"])
+            if record is None:
+                self.stats["misses"] += 1  # the analysis failed, stalled or its worker went away
+                return None
+
+        await shared_state.delete(PARKED, project_id)
+        if self._entries.get(project_id, {}).get("token") == record["token"]:
+            del self._entries[project_id]
+        self.stats["hits"] += 1
+        return record["analysis"]
+
+    async def sweep(self) -> None:
+        """Forget prewarms past their TTL, counting the ones nobody took"""
+        now = time.monotonic()
+        for project_id in [p for p, entry in self._entries.items() if entry["expires_at"] < now]:
+            entry = self._entries.pop(project_id)
+            entry["task"].cancel()
+            if await self._current(project_id, entry["token"]) is not None:
+                await shared_state.delete(PARKED, project_id)
+                self.stats["expired"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        started = self.stats["started"]
+        wasted = self.stats["stale"] + self.stats["expired"] + self.stats["superseded"] + self.stats["evicted"]
+        return {
+            "parked": len(self._entries),
+            "ttl_s": self.ttl,
+            "hit_ratio": round(self.stats["hits"] / started, 3) if started else 0.0,
+            "waste_ratio": round(wasted / started, 3) if started else 0.0,
+            **self.stats,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            await self.sweep()
+
+    def start_sweeper(self) -> None:
+        """Clean up abandoned results in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for entry in self._entries.values():
+            entry["task"].cancel()
+        self._entries.clear()
+
+prewarm_store = PrewarmStore(
+    settings.PREWARM_TTL, settings.PREWARM_MAX_ENTRIES, debounce=settings.PREWARM_DEBOUNCE,
+    user_limit=settings.PREWARM_USER_LIMIT, user_window=settings.PREWARM_USER_WINDOW,
+    running_ttl=settings.DEADLINE_MAX,
+)
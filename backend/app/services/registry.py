@@ -0,0 +1,100 @@
+"""
+Lazy service registry
+Services are built on first use or during lifespan warm-up, and fail independently
+"""
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from app.core.startup import startup_timer
+
+class ServiceRegistry:
+    """
+    Builds services lazily and tracks their health
+
+    A service whose constructor raises (e.g. a missing API key) is marked
+    degraded; the rest of the app keeps serving. Failed services are retried
+    on the next access after `retry_interval` seconds.
+    """
+
+    def __init__(self, retry_interval: float = 30.0):
+        self.retry_interval = retry_interval
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        """Register a service factory; nothing is built yet"""
+        self._factories[name] = factory
+        self._status[name] = {"status": "not_started", "error": None, "init_ms": None, "failed_at": None}
+
+    def _build(self, name: str) -> Optional[Any]:
+        state = self._status[name]
+        start = time.perf_counter()
+        try:
+            with startup_timer.measure("init", name):
+                instance = self._factories[name]()
+        except Exception as e:
+            state.update(status="degraded", error=str(e), failed_at=time.monotonic(),
+                         init_ms=round((time.perf_counter() - start) * 1000, 2))
+            print(f"⚠️  Service '{name}' unavailable: {e}")
+            return None
+
+        self._instances[name] = instance
+        state.update(status="ready", error=None, failed_at=None,
+                     init_ms=round((time.perf_counter() - start) * 1000, 2))
+        return instance
+
+    def get(self, name: str) -> Any:
+        """
+        Get a service, building it on first use
+
+        Raises:
+            HTTPException: 503 if the service is degraded
+        """
+
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        state = self._status[name]
+        if state["failed_at"] is None or time.monotonic() - state["failed_at"] >= self.retry_interval:
+            instance = self._build(name)
+            if instance is not None:
+                return instance
+
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Service '{name}' unavailable: {state['error']}"
+        )
+
+    def dependency(self, name: str) -> Callable[[], Any]:
+        """FastAPI dependency returning the named service"""
+        def _get_service() -> Any:
+            return self.get(name)
+        _get_service.__name__ = f"get_{name}_service"
+        return _get_service
+
+    def warm_up(self) -> Dict[str, str]:
+        """Build every registered service; failures are recorded, not raised"""
+        for name in self._factories:
+            if name not in self._instances:
+                self._build(name)
+        return {name: state["status"] for name, state in self._status.items()}
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {name: {k: v for k, v in state.items() if k != "failed_at"} for name, state in self._status.items()}
+
+def _ai_service():
+    from app.services.ai_service import AIService
+    return AIService()
+
+def _render_service():
+    from app.services.render_service import RenderService
+    return RenderService()
+
+services = ServiceRegistry()
+services.register("ai", _ai_service)
+services.register("render", _render_service)
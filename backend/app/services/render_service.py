@@ -3,21 +3,67 @@ Brochure rendering service using HTMLCSStoImage for serverless PDF generation
 """
 
 import asyncio
+import ipaddress
 import os
+import socket
 import tempfile
 import time
 import aiohttp
 import base64
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit
 from jinja2 import Environment, FileSystemLoader, Template
 import aiofiles
+import io
 import json
 
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; previews then keep full-size assets
+    Image = None
+
 from app.models.content import RenderRequest, RenderResponse, LayoutData
 from app.core.config import settings
+from app.core.progress import StageCallback, emit_stage
+from app.core.tracing import current_span, traced
+from app.core.scheduler import schedulers
+from app.core.cancellation import record_upstream_call
+from app.core.deadline import DeadlineExceeded, remaining, stage_budgets
+from app.services.background_renders import background_renders
+from app.services.artifact_store import artifact_store
+from app.services.blob_store import blob_store
 from app.services.variant_system import VariantSystem
 
+def _public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address)
+    return ip.is_global and not ip.is_multicast
+
+def _asset_url_allowed(url: str) -> bool:
+    """Whether an asset URL may be fetched from here (https, an allowed host, not an internal address)"""
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.scheme != "https" or not host:
+        return False
+    try:
+        # aiohttp connects to IP literals without asking the resolver
+        if not _public_address(host):
+            return False
+    except ValueError:
+        pass
+    return any(host == allowed.lstrip(".") or (allowed.startswith(".") and host.endswith(allowed))
+               for allowed in settings.ASSET_FETCH_HOSTS)
+
+class _PublicResolver(aiohttp.ThreadedResolver):
+    """Resolves only to public addresses, so an allowed name can't point inside the network"""
+
+    async def resolve(self, host: str, port: int = 0, family=socket.AF_INET):
+        results = [result for result in await super().resolve(host, port, family)
+                   if _public_address(result["host"])]
+        if not results:
+            raise OSError(f"{host} resolves only to internal addresses")
+        return results
+
 class RenderService:
     """Service for rendering brochures to PDF and PNG using HTMLCSStoImage"""
     
@@ -31,8 +77,8 @@ class RenderService:
             autoescape=True
         )
         
-        # HTMLCSStoImage API configuration
-        self.api_base = "https://hcti.io/v1"
+        # HTMLCSStoImage API configuration (overridable to point at a local stub)
+        self.api_base = os.getenv("HTMLCSSTOIMAGE_API_BASE", "https://hcti.io/v1")
         
         # Get API credentials from environment variables
         self.api_user = os.getenv("HTMLCSSTOIMAGE_USER_ID")
@@ -41,30 +87,67 @@ class RenderService:
         if not self.api_user or not self.api_key:
             raise ValueError("HTMLCSSTOIMAGE_USER_ID and HTMLCSSTOIMAGE_API_KEY environment variables are required")
         
-    async def generate_brochure(self, request: RenderRequest) -> RenderResponse:
+    @traced("render.generate_brochure")
+    async def generate_brochure(self, request: RenderRequest,
+                                on_stage: Optional[StageCallback] = None,
+                                allow_preview: bool = True) -> RenderResponse:
         """
         Generate PDF and PNG brochure from content and assets
         
         Args:
             request: RenderRequest containing copy data, layout, and assets
+            on_stage: Optional callback for stage progress events
+            allow_preview: Answer with a preview when short of time (off for
+                the background print render, which must produce the PDF)
             
         Returns:
             RenderResponse with URLs to generated files
         """
         
+        # Too little time left for a print render - answer with a preview and
+        # finish the PDF in the background on its own budget
+        left = remaining()
+        if allow_preview and left is not None and left < settings.DEADLINE_PREVIEW_BELOW and not request.preview:
+            stage_budgets.degrade("preview_instead_of_pdf")
+            return await self.generate_preview(request, on_stage=on_stage)
+        
         try:
             start_time = time.time()
             
             # Step 1: Load and render HTML template
             html_content = await self._render_html_template(request)
+            await emit_stage(on_stage, "render_html", "done")
             
             # Step 2: Generate PDF using HTMLCSStoImage
-            pdf_url = await self._generate_pdf(html_content)
+            await emit_stage(on_stage, "pdf", "started")
+            pdf_url = await stage_budgets.run("pdf", lambda: self._generate_pdf(html_content))
+            await emit_stage(on_stage, "pdf", "done", pdf_url=pdf_url)
             
-            # Step 3: Generate PNG thumbnail (optional)
-            png_url = await self._generate_png(html_content)
+            # Step 3: Generate PNG thumbnail (optional - dropped when out of time)
+            await emit_stage(on_stage, "png", "started")
+            try:
+                png_url = await stage_budgets.run("png", lambda: self._generate_png(html_content))
+                await emit_stage(on_stage, "png", "done" if png_url else "failed", png_url=png_url)
+            except DeadlineExceeded:
+                stage_budgets.degrade("png_skipped")
+                png_url = None
+                await emit_stage(on_stage, "png", "skipped")
+            
+            # Keep our own copy of the files; hcti.io URLs can expire
+            if settings.BLOB_STORE_ENABLED and blob_store.enabled:
+                try:
+                    pdf_url, png_url = await stage_budgets.run("store", lambda: asyncio.gather(
+                        blob_store.ingest(pdf_url, "pdf"), blob_store.ingest(png_url, "png")
+                    ))
+                    await emit_stage(on_stage, "store", "done", pdf_url=pdf_url, png_url=png_url)
+                except DeadlineExceeded:
+                    # The HTMLCSStoImage URLs still work, just not for as long
+                    stage_budgets.degrade("store_skipped")
             
             generation_time = time.time() - start_time
+            artifact_store.put("render", {"pdf_url": pdf_url, "png_url": png_url, "template": request.template,
+                                          "render_time": generation_time},
+                               project_id=request.project_id, job_id=request.job_id)
             
             return RenderResponse(
                 success=True,
@@ -83,8 +166,149 @@ class RenderService:
                 message=f"Brochure generation failed: {str(e)}"
             )
     
-    async def _render_html_template(self, request: RenderRequest) -> str:
-        """Render HTML template with provided data"""
+    @traced("render.preview")
+    async def generate_preview(self, request: RenderRequest,
+                               on_stage: Optional[StageCallback] = None) -> RenderResponse:
+        """
+        Return a low-res PNG preview now and render the print PDF in the background
+        
+        The preview uses downscaled assets, no texture effects and a device
+        scale of PREVIEW_DEVICE_SCALE, on the interactive priority lane. The
+        print render then runs from the original request at full quality;
+        its URLs are pushed through the job status callbacks and can be
+        polled at /api/render/jobs/{job_id}.
+        """
+        
+        try:
+            start_time = time.time()
+            
+            assets = await self.prefetch_assets(request.assets)
+            preview_assets = await self.downscale_assets(assets)
+            
+            html_content = await self._render_html_template(
+                request.model_copy(update={"assets": preview_assets}), preview=True
+            )
+            await emit_stage(on_stage, "render_html", "done")
+            
+            await emit_stage(on_stage, "preview", "started")
+            preview_url = await stage_budgets.run("preview", lambda: self._generate_png(
+                html_content, device_scale=settings.PREVIEW_DEVICE_SCALE, lane="interactive"
+            ))
+            if not preview_url:
+                raise Exception("Preview generation failed")
+            await emit_stage(on_stage, "preview", "done", preview_url=preview_url)
+            
+            # Print render reuses the inlined (full-size) assets
+            print_request = request.model_copy(update={"assets": assets, "preview": False})
+            state = await background_renders.start(
+                request.job_id, lambda: self.generate_brochure(print_request, allow_preview=False)
+            )
+            
+            generation_time = time.time() - start_time
+            
+            return RenderResponse(
+                success=True,
+                pdf_url=state["pdf_url"],
+                png_url=state["png_url"] or preview_url,
+                preview_url=preview_url,
+                pdf_status=state["status"],
+                render_time=generation_time,
+                message=f"Preview generated in {generation_time:.2f}s; print PDF rendering in background"
+            )
+            
+        except Exception as e:
+            return RenderResponse(
+                success=False,
+                pdf_url=None,
+                png_url=None,
+                render_time=0,
+                pdf_status="failed",
+                message=f"Preview generation failed: {str(e)}"
+            )
+    
+    async def downscale_assets(self, assets: Dict[str, str]) -> Dict[str, str]:
+        """Shrink inlined raster assets to PREVIEW_MAX_ASSET_PX on the long edge"""
+        
+        if Image is None or not assets:
+            return assets
+        
+        def shrink(url: str) -> str:
+            header, _, payload = url.partition(",")
+            if not header.startswith("data:image/") or "svg" in header or not header.endswith(";base64"):
+                return url
+            try:
+                image = Image.open(io.BytesIO(base64.b64decode(payload)))
+                if max(image.size) <= settings.PREVIEW_MAX_ASSET_PX:
+                    return url
+                image.thumbnail((settings.PREVIEW_MAX_ASSET_PX, settings.PREVIEW_MAX_ASSET_PX))
+                out = io.BytesIO()
+                # Keep transparency for logos; everything else goes to JPEG
+                if image.mode in ("RGBA", "LA", "P"):
+                    image.save(out, format="PNG", optimize=True)
+                    content_type = "image/png"
+                else:
+                    image.convert("RGB").save(out, format="JPEG", quality=80)
+                    content_type = "image/jpeg"
+                return f"data:{content_type};base64,{base64.b64encode(out.getvalue()).decode()}"
+            except Exception as e:
+                print(f"Asset downscale failed: {e}")
+                return url
+        
+        names = list(assets.keys())
+        urls = await asyncio.gather(*(asyncio.to_thread(shrink, assets[name]) for name in names))
+        return dict(zip(names, urls))
+    
+    @traced("render.prefetch_assets")
+    async def prefetch_assets(self, assets: Dict[str, str]) -> Dict[str, str]:
+        """
+        Download assets and inline them as data URIs
+        
+        Inlined assets spare the renderer a fetch per image. Only https URLs
+        on ASSET_FETCH_HOSTS that resolve to public addresses are fetched,
+        without following redirects. Any asset that isn't fetched, fails,
+        isn't an allowed image type or is too large keeps its URL.
+        """
+        
+        async def fetch(session: aiohttp.ClientSession, name: str, url: str) -> str:
+            if not url or url.startswith("data:") or not _asset_url_allowed(url):
+                return url
+            try:
+                async with session.get(url, allow_redirects=False) as response:
+                    content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+                    if response.status != 200 or content_type not in settings.ALLOWED_IMAGE_TYPES:
+                        return url
+                    if (response.content_length or 0) > settings.MAX_FILE_SIZE:
+                        return url
+                    # read(n) returns what is buffered, not n bytes - read to the end
+                    chunks: List[bytes] = []
+                    size = 0
+                    async for chunk in response.content.iter_chunked(64 * 1024):
+                        chunks.append(chunk)
+                        size += len(chunk)
+                        if size > settings.MAX_FILE_SIZE:
+                            return url
+                    return f"data:{content_type};base64,{base64.b64encode(b''.join(chunks)).decode()}"
+            except Exception as e:
+                print(f"Asset prefetch failed for {name}: {e}")
+                return url
+        
+        if not assets:
+            return {}
+        
+        timeout = aiohttp.ClientTimeout(total=30)
+        connector = aiohttp.TCPConnector(resolver=_PublicResolver())
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            names = list(assets.keys())
+            urls = await asyncio.gather(*(fetch(session, name, assets[name]) for name in names))
+        current_span().set_attributes(**{
+            "assets.count": len(names),
+            "assets.inlined_bytes": sum(len(url) for url in urls if url.startswith("data:")),
+        })
+        return dict(zip(names, urls))
+    
+    @traced("render.html_template")
+    async def _render_html_template(self, request: RenderRequest, preview: bool = False) -> str:
+        """Render HTML template with provided data; previews skip texture effects"""
         
         try:
             # Get template from request
@@ -92,13 +316,17 @@ class RenderService:
             template = self.jinja_env.get_template(template_name)
             
             # Generate variant configuration based on project and palette preference
-            copy_dict = request.copy_data.dict()
+            copy_dict = request.copy_data.model_dump()
             palette_preference = copy_dict.get("palette")
             
             variant_config = VariantSystem.generate_variant_config(
                 project_id=request.project_id,
                 palette_preference=palette_preference
             )
+            if preview:
+                variant_config = dict(variant_config, micro_texture="paper-none")
+            else:
+                artifact_store.put("variant", variant_config, project_id=request.project_id, job_id=request.job_id)
             
             # Generate dynamic CSS with variant configuration
             css_template = self.jinja_env.get_template("dynamic_base.css")
@@ -116,12 +344,19 @@ class RenderService:
             
             # Render HTML
             html_content = template.render(**context)
+            current_span().set_attributes(**{
+                "template": request.template,
+                "variant": variant_config["variant_name"],
+                "palette": variant_config["palette"]["name"],
+                "html.bytes": len(html_content),
+            })
             
             return html_content
             
         except Exception as e:
             raise Exception(f"Template rendering failed: {str(e)}")
     
+    @traced("hcti.pdf")
     async def _generate_pdf(self, html_content: str) -> str:
         """Generate PDF using HTMLCSStoImage API"""
         
@@ -137,9 +372,17 @@ class RenderService:
                     "device_scale": 2,
                     "print_background": True
                 }
+                span = current_span()
+                if span.recording:
+                    span.set_attributes(**{
+                        "payload.bytes": len(html_content.encode()),
+                        "format": data["format"],
+                        "device_scale": data["device_scale"],
+                    })
                 
-                # Make API request
-                async with session.post(
+                # Make API request; HCTI capacity is shared between priority lanes
+                record_upstream_call("hcti")
+                async with schedulers["render"].slot(), session.post(
                     f"{self.api_base}/image",
                     auth=auth,
                     json=data
@@ -155,7 +398,9 @@ class RenderService:
         except Exception as e:
             raise Exception(f"PDF generation error: {str(e)}")
     
-    async def _generate_png(self, html_content: str) -> Optional[str]:
+    @traced("hcti.png")
+    async def _generate_png(self, html_content: str, device_scale: float = 1,
+                            lane: Optional[str] = None) -> Optional[str]:
         """Generate PNG thumbnail using HTMLCSStoImage API"""
         
         try:
@@ -167,12 +412,20 @@ class RenderService:
                     "format": "png",
                     "width": 595,
                     "height": 842,
-                    "device_scale": 1,
+                    "device_scale": device_scale,
                     "print_background": True
                 }
+                span = current_span()
+                if span.recording:
+                    span.set_attributes(**{
+                        "payload.bytes": len(html_content.encode()),
+                        "format": data["format"],
+                        "device_scale": data["device_scale"],
+                    })
                 
-                # Make API request
-                async with session.post(
+                # Make API request; HCTI capacity is shared between priority lanes
+                record_upstream_call("hcti")
+                async with schedulers["render"].slot(lane), session.post(
                     f"{self.api_base}/image",
                     auth=auth,
                     json=data
@@ -0,0 +1,198 @@
+"""
+Polario Variant Space
+Combinatorial design space with compatibility rules and bit-packed seed decoding
+"""
+
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+# Allowed values for each variant dimension. Order matters: palette_pack is
+# enumerated outermost so that every palette owns a contiguous slice of the index.
+DIMENSIONS: Dict[str, Tuple[str, ...]] = {
+    "palette_pack": (
+        "classic_graphite", "polished_nickel", "slate_copper",
+        "soft_tungsten", "charcoal_bronze", "pewter_gold",
+    ),
+    "hero_layout": ("hero-right", "hero-left", "hero-full"),
+    "header_emphasis": ("underline", "accent-bar", "none"),
+    "feature_card_style": ("outline", "soft", "divided"),
+    "feature_icon_treatment": ("number-badges", "check-icons", "no-icons"),
+    "cta_band": ("filled-steel", "copper-outline", "light-panel"),
+    "logo_positioning": ("header-left", "header-right", "hero-overlay"),
+    "card_corners": ("rounded-md", "rounded-lg"),
+    "separators": ("none", "subtle", "dotted"),
+    "typographic_scale": ("type-normal", "type-compact", "type-comfort"),
+    "micro_texture": ("paper-none", "paper-subtle", "paper-grid"),
+}
+
+@dataclass(frozen=True)
+class CompatibilityRule:
+    """When `when_dimension` takes `when_value`, `dimension` must be one of `allowed`"""
+    when_dimension: str
+    when_value: str
+    dimension: str
+    allowed: FrozenSet[str]
+    reason: str
+
+# Design rules that keep generated looks coherent
+COMPATIBILITY_RULES: List[CompatibilityRule] = [
+    CompatibilityRule(
+        "logo_positioning", "hero-overlay", "hero_layout", frozenset({"hero-full"}),
+        "Logo overlay needs a full-bleed hero image to sit on"
+    ),
+    CompatibilityRule(
+        "feature_card_style", "divided", "separators", frozenset({"subtle", "dotted"}),
+        "Divided cards rely on visible separators"
+    ),
+    CompatibilityRule(
+        "feature_card_style", "outline", "feature_icon_treatment", frozenset({"number-badges", "check-icons"}),
+        "Outline cards look empty without icons"
+    ),
+    CompatibilityRule(
+        "hero_layout", "hero-full", "typographic_scale", frozenset({"type-normal", "type-compact"}),
+        "Full-bleed hero leaves no room for the comfort type scale"
+    ),
+    CompatibilityRule(
+        "micro_texture", "paper-grid", "cta_band", frozenset({"filled-steel", "light-panel"}),
+        "Outline CTA gets lost on top of the grid texture"
+    ),
+]
+
+class VariantSpace:
+    """
+    Precomputed index of every valid variant combination
+
+    Each combination is packed into a single unsigned 32-bit integer, one bit
+    field per dimension, and stored in a flat array. Decoding a seed is a
+    modulo, an array lookup and a handful of shifts.
+    """
+
+    def __init__(self, dimensions: Dict[str, Tuple[str, ...]] = DIMENSIONS,
+                 rules: List[CompatibilityRule] = COMPATIBILITY_RULES):
+        """Build the bit layout and enumerate valid combinations"""
+        self.dimensions = dimensions
+        self.rules = rules
+        self.names: Tuple[str, ...] = tuple(dimensions.keys())
+
+        # Bit layout: (offset, mask) per dimension, first dimension in the highest bits
+        self._layout: List[Tuple[int, int]] = []
+        offset = sum(self._bit_width(len(values)) for values in dimensions.values())
+        if offset > 32:
+            raise ValueError(f"Variant space needs {offset} bits, at most 32 are supported")
+        self.bits = offset
+        for values in dimensions.values():
+            width = self._bit_width(len(values))
+            offset -= width
+            self._layout.append((offset, (1 << width) - 1))
+
+        self._value_index = {
+            name: {value: i for i, value in enumerate(values)}
+            for name, values in dimensions.items()
+        }
+
+        self.codes = array("I")
+        self._palette_ranges: Dict[str, Tuple[int, int]] = {}
+        self._build_index()
+
+    @staticmethod
+    def _bit_width(count: int) -> int:
+        """Bits needed to store `count` distinct values"""
+        return max(1, (count - 1).bit_length())
+
+    def _field(self, dimension: str, value: str) -> Tuple[int, int]:
+        """Return (mask, pattern) selecting `dimension == value` in a packed code"""
+        i = self.names.index(dimension)
+        offset, mask = self._layout[i]
+        return mask << offset, self._value_index[dimension][value] << offset
+
+    def _compile_rules(self) -> Dict[Tuple[int, int], List[Tuple[int, int]]]:
+        """
+        Turn rules into forbidden (mask, pattern) pairs, attached to the
+        (dimension, value) that is placed last during enumeration
+        """
+        forbidden: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        for rule in self.rules:
+            for value in self.dimensions[rule.dimension]:
+                if value in rule.allowed:
+                    continue
+                when_mask, when_pattern = self._field(rule.when_dimension, rule.when_value)
+                mask, pattern = self._field(rule.dimension, value)
+                later = max(
+                    (self.names.index(rule.when_dimension), self._value_index[rule.when_dimension][rule.when_value]),
+                    (self.names.index(rule.dimension), self._value_index[rule.dimension][value]),
+                )
+                forbidden.setdefault(later, []).append((when_mask | mask, when_pattern | pattern))
+        return forbidden
+
+    def _build_index(self) -> None:
+        """Enumerate valid combinations dimension by dimension, pruning early"""
+        forbidden = self._compile_rules()
+        partials = [0]
+
+        for dim_index, values in enumerate(self.dimensions.values()):
+            offset, _ = self._layout[dim_index]
+            extended = []
+            for value_index in range(len(values)):
+                bits = value_index << offset
+                checks = forbidden.get((dim_index, value_index))
+                if checks:
+                    for partial in partials:
+                        code = partial | bits
+                        if all(code & mask != pattern for mask, pattern in checks):
+                            extended.append(code)
+                else:
+                    extended.extend(partial | bits for partial in partials)
+            partials = extended
+
+        # Sorted codes keep palette-major order, so each palette is one contiguous run
+        partials.sort()
+        self.codes = array("I", partials)
+
+        palette_offset, _ = self._layout[0]
+        for palette_index, palette in enumerate(self.dimensions[self.names[0]]):
+            start = bisect_left(self.codes, palette_index << palette_offset)
+            end = bisect_left(self.codes, (palette_index + 1) << palette_offset)
+            self._palette_ranges[palette] = (start, end - start)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def encode(self, combination: Dict[str, str]) -> int:
+        """Pack a combination dict into its integer code"""
+        code = 0
+        for (offset, _), name in zip(self._layout, self.names):
+            code |= self._value_index[name][combination[name]] << offset
+        return code
+
+    def unpack(self, code: int) -> Dict[str, str]:
+        """Unpack an integer code into a combination dict"""
+        return {
+            name: values[(code >> offset) & mask]
+            for name, values, (offset, mask) in zip(self.names, self.dimensions.values(), self._layout)
+        }
+
+    def is_valid(self, combination: Dict[str, str]) -> bool:
+        """Check a combination against the compatibility rules"""
+        return all(
+            combination[rule.dimension] in rule.allowed
+            for rule in self.rules
+            if combination[rule.when_dimension] == rule.when_value
+        )
+
+    def decode_seed(self, seed: int, palette_preference: Optional[str] = None) -> Tuple[int, Dict[str, str]]:
+        """
+        Map a seed straight to a valid combination in O(1)
+
+        Returns:
+            Tuple of (packed code, combination dict)
+        """
+        start, count = 0, len(self.codes)
+        if palette_preference in self._palette_ranges:
+            start, count = self._palette_ranges[palette_preference]
+        code = self.codes[start + seed % count]
+        return code, self.unpack(code)
+
+# Shared index, built once per process
+variant_space = VariantSpace()
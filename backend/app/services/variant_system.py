@@ -5,7 +5,9 @@ Deterministic design variations with seeded randomness
 
 import hashlib
 from typing import Dict, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
+
+from app.services.variant_space import variant_space
 
 @dataclass
 class PalettePack:
@@ -81,7 +83,7 @@ class VariantSystem:
         )
     }
     
-    # Define pre-approved variant sets
+    # Curated variant sets - named looks inside the combinatorial variant space
     VARIANT_SETS = [
         VariantSet(
             name="Minimal Steel",
@@ -169,6 +171,8 @@ class VariantSystem:
         )
     ]
     
+    _CURATED_NAMES: Optional[Dict[int, str]] = None
+    
     @classmethod
     def generate_seed(cls, project_id: str, user_id: str = "", created_at: str = "") -> int:
         """Generate deterministic seed from project data"""
@@ -180,15 +184,29 @@ class VariantSystem:
     def select_variant(cls, seed: int, palette_preference: Optional[str] = None) -> VariantSet:
         """Select variant set based on seed and optional palette preference"""
         
-        if palette_preference:
-            # Try to find a variant that uses the preferred palette
+        # Decode the seed straight into the precomputed variant space
+        code, combination = variant_space.decode_seed(seed, palette_preference)
+        return VariantSet(name=cls._variant_name(code, combination), **combination)
+    
+    @classmethod
+    def _variant_name(cls, code: int, combination: Dict[str, str]) -> str:
+        """Curated name for known looks, generated name for the rest"""
+        curated = cls._curated_names()
+        if code in curated:
+            return curated[code]
+        return f"{cls.get_palette(combination['palette_pack']).name} {code:06x}"
+    
+    @classmethod
+    def _curated_names(cls) -> Dict[int, str]:
+        """Map packed codes of the curated variant sets to their names"""
+        if cls._CURATED_NAMES is None:
+            names = {}
             for variant in cls.VARIANT_SETS:
-                if variant.palette_pack == palette_preference:
-                    return variant
-        
-        # Default: deterministic selection based on seed
-        variant_index = seed % len(cls.VARIANT_SETS)
-        return cls.VARIANT_SETS[variant_index]
+                combination = asdict(variant)
+                del combination["name"]
+                names[variant_space.encode(combination)] = variant.name
+            cls._CURATED_NAMES = names
+        return cls._CURATED_NAMES
     
     @classmethod
     def get_palette(cls, palette_name: str) -> PalettePack:
@@ -239,8 +257,7 @@ class VariantSystem:
         new_seed = base_seed + increment
         
         # Select new variant
-        variant_index = new_seed % len(cls.VARIANT_SETS)
-        variant = cls.VARIANT_SETS[variant_index]
+        variant = cls.select_variant(new_seed)
         palette = cls.get_palette(variant.palette_pack)
         
         return {
@@ -0,0 +1,186 @@
+"""
+End-to-end endpoint load test against stubbed upstreams
+Starts a local HTMLCSStoImage stub and the app (in its own process, with a stubbed
+Gemini model), then drives each endpoint at a fixed concurrency
+
+Usage:
+    python benchmarks/bench_load.py [--requests 200] [--concurrency 16]
+                                    [--gemini-latency 0.05] [--hcti-latency 0.1]
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stubs import BENCH_SERVICE_TOKEN, HCTIStub
+
+BENCH_DIR = Path(__file__).resolve().parent
+
+BUSINESS_INFO = {
+    "name": "LedgerLite",
+    "type": "accounting software",
+    "description": "Cloud bookkeeping for small businesses with automated categorization",
+    "target_audience": "small business owners",
+}
+FEATURES = ["Automated bookkeeping", "Tax-ready reports", "Real-time dashboard"]
+COPY = {
+    "headline": "Streamline Your Books, Grow Your Business With Confidence",
+    "subheadline": "Professional accounting software designed for small business owners",
+    "bullets": [
+        {"title": "Automated Bookkeeping", "desc": "Import transactions and categorize expenses automatically"},
+        {"title": "Tax-Ready Reports", "desc": "Built-in compliance tools keep your books audit-ready"},
+        {"title": "Real-Time Insights", "desc": "Live dashboard shows cash flow and profit margins"},
+    ],
+    "cta": {"label": "Start Your Free Trial", "sub": "No credit card required"},
+}
+
+def _business_info(job_id: str) -> Dict[str, Any]:
+    """Business info unique to one request, so no stage can be answered from an earlier one"""
+    return {**BUSINESS_INFO, "description": f"{BUSINESS_INFO['description']} (ref {job_id})"}
+
+# name -> (path, body for request i with job id)
+SCENARIOS = {
+    "generate_copy": ("/api/ai/generate-copy", lambda i, job_id: {
+        "business_info": _business_info(job_id), "selected_features": FEATURES,
+    }),
+    "render": ("/api/render/generate", lambda i, job_id: {
+        "project_id": f"project_{i}", "job_id": job_id, "copy_data": COPY, "assets": {},
+    }),
+    "brochure": ("/api/brochure/generate", lambda i, job_id: {
+        "project_id": f"project_{i}", "job_id": job_id, "business_info": _business_info(job_id),
+        "selected_features": FEATURES,
+    }),
+}
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+async def _wait_ready(session: aiohttp.ClientSession, base_url: str, server: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Stubbed server exited:\n{server.stderr.read().decode()}")
+        try:
+            async with session.get(f"{base_url}/api/health") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("Stubbed server did not become ready")
+
+async def _drive(session: aiohttp.ClientSession, url: str, make_body, requests: int, concurrency: int) -> Dict[str, Any]:
+    """Send `requests` requests with `concurrency` in flight; collect latency and errors"""
+    # Fresh job ids every pass - repeated ids would be replayed by the idempotency store
+    job_prefix = uuid.uuid4().hex[:12]
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker(user: int) -> None:
+        nonlocal errors
+        # One simulated user per worker, identified the way Convex does it
+        headers = {"X-Service-Token": BENCH_SERVICE_TOKEN, "X-On-Behalf-Of": f"bench_user_{user}"}
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                async with session.post(url, json=make_body(i, f"job_{job_prefix}_{i}"), headers=headers) as response:
+                    body = await response.read()
+                    # success=false means a fallback was served - count it as an error
+                    if response.status != 200 or not json.loads(body).get("success", True):
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(user) for user in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2),
+    }
+
+async def run_load_async(requests: int = 200, concurrency: int = 16, gemini_latency: float = 0.05,
+                         hcti_latency: float = 0.1, scenarios: List[str] = None) -> Dict[str, Dict[str, Any]]:
+    hcti = HCTIStub(latency=hcti_latency)
+    hcti_api_base = await hcti.start()
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, str(BENCH_DIR / "serve_stubbed.py"), "--port", str(port),
+         "--hcti-api-base", hcti_api_base, "--gemini-latency", str(gemini_latency)],
+        cwd=BENCH_DIR.parent,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+
+    results = {}
+    try:
+        connector = aiohttp.TCPConnector(limit=concurrency * 2)
+        async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=120)) as session:
+            await _wait_ready(session, base_url, server)
+            for name in scenarios or list(SCENARIOS):
+                path, make_body = SCENARIOS[name]
+                # Warm connections and lazy state before measuring
+                await _drive(session, base_url + path, make_body, min(concurrency, requests), concurrency)
+                results[name] = await _drive(session, base_url + path, make_body, requests, concurrency)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        await hcti.stop()
+
+    return results
+
+def run_load(**kwargs) -> Dict[str, Dict[str, Any]]:
+    """Run the load scenarios; returns {scenario: {"throughput_rps", "p50_ms", ...}}"""
+    return asyncio.run(run_load_async(**kwargs))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--gemini-latency", type=float, default=0.05)
+    parser.add_argument("--hcti-latency", type=float, default=0.1)
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="Repeatable; default all")
+    args = parser.parse_args()
+
+    results = run_load(requests=args.requests, concurrency=args.concurrency, gemini_latency=args.gemini_latency,
+                       hcti_latency=args.hcti_latency, scenarios=args.scenario)
+    print(json.dumps({"benchmark": "load", "gemini_latency": args.gemini_latency,
+                      "hcti_latency": args.hcti_latency, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
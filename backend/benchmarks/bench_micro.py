@@ -0,0 +1,119 @@
+"""
+Micro-benchmarks for the copy and render hot paths
+Template render, CSS render, variant selection, industry lookup and JSON cleaning
+
+Usage:
+    python benchmarks/bench_micro.py [--iterations 2000] [--rounds 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+os.environ.setdefault("HTMLCSSTOIMAGE_USER_ID", "bench")
+os.environ.setdefault("HTMLCSSTOIMAGE_API_KEY", "bench")
+
+from app.models.content import BulletPoint, CallToAction, CopyData, RenderRequest
+from app.services.ai_service import AIService
+from app.services.industry_intelligence import IndustryIntelligence
+from app.services.render_service import RenderService
+from app.services.variant_system import VariantSystem
+from stubs import COPY_RESPONSE
+
+PROJECT_IDS = [f"project_{i:04d}" for i in range(1000)]
+
+# Mix of exact keys, aliases, free text and unknowns
+BUSINESS_TYPES = [
+    "dental", "Dental Clinic", "law firm", "saas", "software company", "restaurant",
+    "coffee shop", "real estate agency", "fitness studio", "plumbing services",
+    "accounting", "bakery and cafe", "marketing agency", "veterinary clinic",
+    "yoga", "home cleaning", "e-commerce store", "quantum basket weaving",
+]
+
+COPY = CopyData(
+    headline="Streamline Your Books, Grow Your Business With Confidence",
+    subheadline="Professional accounting software designed for small business owners",
+    bullets=[
+        BulletPoint(title="Automated Bookkeeping", desc="Import transactions and categorize expenses automatically"),
+        BulletPoint(title="Tax-Ready Reports", desc="Built-in compliance tools keep your books audit-ready"),
+        BulletPoint(title="Real-Time Insights", desc="Live dashboard shows cash flow and profit margins"),
+    ],
+    cta=CallToAction(label="Start Your Free Trial", sub="No credit card required"),
+)
+
+def _run_coroutine(coro):
+    """Drive a coroutine that never awaits anything"""
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("coroutine awaited unexpectedly")
+
+def _cycle(values):
+    """Callable returning the next value on each call"""
+    state = {"i": 0}
+    def next_value():
+        state["i"] = (state["i"] + 1) % len(values)
+        return values[state["i"]]
+    return next_value
+
+def build_cases() -> Dict[str, Callable[[], object]]:
+    render_service = RenderService()
+    ai_service = AIService.__new__(AIService)  # JSON cleaning needs no Gemini client
+    industry_intel = IndustryIntelligence()
+
+    next_project = _cycle(PROJECT_IDS)
+    next_type = _cycle(BUSINESS_TYPES)
+
+    css_template = render_service.jinja_env.get_template("dynamic_base.css")
+    variant_config = VariantSystem.generate_variant_config(project_id="bench")
+
+    def template_render():
+        request = RenderRequest.model_construct(
+            project_id=next_project(), job_id="bench", copy_data=COPY, assets={}, template="product_a"
+        )
+        return _run_coroutine(render_service._render_html_template(request))
+
+    return {
+        "template_render": template_render,
+        "css_render": lambda: css_template.render(variant=variant_config, palette=variant_config["palette"]),
+        "variant_selection": lambda: VariantSystem.generate_variant_config(project_id=next_project()),
+        "industry_lookup": lambda: industry_intel.get_industry_data(next_type()),
+        "json_cleaning": lambda: json.loads(ai_service._clean_json_response(COPY_RESPONSE)),
+    }
+
+def measure(fn: Callable[[], object], iterations: int, rounds: int) -> Dict[str, float]:
+    """Median and best wall-clock microseconds per call over several rounds"""
+    for _ in range(min(200, iterations)):
+        fn()
+    per_call = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        per_call.append((time.perf_counter() - start) / iterations * 1e6)
+    return {"us_per_op": round(statistics.median(per_call), 3), "us_per_op_min": round(min(per_call), 3)}
+
+def run_micro(iterations: int = 2000, rounds: int = 5) -> Dict[str, Dict[str, float]]:
+    """Run every micro-benchmark; returns {case: {"us_per_op", "us_per_op_min"}}"""
+    return {name: measure(fn, iterations, rounds) for name, fn in build_cases().items()}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(json.dumps({"benchmark": "micro", "iterations": args.iterations, "rounds": args.rounds,
+                      "results": run_micro(args.iterations, args.rounds)}, indent=2))
+
+if __name__ == "__main__":
+    main()
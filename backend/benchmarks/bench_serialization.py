@@ -0,0 +1,107 @@
+"""
+Serialization benchmark
+Per-request CPU for the copy response path: legacy (validate everything, re-validate
+the response model, jsonable_encoder + json) vs current (construct trusted models,
+validate once in stage 3, serialize once with pydantic-core)
+
+Usage:
+    python benchmarks/bench_serialization.py [--iterations 5000]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.responses import ORJSONResponse
+from app.models.content import BulletPoint, CallToAction, ContentResponse, CopyData
+from app.services.ai_service import AIService
+
+GEMINI_COPY = {
+    "headline": "Streamline Your Books, Grow Your Business With Confidence And Clarity Every Single Day Of The Year",
+    "subheadline": "Professional accounting software designed for small business owners who want growth",
+    "bullets": [
+        {"title": "Automated Bookkeeping", "desc": "Import transactions and categorize expenses automatically - saving 10+ hours per week"},
+        {"title": "Tax-Ready Reports", "desc": "Built-in compliance tools ensure your books are always audit-ready with one-click reporting"},
+        {"title": "Real-Time Insights", "desc": "Live dashboard shows cash flow and profit margins so you can make informed decisions"},
+    ],
+    "cta": {"label": "Start Your Free Trial", "sub": "No credit card required"},
+}
+
+ANALYSIS = {
+    "target_pain_points": ["manual processes", "time waste", "human errors"],
+    "unique_value_prop": "Automate your workflow in minutes, not months",
+    "emotional_drivers": ["efficiency", "growth", "peace_of_mind"],
+    "positioning_angle": "fastest implementation in the market",
+    "conversion_goal": "trial_signup",
+    "urgency_factors": ["competitive_advantage", "limited_time"],
+    "messaging_tone": "professional",
+    "key_differentiators": ["speed", "ease_of_use", "support"],
+}
+
+def legacy_path() -> bytes:
+    """Previous behavior: validated construction, field-by-field conform, double validation"""
+    copy_json = dict(GEMINI_COPY, headline=GEMINI_COPY["headline"][:90])
+    bullets = [BulletPoint(title=b["title"], desc=b["desc"]) for b in copy_json["bullets"]]
+    cta = CallToAction(label=copy_json["cta"]["label"], sub=copy_json["cta"].get("sub"))
+    copy_data = CopyData(headline=copy_json["headline"], subheadline=copy_json.get("subheadline"), bullets=bullets, cta=cta)
+    if len(copy_data.headline) > 90:
+        copy_data.headline = copy_data.headline[:87] + "..."
+    for bullet in copy_data.bullets:
+        if len(bullet.title) > 28:
+            bullet.title = bullet.title[:25] + "..."
+    response = ContentResponse(success=True, copy_data=copy_data, analysis=ANALYSIS, message="ok")
+    # FastAPI response_model handling: re-validate, encode, dump
+    validated = ContentResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+def current_path(service: AIService, run) -> bytes:
+    """Current behavior: trusted construction, single validation, single serialization"""
+    bullets = [BulletPoint.model_construct(title=b["title"], desc=b["desc"]) for b in GEMINI_COPY["bullets"]]
+    cta = CallToAction.model_construct(label=GEMINI_COPY["cta"]["label"], sub=GEMINI_COPY["cta"].get("sub"))
+    copy_data = CopyData.model_construct(headline=GEMINI_COPY["headline"], subheadline=GEMINI_COPY["subheadline"], bullets=bullets, cta=cta)
+    validated = run(service._validate_and_conform(copy_data))
+    response = ContentResponse.model_construct(success=True, copy_data=validated, analysis=ANALYSIS, message="ok")
+    return ORJSONResponse(response).body
+
+def measure(fn, iterations: int) -> float:
+    """CPU microseconds per call"""
+    for _ in range(min(200, iterations)):
+        fn()
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1e6
+
+def _run_coroutine(coro):
+    """Drive a coroutine that never awaits anything"""
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("coroutine awaited unexpectedly")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    service = AIService.__new__(AIService)  # conform stage needs no Gemini client
+    legacy_us = measure(legacy_path, args.iterations)
+    current_us = measure(lambda: current_path(service, _run_coroutine), args.iterations)
+
+    print(json.dumps({
+        "benchmark": "serialization",
+        "iterations": args.iterations,
+        "legacy_cpu_us": round(legacy_us, 2),
+        "current_cpu_us": round(current_us, 2),
+        "speedup": round(legacy_us / current_us, 2),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
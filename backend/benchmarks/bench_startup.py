@@ -0,0 +1,77 @@
+"""
+Startup benchmark
+Measures cold start of the app (imports + lifespan warm-up) in fresh interpreters
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--output startup.json]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Runs inside a fresh interpreter: import the app, run the lifespan startup, print the report
+CHILD = """
+import asyncio, contextlib, io, json, sys
+with contextlib.redirect_stdout(io.StringIO()):
+    import main
+    async def _start():
+        async with main.app.router.lifespan_context(main.app):
+            pass
+    asyncio.run(_start())
+from app.core.startup import startup_timer
+print(json.dumps(startup_timer.report()))
+"""
+
+def run_once() -> dict:
+    """Start one fresh interpreter and collect its startup report"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup failed:\n{result.stderr}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["wall_ms"] = round(wall_ms, 2)
+    return report
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    # First run warms the bytecode cache and is discarded
+    run_once()
+    reports = [run_once() for _ in range(args.runs)]
+
+    steps = {}
+    for report in reports:
+        for step in report["steps"]:
+            steps.setdefault(f"{step['kind']}:{step['name']}", []).append(step["ms"])
+
+    summary = {
+        "benchmark": "startup",
+        "runs": args.runs,
+        "wall_ms_median": round(statistics.median(r["wall_ms"] for r in reports), 2),
+        "startup_ms_median": round(statistics.median(r["total_ms"] for r in reports), 2),
+        "steps_ms_median": {name: round(statistics.median(values), 2) for name, values in steps.items()},
+    }
+
+    output = json.dumps(summary, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n")
+    print(output)
+
+if __name__ == "__main__":
+    main()
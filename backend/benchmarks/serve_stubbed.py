@@ -0,0 +1,58 @@
+"""
+Run the app against stubbed upstreams, fully offline
+
+Used by bench_load.py in a separate process so the load generator doesn't
+share the server's CPU. Auth, job callbacks and upstream health probes are
+turned off. The artifact and blob stores live in a temporary directory, so
+results from earlier runs are never replayed, and analysis reuse is off.
+
+Usage:
+    python benchmarks/serve_stubbed.py --port 8765 --hcti-api-base http://127.0.0.1:9000/v1
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import uvicorn
+
+from stubs import BENCH_SERVICE_TOKEN, install_stub_services
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--hcti-api-base", required=True)
+    parser.add_argument("--gemini-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    # Settings read these at import, so set them before the app is imported
+    state_dir = tempfile.mkdtemp(prefix="polario-bench-")
+    os.environ["ARTIFACT_STORE_PATH"] = os.path.join(state_dir, "artifacts.db")
+    os.environ["BLOB_STORE_DIR"] = os.path.join(state_dir, "blobs")
+    os.environ["BLOB_PUBLIC_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    # The load generator sends one X-On-Behalf-Of user per connection, like Convex
+    os.environ["SERVICE_TOKEN"] = BENCH_SERVICE_TOKEN
+
+    install_stub_services(args.gemini_latency, args.hcti_api_base)
+
+    import main as app_main
+    from app.core.config import settings
+    from app.services.health_prober import health_prober
+    from app.services.job_status import job_status
+
+    settings.CLERK_SECRET_KEY = settings.CLERK_JWT_ISSUER_DOMAIN = settings.CLERK_JWKS_URL = ""
+    settings.SERVER_MODE = "development"
+    # Every request must do its own work; stored analyses are never reused
+    settings.ARTIFACT_REUSE_ANALYSIS = False
+    health_prober.probes = []
+    job_status.sink = None
+
+    uvicorn.run(app_main.app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+if __name__ == "__main__":
+    main()
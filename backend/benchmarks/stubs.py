@@ -0,0 +1,150 @@
+"""
+Offline stand-ins for Gemini and HTMLCSStoImage with controlled latency
+"""
+
+import asyncio
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Sent by the load generator so admission limits apply per simulated user
+BENCH_SERVICE_TOKEN = "offline-benchmark"
+
+ANALYSIS_RESPONSE = json.dumps({
+    "target_pain_points": ["manual processes", "time waste", "human errors"],
+    "unique_value_prop": "Automate your workflow in minutes, not months",
+    "emotional_drivers": ["efficiency", "growth", "peace_of_mind"],
+    "positioning_angle": "fastest implementation in the market",
+    "conversion_goal": "trial_signup",
+    "urgency_factors": ["competitive_advantage"],
+    "messaging_tone": "professional",
+    "key_differentiators": ["speed", "ease_of_use", "support"],
+})
+
+# Fenced like real Gemini output so the JSON cleaning path runs
+COPY_RESPONSE = "```json\n" + json.dumps({
+    "headline": "Streamline Your Books, Grow Your Business With Confidence",
+    "subheadline": "Professional accounting software designed for small business owners",
+    "bullets": [
+        {"title": "Automated Bookkeeping", "desc": "Import transactions and categorize expenses automatically - saving 10+ hours per week"},
+        {"title": "Tax-Ready Reports", "desc": "Built-in compliance tools keep your books audit-ready with one-click reporting"},
+        {"title": "Real-Time Insights", "desc": "Live dashboard shows cash flow and profit margins so you can decide faster"},
+    ],
+    "cta": {"label": "Start Your Free Trial", "sub": "No credit card required"},
+}, indent=2) + "\n```"
+
+class StubGeminiModel:
+    """
+    Drop-in for genai.GenerativeModel returning canned analysis/copy JSON
+
+    `generate_content` blocks for `latency` seconds like the real SDK call;
+    `generate_content_async` sleeps without blocking the event loop.
+    """
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.calls = 0
+
+    def _respond(self, prompt: str) -> SimpleNamespace:
+        self.calls += 1
+        text = COPY_RESPONSE if "Based on this strategic analysis" in prompt else ANALYSIS_RESPONSE
+        return SimpleNamespace(text=text)
+
+    def generate_content(self, prompt: str, generation_config=None, **kwargs) -> SimpleNamespace:
+        time.sleep(self.latency)
+        return self._respond(prompt)
+
+    async def generate_content_async(self, prompt: str, generation_config=None, **kwargs) -> SimpleNamespace:
+        await asyncio.sleep(self.latency)
+        return self._respond(prompt)
+
+class HCTIStub:
+    """
+    Local HTMLCSStoImage
+
+    POST /v1/image answers with a URL after `latency` seconds; GET on that
+    URL serves `file_bytes` of content unique to the image, so the blob
+    store downloads and writes every render as it would in production.
+    """
+
+    def __init__(self, latency: float = 0.1, host: str = "127.0.0.1", port: int = 0, file_bytes: int = 64 * 1024):
+        self.latency = latency
+        self.file_bytes = file_bytes
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.downloads = 0
+        self._ids = itertools.count(1)
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _create_image(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        image_id = next(self._ids)
+        return web.json_response({"url": f"{self.api_base}/image/{image_id}.{body.get('format', 'png')}"})
+
+    async def _get_image(self, request: web.Request) -> web.Response:
+        image_id, _, ext = request.match_info["name"].partition(".")
+        if ext not in ("pdf", "png"):
+            raise web.HTTPNotFound()
+        self.downloads += 1
+        header = b"%PDF-1.4\n" if ext == "pdf" else b"\x89PNG\r\n\x1a\n"
+        body = header + f"stub image {image_id}\n".encode()
+        return web.Response(body=body.ljust(self.file_bytes, b"\0"),
+                            content_type="application/pdf" if ext == "pdf" else "image/png")
+
+    @property
+    def api_base(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self) -> str:
+        """Start serving; returns the API base URL"""
+        app = web.Application(client_max_size=32 * 1024 * 1024)
+        app.router.add_post("/v1/image", self._create_image)
+        app.router.add_get("/v1/image/{name}", self._get_image)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.api_base
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+def install_stub_services(gemini_latency: float, hcti_api_base: str) -> StubGeminiModel:
+    """
+    Register AI and render services wired to the stubs
+
+    Must run before the services are first built (i.e. before app startup).
+    """
+    import os
+    os.environ["HTMLCSSTOIMAGE_USER_ID"] = "bench"
+    os.environ["HTMLCSSTOIMAGE_API_KEY"] = "bench"
+    os.environ["HTMLCSSTOIMAGE_API_BASE"] = hcti_api_base
+
+    from app.core.config import settings
+    from app.services.registry import services
+
+    settings.GOOGLE_AI_API_KEY = settings.GOOGLE_AI_API_KEY or "offline-benchmark"
+    model = StubGeminiModel(gemini_latency)
+
+    def ai_service():
+        from app.services.ai_service import AIService
+        service = AIService()
+        service.model = model
+        return service
+
+    services.register("ai", ai_service)
+    return model
@@ -0,0 +1,148 @@
+"""
+Benchmark suite: run micro and load benchmarks into a results file, compare against a baseline
+
+Everything runs offline against stubbed Gemini and HTMLCSStoImage backends.
+
+Usage:
+    python benchmarks/suite.py run [--output results.json] [--quick]
+    python benchmarks/suite.py compare benchmarks/baseline.json results.json [--threshold 0.15]
+
+`compare` exits with status 1 when any metric regressed by more than the threshold,
+and with status 2 when the two runs used different configs.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+FORMAT_VERSION = 2
+
+# Metric name suffix -> True when higher is better
+DIRECTIONS = {
+    "us_per_op": False,
+    "throughput_rps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+}
+
+PROFILES = {
+    "full": {"iterations": 2000, "rounds": 5, "requests": 200, "concurrency": 16},
+    "quick": {"iterations": 300, "rounds": 3, "requests": 40, "concurrency": 8},
+}
+
+def run_suite(profile: str, gemini_latency: float, hcti_latency: float) -> Dict[str, Any]:
+    from bench_load import run_load
+    from bench_micro import run_micro
+
+    options = PROFILES[profile]
+    micro = run_micro(options["iterations"], options["rounds"])
+    load = run_load(requests=options["requests"], concurrency=options["concurrency"],
+                    gemini_latency=gemini_latency, hcti_latency=hcti_latency)
+
+    metrics: Dict[str, float] = {}
+    for name, result in micro.items():
+        metrics[f"micro.{name}.us_per_op"] = result["us_per_op"]
+    for name, result in load.items():
+        for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "errors"):
+            metrics[f"load.{name}.{key}"] = result[key]
+
+    return {
+        "format_version": FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "config": {"profile": profile, "gemini_latency": gemini_latency, "hcti_latency": hcti_latency, **options},
+        "metrics": metrics,
+        "details": {"micro": micro, "load": load},
+    }
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> Tuple[List[str], List[str]]:
+    """
+    Compare two result files metric by metric
+
+    Returns:
+        (report lines, regressed metric names)
+    """
+    lines, regressions = [], []
+    if baseline.get("environment") != current.get("environment"):
+        lines.append("⚠️  Environment differs from the baseline; expect noise")
+
+    base_metrics, cur_metrics = baseline["metrics"], current["metrics"]
+    for name in sorted(set(base_metrics) | set(cur_metrics)):
+        if name not in base_metrics or name not in cur_metrics:
+            lines.append(f"   {name:<40} {'only in ' + ('current' if name in cur_metrics else 'baseline')}")
+            continue
+        before, after = base_metrics[name], cur_metrics[name]
+        suffix = name.rsplit(".", 1)[-1]
+
+        if suffix == "errors":
+            regressed = after > before
+            lines.append(f"{'❌' if regressed else '  '} {name:<40} {before:>10} -> {after:<10}")
+            if regressed:
+                regressions.append(name)
+            continue
+
+        change = (after - before) / before if before else 0.0
+        worse = -change if DIRECTIONS[suffix] else change
+        regressed = worse > threshold
+        marker = "❌" if regressed else ("✅" if worse < -threshold else "  ")
+        lines.append(f"{marker} {name:<40} {before:>10.2f} -> {after:<10.2f} {change:+.1%}")
+        if regressed:
+            regressions.append(name)
+
+    return lines, regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the suite and write a results file")
+    run.add_argument("--output", type=Path, default=None)
+    run.add_argument("--quick", action="store_true", help="Fewer iterations and requests")
+    run.add_argument("--gemini-latency", type=float, default=0.05)
+    run.add_argument("--hcti-latency", type=float, default=0.1)
+
+    cmp = commands.add_parser("compare", help="Compare a results file against a baseline")
+    cmp.add_argument("baseline", type=Path)
+    cmp.add_argument("current", type=Path)
+    cmp.add_argument("--threshold", type=float, default=0.15, help="Allowed relative slowdown (default 15%%)")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run_suite("quick" if args.quick else "full", args.gemini_latency, args.hcti_latency)
+        output = json.dumps(results, indent=2)
+        if args.output:
+            args.output.write_text(output + "\n")
+        print(output)
+        return
+
+    baseline, current = json.loads(args.baseline.read_text()), json.loads(args.current.read_text())
+    # Numbers from different configs aren't comparable - refuse rather than report noise
+    if baseline.get("format_version") != current.get("format_version") or baseline.get("config") != current.get("config"):
+        print(f"❌ Runs are not comparable: baseline v{baseline.get('format_version')} {baseline.get('config')} "
+              f"vs current v{current.get('format_version')} {current.get('config')}")
+        print("   Rerun with the baseline's settings, or regenerate the baseline")
+        sys.exit(2)
+
+    lines, regressions = compare(baseline, current, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
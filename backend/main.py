@@ -5,15 +5,47 @@ Enhanced AI-powered brochure generation service
 
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from contextlib import asynccontextmanager
 import uvicorn
 import os
 from dotenv import load_dotenv
 
-from app.api import ai, render, health
-from app.core.config import settings
-from app.core.auth import verify_clerk_token
+from app.core.startup import startup_timer
+
+with startup_timer.measure("import", "app.core"):
+    from app.core.config import settings
+    from app.core.auth import configure_signing_keys
+    from app.core.lifecycle import inflight_renders, resolve_worker_count, stagger_startup
+    from app.core.responses import ORJSONResponse
+    from app.core.profiling import ProfilingMiddleware, profiling_enabled
+    from app.core.tracing import TracingMiddleware, tracer
+    from app.core.admission import AdmissionMiddleware
+    from app.core.scheduler import PriorityLaneMiddleware
+    from app.core.cancellation import CancelOnDisconnectMiddleware, job_registry
+    from app.core.deadline import DeadlineMiddleware
+    from app.core.shared_state import shared_state
+with startup_timer.measure("import", "app.api.health"):
+    from app.api import health
+with startup_timer.measure("import", "app.api.ai"):
+    from app.api import ai
+with startup_timer.measure("import", "app.api.render"):
+    from app.api import render
+with startup_timer.measure("import", "app.api.brochure"):
+    from app.api import brochure
+with startup_timer.measure("import", "app.api.blobs"):
+    from app.api import blobs
+with startup_timer.measure("import", "app.api.jobs"):
+    from app.api import jobs
+with startup_timer.measure("import", "app.api.admin"):
+    from app.api import admin
+with startup_timer.measure("import", "app.services.registry"):
+    from app.services.registry import services
+    from app.services.industry_kb import get_knowledge_base
+    from app.services.health_prober import health_prober
+    from app.services.job_status import job_status
+    from app.services.prewarm import prewarm_store
+    from app.services.artifact_store import artifact_store
+    from app.services.blob_store import blob_store
 
 load_dotenv()
 
@@ -21,21 +53,89 @@ load_dotenv()
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
-    print("🚀 Polario Backend starting up...")
+    print(f"🚀 Polario Backend starting up (pid {os.getpid()}, {settings.SERVER_MODE} mode)...")
+    
+    # Spread worker warm-up so upstreams aren't hit by every worker at once
+    delay = await stagger_startup()
+    if delay:
+        print(f"⏳ Staggered warm-up by {delay:.2f}s")
+    
+    # Warm shared state
+    with startup_timer.measure("init", "industry_kb"):
+        get_knowledge_base()
+    if settings.CLERK_SECRET_KEY or settings.CLERK_JWT_ISSUER_DOMAIN or settings.CLERK_JWKS_URL:
+        # A missing issuer/JWKS URL stops startup; an unreachable JWKS endpoint only warns
+        signing_keys = configure_signing_keys()
+        try:
+            with startup_timer.measure("init", "clerk_signing_keys"):
+                await signing_keys.prefetch()
+        except Exception as e:
+            print(f"⚠️  Clerk signing keys not prefetched: {e}")
+    
+    if settings.RENDER_TIMEOUT <= settings.DEADLINE_PREVIEW_BELOW:
+        print(f"⚠️  RENDER_TIMEOUT ({settings.RENDER_TIMEOUT}s) is not above DEADLINE_PREVIEW_BELOW "
+              f"({settings.DEADLINE_PREVIEW_BELOW}s) - full renders with the default deadline all return previews")
+    
+    if settings.ADMISSION_ENABLED and settings.SERVER_MODE == "production" and not settings.SERVICE_TOKEN:
+        print("⚠️  SERVICE_TOKEN not set - Convex requests all share one per-user admission limit")
+    
+    # Build services; each one can fail on its own and report degraded
+    for name, state in services.warm_up().items():
+        print(f"{'✅' if state == 'ready' else '⚠️ '} Service '{name}': {state}")
+    
+    # Probe upstreams in the background; health endpoints read the cached results
+    health_prober.start()
+    
+    # Coalesced job progress callbacks to Convex
+    job_status.start()
+    
+    # State every worker has to see (job owners, cancellations), then watch for cancels
+    with startup_timer.measure("init", "shared_state"):
+        await shared_state.start()
+    if settings.CANCELLATION_ENABLED:
+        job_registry.start()
+    
+    # Local pipeline state, written in batches in the background
+    if settings.ARTIFACT_STORE_ENABLED:
+        with startup_timer.measure("init", "artifact_store"):
+            await artifact_store.start()
+    
+    # Rendered files; without a public URL the HTMLCSStoImage URLs are returned instead
+    if settings.BLOB_STORE_ENABLED:
+        if blob_store.enabled:
+            blob_store.start()
+        else:
+            print("⚠️  BLOB_PUBLIC_BASE_URL not set - returning HTMLCSStoImage URLs, blob store unused")
+    
+    # Expire abandoned speculative analyses
+    prewarm_store.start_sweeper()
     
-    # HTMLCSStoImage service ready
-    print("✅ HTMLCSStoImage render service ready")
+    # Export finished spans in the background
+    tracer.start()
+    
+    startup_timer.mark_ready()
+    print(f"⏱️  Startup took {startup_timer.report()['total_ms']:.0f} ms\n{startup_timer.summary()}")
     
     yield
     
-    # Shutdown
-    print("👋 Polario Backend shutting down...")
+    # Shutdown - uvicorn has stopped accepting requests; let in-flight renders finish
+    print(f"👋 Polario Backend shutting down ({inflight_renders.active} renders in flight)...")
+    await health_prober.stop()
+    await prewarm_store.stop()
+    if not await inflight_renders.drain(settings.GRACEFUL_SHUTDOWN_TIMEOUT):
+        print(f"⚠️  Shutdown timeout with {inflight_renders.active} renders still in flight")
+    await job_registry.stop()
+    await job_status.stop()
+    await artifact_store.stop()
+    await blob_store.close()
+    await tracer.stop()
 
 app = FastAPI(
     title="Polario API",
     description="Enhanced AI-powered brochure generation service",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware - Allow all origins for local development
@@ -47,13 +147,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Security
-security = HTTPBearer(auto_error=False)
+# Cancel the handler when its client disconnects; innermost, so admission
+# and tracing see the cancelled request finish and release their slots
+if settings.CANCELLATION_ENABLED:
+    app.add_middleware(CancelOnDisconnectMiddleware)
+
+# Tag requests with their priority lane for upstream scheduling
+app.add_middleware(PriorityLaneMiddleware)
+
+# Admission control - sheds excess load before it reaches the pipeline
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
+
+# Deadline budget - starts before admission so queueing time counts against it
+app.add_middleware(DeadlineMiddleware)
+
+# Tracing - only installed with an exporter configured
+if tracer.enabled:
+    app.add_middleware(TracingMiddleware)
+
+# Request profiling - only installed when configured, so it costs nothing otherwise
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
 
 # Routes
 app.include_router(health.router, prefix="/api", tags=["health"])
 app.include_router(ai.router, prefix="/api/ai", tags=["ai"])
 app.include_router(render.router, prefix="/api/render", tags=["render"])
+app.include_router(brochure.router, prefix="/api/brochure", tags=["brochure"])
+app.include_router(blobs.router, prefix="/api/blobs", tags=["blobs"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 @app.get("/")
 async def root():
@@ -65,11 +189,38 @@ async def root():
         "docs": "/docs"
     }
 
+def _server_options() -> dict:
+    """uvicorn options for the configured server mode"""
+    
+    if settings.SERVER_MODE != "production":
+        # Single dev worker with auto-reload
+        return {"host": settings.HOST, "port": settings.PORT, "reload": True, "log_level": "info"}
+    
+    loop, http = settings.LOOP, settings.HTTP
+    try:
+        import uvloop  # noqa: F401
+    except ImportError:
+        if loop == "uvloop":
+            loop = "auto"
+    try:
+        import httptools  # noqa: F401
+    except ImportError:
+        if http == "httptools":
+            http = "auto"
+    
+    return {
+        "host": settings.HOST,
+        "port": settings.PORT,
+        "workers": resolve_worker_count(),
+        "loop": loop,
+        "http": http,
+        "timeout_keep_alive": settings.KEEPALIVE_TIMEOUT,
+        "backlog": settings.BACKLOG,
+        "timeout_graceful_shutdown": settings.GRACEFUL_SHUTDOWN_TIMEOUT,
+        "proxy_headers": True,
+        "access_log": False,
+        "log_level": "info",
+    }
+
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
+    uvicorn.run("main:app", **_server_options())
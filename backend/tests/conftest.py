@@ -0,0 +1,57 @@
+"""
+Shared fixtures for backend tests
+Tests run offline; upstream calls are replaced with stubs per test
+"""
+
+import asyncio
+import json
+import sys
+
+import pytest
+
+from app.core import shared_state as shared_state_module
+from app.core.shared_state import SharedState
+from app.services.ai_service import AIService
+from app.services.industry_intelligence import IndustryIntelligence
+
+def copy_json(headline: str = "Grow faster", bullet_title: str = "Fast setup") -> dict:
+    """Model output for one copy candidate"""
+    return {
+        "headline": headline,
+        "subheadline": "Less admin, more customers",
+        "bullets": [{"title": bullet_title, "desc": "Live in a day"} for _ in range(3)],
+        "cta": {"label": "Start now", "sub": "Free for 14 days"},
+    }
+
+class StubModel:
+    """Answers analysis and copy prompts with canned JSON and records the prompts"""
+
+    def __init__(self, candidates=None, analysis=None):
+        self.candidates = candidates or [copy_json()]
+        self.analysis = analysis or {"messaging_tone": "professional", "unique_value_prop": "Fast"}
+        self.prompts = []
+
+    async def __call__(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        if "Based on this strategic analysis" in prompt:
+            return json.dumps({"candidates": self.candidates})
+        return json.dumps(self.analysis)
+
+@pytest.fixture
+def ai_service():
+    """AIService without the Gemini client; set `_call_gemini` per test"""
+    service = AIService.__new__(AIService)
+    service.industry_intel = IndustryIntelligence()
+    service._call_gemini = StubModel()
+    return service
+
+@pytest.fixture
+def shared_db(tmp_path, monkeypatch):
+    """A file-backed SharedState in place of the module-level one, as workers share it"""
+    state = SharedState(str(tmp_path / "shared.db"))
+    asyncio.run(state.start())
+    original = shared_state_module.shared_state
+    for module in list(sys.modules.values()):
+        if getattr(module, "shared_state", None) is original:
+            monkeypatch.setattr(module, "shared_state", state)
+    return state
@@ -0,0 +1,84 @@
+"""
+Local stand-in for Clerk's JWKS endpoint, for auth tests
+"""
+
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+class LocalKeyServer:
+    """
+    Local stand-in for Clerk's JWKS endpoint
+
+    Generates RSA keys, serves them at /.well-known/jwks.json and issues
+    tokens signed with the current key.
+    """
+
+    def __init__(self, issuer: str = "http://127.0.0.1", host: str = "127.0.0.1", port: int = 0):
+        self.issuer = issuer
+        self.host = host
+        self.port = port
+        self._keys: Dict[str, Any] = {}
+        self.current_kid = ""
+        self.fetch_count = 0
+        self._runner: Optional[web.AppRunner] = None
+        self.rotate()
+
+    def rotate(self) -> str:
+        """Add a new signing key and make it current; old keys stay published"""
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        pem = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+
+        kid = uuid.uuid4().hex
+        self._keys[kid] = pem
+        self.current_kid = kid
+        return kid
+
+    def jwks(self) -> Dict[str, Any]:
+        """Public keys as a JWKS document"""
+        keys = []
+        for kid, pem in self._keys.items():
+            public = jwk.construct(pem, "RS256").public_key().to_dict()
+            public.update({"kid": kid, "use": "sig"})
+            keys.append(public)
+        return {"keys": keys}
+
+    def issue_token(self, sub: str = "user_test", expires_in: int = 300, **claims: Any) -> str:
+        """Sign a token with the current key"""
+        now = int(time.time())
+        payload = {"sub": sub, "iss": self.issuer, "iat": now, "exp": now + expires_in, **claims}
+        return jwt.encode(payload, self._keys[self.current_kid], algorithm="RS256", headers={"kid": self.current_kid})
+
+    async def _handle_jwks(self, request: web.Request) -> web.Response:
+        self.fetch_count += 1
+        return web.json_response(self.jwks())
+
+    @property
+    def jwks_url(self) -> str:
+        return f"http://{self.host}:{self.port}/.well-known/jwks.json"
+
+    async def start(self) -> str:
+        """Start serving; returns the JWKS URL"""
+        app = web.Application()
+        app.router.add_get("/.well-known/jwks.json", self._handle_jwks)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Resolve the ephemeral port when started with port=0
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.jwks_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from app.core.admission import AdmissionController, AdmissionRejected
+
+def test_user_over_limit_queues_then_is_shed():
+    controller = AdmissionController(max_inflight=8, max_inflight_per_user=1, queue_size_per_user=1)
+
+    async def scenario():
+        await controller.acquire("alice")
+        queued = asyncio.create_task(controller.acquire("alice"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as shed:
+            await controller.acquire("alice")
+        other = await controller.acquire("bob")  # other users are not held back
+        controller.release("alice", 0.1)
+        await queued
+        return shed.value.status_code, other
+
+    status, bob_wait = asyncio.run(scenario())
+    assert status == 429
+    assert bob_wait == 0.0
+    assert controller.inflight == 2
+
+def test_full_global_queue_returns_503():
+    controller = AdmissionController(max_inflight=1, queue_size=1)
+
+    async def scenario():
+        await controller.acquire("alice")
+        queued = asyncio.create_task(controller.acquire("bob"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as shed:
+            await controller.acquire("carol")
+        queued.cancel()
+        return shed.value
+
+    shed = asyncio.run(scenario())
+    assert shed.status_code == 503
+    assert shed.retry_after >= 1
+
+def test_queue_timeout_returns_503_and_frees_the_queue():
+    controller = AdmissionController(max_inflight=1, queue_timeout=0.01)
+
+    async def scenario():
+        await controller.acquire("alice")
+        with pytest.raises(AdmissionRejected) as shed:
+            await controller.acquire("bob")
+        return shed.value.status_code
+
+    assert asyncio.run(scenario()) == 503
+    assert controller.metrics()["queue_depth"] == 0
+    assert controller.stats["timed_out"] == 1
@@ -0,0 +1,84 @@
+import asyncio
+
+from app.models.content import ContentRequest, CopyData
+
+from tests.conftest import StubModel, copy_json
+
+def _request(**fields) -> ContentRequest:
+    return ContentRequest(
+        business_info={"name": "Acme Dental", "type": "dental clinic", "description": "Family dentistry"},
+        selected_features=["Same-day appointments"],
+        **fields,
+    )
+
+def test_candidates_best_first_as_alternatives(ai_service):
+    ai_service._call_gemini = StubModel([copy_json("Short"), copy_json("x" * 120)])
+
+    response = asyncio.run(ai_service.generate_content(_request(candidates=2)))
+
+    assert response.success
+    assert response.copy_data.headline == "Short"
+    assert [alt.headline for alt in response.alternatives] == ["x" * 87 + "..."]
+
+def test_invalid_candidate_is_dropped(ai_service):
+    broken = dict(copy_json("Broken"), bullets=[{"title": None, "desc": "d"}] * 3)
+    ai_service._call_gemini = StubModel([copy_json("Valid"), broken])
+
+    response = asyncio.run(ai_service.generate_content(_request(candidates=2)))
+
+    assert response.success
+    assert response.copy_data.headline == "Valid"
+    assert response.alternatives is None
+
+def test_falls_back_when_no_candidate_survives(ai_service):
+    broken = dict(copy_json(), bullets=[{"title": None, "desc": "d"}] * 3)
+    ai_service._call_gemini = StubModel([broken, broken])
+
+    response = asyncio.run(ai_service.generate_content(_request(candidates=2)))
+
+    assert not response.success
+    assert isinstance(response.copy_data, CopyData)
+
+def test_locales_with_several_candidates(ai_service):
+    ai_service._call_gemini = StubModel([copy_json("First"), copy_json("Second")])
+
+    response = asyncio.run(ai_service.generate_content(_request(candidates=2, locales=["de-DE", "fr"])))
+
+    assert response.success
+    assert isinstance(response.copy_data, CopyData)
+    assert response.copy_data is response.localized_copy["de-DE"]
+    assert set(response.localized_copy) == {"de-DE", "fr"}
+    assert [alt.headline for alt in response.alternatives] == ["Second"]
+    # Serializes as an object, not a list of candidates
+    assert response.model_dump(mode="json")["copy_data"]["headline"] == "First"
+
+class FailingLocaleModel(StubModel):
+    """Copy prompts for the given languages come back unusable"""
+
+    def __init__(self, *languages):
+        super().__init__()
+        self.languages = languages
+
+    async def __call__(self, prompt: str) -> str:
+        if "Based on this strategic analysis" in prompt and any(language in prompt for language in self.languages):
+            return "not json"
+        return await super().__call__(prompt)
+
+def test_failed_locale_is_reported_not_filled_with_defaults(ai_service):
+    ai_service._call_gemini = FailingLocaleModel("German")
+
+    response = asyncio.run(ai_service.generate_content(_request(locales=["de-DE", "fr"])))
+
+    assert response.success
+    assert set(response.localized_copy) == {"fr"}
+    assert response.failed_locales == ["de-DE"]
+    assert response.copy_data is response.localized_copy["fr"]
+    assert "de-DE" in response.message
+
+def test_falls_back_when_every_locale_fails(ai_service):
+    ai_service._call_gemini = FailingLocaleModel("German", "French")
+
+    response = asyncio.run(ai_service.generate_content(_request(locales=["de-DE", "fr"])))
+
+    assert not response.success
+    assert response.localized_copy is None
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.models.content import ContentRequest
+from app.services import ai_service as ai_service_module
+from app.services.artifact_store import ArtifactStore
+from app.services.prewarm import analysis_fingerprint
+
+from tests.conftest import StubModel
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ArtifactStore(str(tmp_path / "artifacts.db"))
+    monkeypatch.setattr(ai_service_module, "artifact_store", store)
+    return store
+
+def _request(project_id: str) -> ContentRequest:
+    return ContentRequest(
+        business_info={"name": "Acme", "type": "bakery", "description": "Bread"},
+        selected_features=["Fresh daily"],
+        project_id=project_id,
+    )
+
+def _analysis_calls(model: StubModel) -> int:
+    return sum("Based on this strategic analysis" not in prompt for prompt in model.prompts)
+
+def test_put_find_roundtrip(store):
+    async def scenario():
+        await store.start()
+        store.put("copy", {"headline": "A"}, project_id="p1", job_id="j1")
+        pending = await store.latest("copy", job_id="j1")
+        await store.flush()
+        written = await store.find("copy", project_id="p1")
+        await store.stop()
+        return pending, written
+
+    pending, written = asyncio.run(scenario())
+    assert pending == {"headline": "A"}
+    assert [entry["payload"] for entry in written] == [{"headline": "A"}]
+
+def test_analysis_reuse_is_off_by_default():
+    assert settings.ARTIFACT_REUSE_ANALYSIS is False
+
+def test_analysis_reused_only_within_the_project(store, ai_service, monkeypatch):
+    monkeypatch.setattr(settings, "ARTIFACT_REUSE_ANALYSIS", True)
+    model = ai_service._call_gemini = StubModel()
+
+    async def scenario():
+        await store.start()
+        request = _request("p1")
+        store.put("analysis", {"messaging_tone": "bold"}, project_id="p1", content_hash=analysis_fingerprint(request))
+        await ai_service.generate_content(request)
+        same_project = _analysis_calls(model)
+        await ai_service.generate_content(_request("p2"))
+        other_project = _analysis_calls(model) - same_project
+        await store.stop()
+        return same_project, other_project
+
+    assert asyncio.run(scenario()) == (0, 1)
@@ -0,0 +1,164 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core import auth
+from app.core.auth import VerifiedTokenCache, configure_signing_keys, verify_clerk_token
+from app.core.config import settings
+from app.core.jwks import SigningKeyCache, SigningKeyError, UnknownSigningKeyError
+
+from tests.key_server import LocalKeyServer
+
+def _bearer(token: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+def with_key_server(scenario):
+    """Run `scenario(server)` against a started LocalKeyServer"""
+    async def run():
+        server = LocalKeyServer()
+        await server.start()
+        try:
+            return await scenario(server)
+        finally:
+            await server.stop()
+    return asyncio.run(run())
+
+# VerifiedTokenCache
+
+def test_token_cache_drops_expired_entries():
+    cache = VerifiedTokenCache()
+    cache.put(b"live", {"sub": "a"}, time.time() + 60)
+    cache.put(b"dead", {"sub": "b"}, time.time() - 1)
+
+    assert cache.get(b"live") == {"sub": "a"}
+    assert cache.get(b"dead") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_token_cache_evicts_least_recently_used():
+    cache = VerifiedTokenCache(max_size=2)
+    expires_at = time.time() + 60
+    cache.put(b"a", {"sub": "a"}, expires_at)
+    cache.put(b"b", {"sub": "b"}, expires_at)
+    cache.get(b"a")
+    cache.put(b"c", {"sub": "c"}, expires_at)
+
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") is not None and cache.get(b"c") is not None
+
+# SigningKeyCache
+
+def test_keys_are_fetched_once_while_fresh():
+    async def scenario(server):
+        keys = SigningKeyCache(server.jwks_url)
+        for _ in range(3):
+            await keys.get_key(server.current_kid)
+        return server.fetch_count
+
+    assert with_key_server(scenario) == 1
+
+def test_keys_are_refetched_after_max_age():
+    async def scenario(server):
+        keys = SigningKeyCache(server.jwks_url, max_age=0.0)
+        await keys.get_key(server.current_kid)
+        await keys.get_key(server.current_kid)
+        return server.fetch_count
+
+    assert with_key_server(scenario) == 2
+
+def test_rotated_key_is_picked_up():
+    async def scenario(server):
+        keys = SigningKeyCache(server.jwks_url, min_refresh_interval=0.0)
+        await keys.get_key(server.current_kid)
+        rotated = server.rotate()
+        return await keys.get_key(rotated), rotated, server.fetch_count
+
+    key, rotated, fetches = with_key_server(scenario)
+    assert key["kid"] == rotated
+    assert fetches == 2
+
+def test_unknown_kid_refetches_are_rate_limited():
+    async def scenario(server):
+        keys = SigningKeyCache(server.jwks_url, min_refresh_interval=0.0, missing_kid_ttl=60.0)
+        await keys.prefetch()
+        for _ in range(3):
+            with pytest.raises(UnknownSigningKeyError):
+                await keys.get_key("bogus")
+        return server.fetch_count
+
+    assert with_key_server(scenario) == 2  # prefetch, then one refetch for the unknown kid
+
+def test_cached_key_survives_key_server_outage():
+    async def scenario(server):
+        keys = SigningKeyCache(server.jwks_url, max_age=0.0)
+        kid = server.current_kid
+        await keys.get_key(kid)
+        await server.stop()
+        return await keys.get_key(kid), kid
+
+    key, kid = with_key_server(scenario)
+    assert key["kid"] == kid
+
+def test_unreachable_key_server_raises():
+    async def scenario():
+        with pytest.raises(SigningKeyError):
+            await SigningKeyCache("http://127.0.0.1:1/.well-known/jwks.json").prefetch()
+
+    asyncio.run(scenario())
+
+# verify_clerk_token
+
+@pytest.fixture
+def clerk(monkeypatch):
+    """Point token verification at a fresh key server; yields a function that runs a scenario"""
+    monkeypatch.setattr(settings, "CLERK_SECRET_KEY", "")
+    monkeypatch.setattr(settings, "CLERK_JWKS_URL", "")
+    monkeypatch.setattr(auth, "_signing_keys", None)
+
+    def run(scenario, issuer="http://127.0.0.1"):
+        async def configured(server):
+            monkeypatch.setattr(settings, "CLERK_JWT_ISSUER_DOMAIN", issuer)
+            configure_signing_keys(server.jwks_url)
+            return await scenario(server)
+        return with_key_server(configured)
+
+    yield run
+    auth.token_cache.clear()
+
+def test_valid_token_is_verified_and_cached(clerk):
+    async def scenario(server):
+        token = server.issue_token(sub="user_1")
+        first = await verify_clerk_token(_bearer(token))
+        second = await verify_clerk_token(_bearer(token))
+        return first, second
+
+    first, second = clerk(scenario)
+    assert first["sub"] == "user_1"
+    assert second is first  # served from the token cache
+
+def test_issuer_mismatch_is_rejected(clerk):
+    async def scenario(server):
+        with pytest.raises(HTTPException) as rejected:
+            await verify_clerk_token(_bearer(server.issue_token(iss="https://attacker.example")))
+        return rejected.value.status_code
+
+    assert clerk(scenario) == 401
+
+def test_expired_token_is_rejected(clerk):
+    async def scenario(server):
+        with pytest.raises(HTTPException) as rejected:
+            await verify_clerk_token(_bearer(server.issue_token(expires_in=-60)))
+        return rejected.value.detail
+
+    assert clerk(scenario) == "Token has expired"
+
+def test_token_signed_with_rotated_key_is_accepted(clerk):
+    async def scenario(server):
+        await verify_clerk_token(_bearer(server.issue_token(sub="before")))
+        server.rotate()
+        auth._signing_keys.min_refresh_interval = 0.0
+        return await verify_clerk_token(_bearer(server.issue_token(sub="after")))
+
+    assert clerk(scenario)["sub"] == "after"
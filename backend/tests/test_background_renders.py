@@ -0,0 +1,84 @@
+import asyncio
+
+from app.core.config import settings
+from app.models.content import RenderRequest, RenderResponse
+from app.services import render_service as render_service_module
+from app.services.background_renders import BackgroundRenders
+from app.services.render_service import RenderService
+
+from tests.conftest import copy_json
+
+def test_render_status_is_visible_to_other_workers(shared_db):
+    running, polled = BackgroundRenders(), BackgroundRenders()
+    release = asyncio.Event()
+
+    async def render():
+        await release.wait()
+        return RenderResponse(success=True, message="ok", pdf_url="https://files/a.pdf")
+
+    async def scenario():
+        await running.start("job_1", render)
+        pending = await polled.get("job_1")
+        release.set()
+        await asyncio.sleep(0.05)
+        return pending, await polled.get("job_1")
+
+    pending, done = asyncio.run(scenario())
+    assert pending["status"] == "pending"
+    assert done["status"] == "ready" and done["pdf_url"] == "https://files/a.pdf"
+
+def test_running_render_is_not_started_twice(shared_db):
+    first, second = BackgroundRenders(), BackgroundRenders()
+    calls = []
+
+    async def render():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return RenderResponse(success=True, message="ok", pdf_url="https://files/a.pdf")
+
+    async def scenario():
+        await first.start("job_2", render)
+        await asyncio.sleep(0)
+        state = await second.start("job_2", render)
+        await asyncio.sleep(0.05)
+        return state
+
+    assert asyncio.run(scenario())["status"] == "pending"
+    assert len(calls) == 1
+
+def test_unknown_job_has_no_status(shared_db):
+    assert asyncio.run(BackgroundRenders().get("nope")) is None
+
+def test_print_render_never_falls_back_to_a_preview(shared_db, monkeypatch):
+    # A render budget below the preview threshold must still produce the PDF
+    monkeypatch.setattr(settings, "RENDER_TIMEOUT", 5)
+    monkeypatch.setattr(settings, "BLOB_STORE_ENABLED", False)
+    renders = BackgroundRenders()
+    monkeypatch.setattr(render_service_module, "background_renders", renders)
+
+    service = RenderService.__new__(RenderService)
+    calls = []
+
+    async def html(request, preview=False):
+        return "<html></html>"
+
+    async def png(html_content, **options):
+        calls.append("preview" if options else "png")
+        return "https://files/preview.png" if options else "https://files/a.png"
+
+    async def pdf(html_content):
+        calls.append("pdf")
+        return "https://files/a.pdf"
+
+    service._render_html_template, service._generate_png, service._generate_pdf = html, png, pdf
+    request = RenderRequest(project_id="project_1", job_id="job_3", copy_data=copy_json(), assets={}, preview=True)
+
+    async def scenario():
+        response = await service.generate_preview(request)
+        await asyncio.sleep(0.05)
+        return response, await renders.get("job_3")
+
+    response, state = asyncio.run(scenario())
+    assert response.pdf_status == "pending"
+    assert state["status"] == "ready" and state["pdf_url"] == "https://files/a.pdf"
+    assert calls == ["preview", "pdf", "png"]
@@ -0,0 +1,47 @@
+import asyncio
+import os
+import time
+
+from app.services.blob_store import BlobStore
+
+def test_ingest_without_public_url_keeps_the_upstream_url(tmp_path):
+    store = BlobStore(str(tmp_path))
+
+    url = asyncio.run(store.ingest("https://hcti.io/v1/image/abc", "pdf"))
+
+    assert url == "https://hcti.io/v1/image/abc"
+    assert os.listdir(tmp_path) == []
+
+def test_identical_bytes_share_one_blob(tmp_path):
+    store = BlobStore(str(tmp_path), "https://api.example.com")
+
+    first, created = store.put(b"%PDF-1.4 one", "pdf")
+    second, created_again = store.put(b"%PDF-1.4 one", "pdf")
+
+    assert first == second and created and not created_again
+    assert store.resolve(f"{first}.pdf")[0] == store.path_for(first, "pdf")
+    assert store.url_for(first, "pdf") == f"https://api.example.com/api/blobs/{first}.pdf"
+
+def test_sweep_removes_expired_blobs_and_temp_files(tmp_path):
+    store = BlobStore(str(tmp_path), "https://api.example.com", retention=60)
+    old, _ = store.put(b"old", "png")
+    fresh, _ = store.put(b"fresh", "png")
+    stale_tmp = os.path.join(os.path.dirname(store.path_for(old, "png")), ".tmp-abandoned")
+    open(stale_tmp, "wb").close()
+    past = time.time() - 7200
+    os.utime(store.path_for(old, "png"), (past, past))
+    os.utime(stale_tmp, (past, past))
+
+    assert store.sweep() == 2
+    assert store.resolve(f"{old}.png") is None
+    assert store.resolve(f"{fresh}.png") is not None
+
+def test_rendering_again_restarts_retention(tmp_path):
+    store = BlobStore(str(tmp_path), "https://api.example.com", retention=60)
+    digest, _ = store.put(b"same", "png")
+    past = time.time() - 7200
+    os.utime(store.path_for(digest, "png"), (past, past))
+
+    store.put(b"same", "png")
+
+    assert store.sweep() == 0
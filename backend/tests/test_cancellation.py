@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import jobs
+from app.core.auth import Caller, get_caller
+from app.core.cancellation import OWNERS, JobCancelled, JobRegistry
+
+def test_cancel_reaches_a_job_on_another_worker(shared_db):
+    receiving, running = JobRegistry(poll_interval=0.01), JobRegistry(poll_interval=0.01)
+
+    async def job():
+        with running.track("job_1", "test", owner="user:alice"):
+            await asyncio.sleep(5)
+
+    async def scenario():
+        running.start()
+        task = asyncio.create_task(job())
+        await asyncio.sleep(0.02)
+        cancelled = await receiving.cancel("job_1")
+        assert cancelled["requests"] == 0  # nothing runs on the receiving worker
+        with pytest.raises(JobCancelled):
+            await asyncio.wait_for(task, 1.0)
+        await running.stop()
+        return running.stats
+
+    stats = asyncio.run(scenario())
+    assert stats["cancelled_elsewhere"] == 1
+    assert stats["cancelled_explicit"] == 1
+
+def test_owner_is_visible_to_other_workers(shared_db):
+    first, second = JobRegistry(), JobRegistry()
+
+    async def scenario():
+        with first.track("job_2", "test", owner="user:alice"):
+            await asyncio.sleep(0.01)  # owner is written in the background
+            return await first.owner("job_2"), await second.owner("job_2")
+
+    assert asyncio.run(scenario()) == ("user:alice", "user:alice")
+
+@pytest.mark.parametrize("caller, status", [
+    (Caller("user:alice"), 202),
+    (Caller("service", service=True), 202),
+    (Caller("user:bob"), 403),
+])
+def test_cancel_endpoint_checks_owner(shared_db, caller, status):
+    asyncio.run(shared_db.set(OWNERS, "job_3", "user:alice", 60))
+    app = FastAPI()
+    app.include_router(jobs.router, prefix="/api/jobs")
+    app.dependency_overrides[get_caller] = lambda: caller
+
+    response = TestClient(app).post("/api/jobs/job_3/cancel")
+
+    assert response.status_code == status
+
+def test_cancel_endpoint_unknown_job(shared_db):
+    app = FastAPI()
+    app.include_router(jobs.router, prefix="/api/jobs")
+    app.dependency_overrides[get_caller] = lambda: Caller("user:alice")
+
+    assert TestClient(app).post("/api/jobs/nope/cancel").status_code == 404
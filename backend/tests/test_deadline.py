@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from app.core.deadline import DeadlineExceeded, StageBudgets, remaining, reset_deadline, set_deadline
+
+def test_stage_gets_its_share_of_the_remaining_budget():
+    budgets = StageBudgets({"copy": 0.5}, min_seconds=0.01)
+
+    async def scenario():
+        token = set_deadline(1.0)
+        try:
+            return budgets.budget("copy"), remaining()
+        finally:
+            reset_deadline(token)
+
+    budget, left = asyncio.run(scenario())
+    assert 0.45 < budget <= 0.5
+    assert 0.9 < left <= 1.0
+
+def test_no_deadline_means_no_budget():
+    assert StageBudgets({}).budget("copy") is None
+
+def test_slow_stage_times_out():
+    budgets = StageBudgets({"copy": 0.5}, min_seconds=0.01)
+
+    async def scenario():
+        token = set_deadline(0.1)
+        try:
+            await budgets.run("copy", lambda: asyncio.sleep(1))
+        finally:
+            reset_deadline(token)
+
+    with pytest.raises(DeadlineExceeded) as exceeded:
+        asyncio.run(scenario())
+    assert not exceeded.value.skipped
+    assert budgets.stats["copy"]["timeouts"] == 1
+
+def test_stage_without_enough_time_is_skipped():
+    budgets = StageBudgets({"pdf": 1.0}, min_seconds=2.0)
+    started = []
+
+    async def work():
+        started.append(True)
+
+    async def scenario():
+        token = set_deadline(1.0)
+        try:
+            await budgets.run("pdf", work)
+        finally:
+            reset_deadline(token)
+
+    with pytest.raises(DeadlineExceeded) as exceeded:
+        asyncio.run(scenario())
+    assert exceeded.value.skipped
+    assert started == []
@@ -0,0 +1,60 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import health
+from app.core.config import settings
+from app.services.health_prober import HealthProber, UpstreamProbe
+
+@pytest.mark.parametrize("status, ok", [(200, True), (404, True), (401, False), (403, False), (429, False), (503, False)])
+def test_probe_treats_rejections_as_failures(status, ok):
+    async def answer(request):
+        return web.Response(status=status)
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get("/", answer)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        prober = HealthProber([UpstreamProbe("upstream", lambda: f"http://127.0.0.1:{port}/")])
+        prober._session = aiohttp.ClientSession()
+        try:
+            return await prober.probe_all()
+        finally:
+            await prober._session.close()
+            await runner.cleanup()
+
+    snapshot = asyncio.run(scenario())["upstream"]
+    assert snapshot["status"] == ("ok" if ok else "error")
+    assert snapshot["message"] == f"HTTP {status}"
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(health.router, prefix="/api")
+    return TestClient(app)
+
+@pytest.mark.parametrize("admin_token, sent, status", [
+    ("", None, 404),
+    ("secret", None, 403),
+    ("secret", "wrong", 403),
+    ("secret", "secret", 200),
+])
+def test_detailed_health_requires_admin(client, monkeypatch, admin_token, sent, status):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", admin_token)
+    headers = {"X-Admin-Token": sent} if sent else {}
+
+    assert client.get("/api/health/detailed", headers=headers).status_code == status
+
+def test_basic_health_is_public(client):
+    response = client.get("/api/health")
+
+    assert response.status_code == 200
+    assert set(response.json()["upstreams"]) == {"gemini", "htmlcsstoimage"}
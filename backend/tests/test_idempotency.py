@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from app.services.idempotency import IdempotencyConflict, IdempotencyStore
+
+class Result(BaseModel):
+    value: int
+
+class Work:
+    """Counts executions; each one takes `delay` seconds"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def __call__(self) -> Result:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream failed")
+        return Result(value=self.calls)
+
+def test_retry_replays_for_the_same_owner_only(shared_db):
+    store, work = IdempotencyStore(), Work()
+
+    async def scenario():
+        first = await store.run("render", "job_1", "fp", work, Result, owner="user:alice")
+        retry = await store.run("render", "job_1", "fp", work, Result, owner="user:alice")
+        other = await store.run("render", "job_1", "fp", work, Result, owner="user:mallory")
+        return first, retry, other
+
+    first, retry, other = asyncio.run(scenario())
+    assert first == (Result(value=1), "executed")
+    assert retry == (Result(value=1), "replayed")
+    assert other == (Result(value=2), "executed")
+
+def test_different_request_conflicts(shared_db):
+    store = IdempotencyStore()
+
+    async def scenario():
+        await store.run("render", "job_1", "fp", Work(), Result, owner="user:alice")
+        await store.run("render", "job_1", "other", Work(), Result, owner="user:alice")
+
+    with pytest.raises(IdempotencyConflict):
+        asyncio.run(scenario())
+
+def test_failures_are_not_recorded(shared_db):
+    store, work = IdempotencyStore(), Work(fail=True)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await store.run("render", "job_1", "fp", work, Result, owner="user:alice")
+
+    asyncio.run(scenario())
+    assert work.calls == 2
+
+def test_retry_on_another_worker_attaches(shared_db):
+    # Two stores sharing one database stand in for two workers
+    first, second = IdempotencyStore(poll_interval=0.01), IdempotencyStore(poll_interval=0.01)
+    work = Work(delay=0.1)
+
+    async def scenario():
+        running = asyncio.create_task(first.run("render", "job_1", "fp", work, Result, owner="user:alice"))
+        await asyncio.sleep(0.02)
+        retry = await second.run("render", "job_1", "fp", work, Result, owner="user:alice")
+        later = await second.run("render", "job_1", "fp", work, Result, owner="user:alice")
+        return await running, retry, later
+
+    running, retry, later = asyncio.run(scenario())
+    assert work.calls == 1
+    assert running == (Result(value=1), "executed")
+    assert retry == (Result(value=1), "attached")
+    assert later == (Result(value=1), "replayed")
+
+def test_concurrent_retries_on_one_worker_share_the_task(shared_db):
+    store, work = IdempotencyStore(), Work(delay=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*(store.run("render", "job_1", "fp", work, Result, owner="user:alice")
+                                      for _ in range(3)))
+
+    outcomes = sorted(outcome for _, outcome in asyncio.run(scenario()))
+    assert work.calls == 1
+    assert outcomes == ["attached", "attached", "executed"]
@@ -0,0 +1,34 @@
+import pytest
+
+from app.services.industry_intelligence import IndustryIntelligence, IndustryMatcher
+
+@pytest.fixture(scope="module")
+def matcher():
+    return IndustryMatcher(
+        ["software", "restaurant", "professional_services"],
+        {"marketing": "professional_services", "food": "restaurant"},
+    )
+
+@pytest.mark.parametrize("business_type, industry", [
+    ("marketing software", "software"),  # an industry key beats an alias
+    ("professional", "professional_services"),  # part of a key
+    ("Food truck", "restaurant"),  # alias token, any case
+    ("SOFTWARE!!", "software"),
+    ("bakery", None),
+])
+def test_matcher_priority(matcher, business_type, industry):
+    assert matcher.match(business_type) == industry
+
+def test_classifier_handles_free_text_and_unknowns():
+    intelligence = IndustryIntelligence()
+
+    results = intelligence.classify_industries(["SaaS platform", "yoga studio", "zzz qqq"])
+
+    assert results[0] == ("software", 1.0)
+    assert results[1][0] == "fitness" and 0 < results[1][1] < 1
+    assert results[2][0] is None
+
+def test_unknown_business_type_gets_default_data():
+    intelligence = IndustryIntelligence()
+
+    assert intelligence.get_industry_data("zzz qqq") == intelligence.default_industry
@@ -0,0 +1,59 @@
+import json
+import os
+
+import pytest
+
+from app.services.industry_kb import IndustryKnowledgeBase, KnowledgeBaseError, compile_knowledge_base
+
+SOURCE = {
+    "version": 3,
+    "default": {"messaging_tone": "professional", "pain_points": ["Slow growth"]},
+    "industries": {"bakery": {"messaging_tone": "warm", "keywords": ["bread", "cake"]}},
+    "aliases": {"patisserie": "bakery"},
+}
+
+def _write(path, data, mtime=None):
+    path.write_text(json.dumps(data))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+def test_compiled_file_loads(tmp_path):
+    _write(tmp_path / "kb.json", SOURCE)
+    kb = IndustryKnowledgeBase(tmp_path / "kb.json", tmp_path / "kb.bin")
+
+    snapshot = kb.snapshot()
+    assert snapshot.version == 3
+    assert snapshot.get("bakery")["keywords"] == ["bread", "cake"]
+    assert snapshot.aliases == {"patisserie": "bakery"}
+
+@pytest.mark.parametrize("broken", [
+    [],
+    {key: value for key, value in SOURCE.items() if key != "default"},
+    {**SOURCE, "industries": ["bakery"]},
+    {**SOURCE, "industries": {"bakery": {"keywords": "bread"}}},
+    {**SOURCE, "industries": {"bakery": {"keywords": [1, 2]}}},
+    {**SOURCE, "default": {"messaging_tone": 5}},
+    {**SOURCE, "aliases": {"patisserie": "florist"}},
+    {**SOURCE, "version": "three"},
+])
+def test_malformed_source_raises_knowledge_base_error(tmp_path, broken):
+    _write(tmp_path / "kb.json", broken)
+
+    with pytest.raises(KnowledgeBaseError):
+        compile_knowledge_base(tmp_path / "kb.json", tmp_path / "kb.bin")
+
+def test_reload_keeps_last_version_when_source_breaks(tmp_path):
+    source = tmp_path / "kb.json"
+    _write(source, SOURCE, mtime=1_000_000)
+    kb = IndustryKnowledgeBase(source, tmp_path / "kb.bin", reload_interval=0)
+
+    _write(source, {**SOURCE, "industries": {"bakery": []}}, mtime=2_000_000_000)
+
+    assert kb.reload() is False
+    assert kb.snapshot().version == 3
+
+def test_startup_fails_cleanly_without_a_usable_version(tmp_path):
+    _write(tmp_path / "kb.json", {"industries": {}})
+
+    with pytest.raises(KnowledgeBaseError):
+        IndustryKnowledgeBase(tmp_path / "kb.json", tmp_path / "kb.bin")
@@ -0,0 +1,55 @@
+import asyncio
+from typing import Any, Dict, List
+
+from app.services.job_status import CallbackRejected, CallbackSink, JobStatusReporter
+
+class RecordingSink(CallbackSink):
+    """Keeps sent batches; rejects updates for the given job ids"""
+
+    def __init__(self, reject=()):
+        self.batches: List[List[Dict[str, Any]]] = []
+        self.reject = set(reject)
+
+    async def send(self, updates: List[Dict[str, Any]]) -> None:
+        if any(update["jobId"] in self.reject for update in updates):
+            raise CallbackRejected("invalid job")
+        self.batches.append(updates)
+
+def test_updates_for_a_job_are_coalesced():
+    sink = RecordingSink()
+    reporter = JobStatusReporter(sink)
+
+    reporter.report("job_1", progress=40, stage="copy")
+    reporter.report("job_1", progress=20, stage="pdf", pdfUrl="https://files/a.pdf", pngUrl=None)
+    reporter.report("job_2", progress=10)
+    asyncio.run(reporter.flush())
+
+    assert len(sink.batches) == 1
+    update = next(update for update in sink.batches[0] if update["jobId"] == "job_1")
+    assert update["progress"] == 40  # never goes backwards
+    assert update["pdfUrl"] == "https://files/a.pdf"
+    assert "pngUrl" not in update
+    assert reporter.stats["coalesced"] == 1
+
+def test_rejected_update_does_not_drop_the_rest_of_the_batch():
+    sink = RecordingSink(reject={"bad"})
+    reporter = JobStatusReporter(sink)
+
+    for job_id in ("job_1", "bad", "job_2"):
+        reporter.report(job_id, progress=10)
+    asyncio.run(reporter.flush())
+
+    assert sorted(batch[0]["jobId"] for batch in sink.batches) == ["job_1", "job_2"]
+    assert reporter.stats["rejected"] == 1
+
+def test_failed_batch_is_requeued():
+    class FlakySink(RecordingSink):
+        async def send(self, updates):
+            raise OSError("down")
+
+    reporter = JobStatusReporter(FlakySink(), max_retries=0)
+    reporter.report("job_1", progress=10)
+    asyncio.run(reporter.flush())
+
+    assert reporter.stats["failed"] == 1
+    assert "job_1" in reporter._pending
@@ -0,0 +1,93 @@
+import asyncio
+
+from app.models.content import ContentRequest
+from app.services.prewarm import PrewarmStore
+
+def _request(description: str = "Bread") -> ContentRequest:
+    return ContentRequest(
+        business_info={"name": "Acme", "type": "bakery", "description": description},
+        selected_features=["Fresh daily"],
+        project_id="project_1",
+    )
+
+class Analyze:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+
+    async def __call__(self, request: ContentRequest) -> dict:
+        self.calls.append(request.business_info.description)
+        await asyncio.sleep(self.delay)
+        return {"unique_value_prop": request.business_info.description}
+
+def test_parked_analysis_is_taken_on_another_worker(shared_db):
+    saving, generating = PrewarmStore(debounce=0), PrewarmStore(debounce=0)
+    analyze = Analyze()
+
+    async def scenario():
+        assert await saving.start("project_1", _request(), analyze) == "started"
+        await asyncio.sleep(0.05)
+        return await generating.take("project_1", _request())
+
+    assert asyncio.run(scenario()) == {"unique_value_prop": "Bread"}
+    assert generating.stats["hits"] == 1
+
+def test_running_analysis_is_waited_for_on_another_worker(shared_db):
+    saving, generating = PrewarmStore(debounce=0), PrewarmStore(debounce=0, poll_interval=0.01)
+
+    async def scenario():
+        await saving.start("project_1", _request(), Analyze(delay=0.1))
+        await asyncio.sleep(0.02)
+        return await generating.take("project_1", _request())
+
+    assert asyncio.run(scenario()) == {"unique_value_prop": "Bread"}
+    assert generating.stats["inflight_hits"] == 1
+
+def test_burst_of_saves_runs_one_analysis(shared_db):
+    store = PrewarmStore(debounce=0.05)
+    analyze = Analyze()
+
+    async def scenario():
+        for description in ("B", "Br", "Bread"):
+            await store.start("project_1", _request(description), analyze)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+    assert analyze.calls == ["Bread"]
+    assert store.stats["superseded"] == 2
+
+def test_generation_calls_off_a_debouncing_prewarm(shared_db):
+    store = PrewarmStore(debounce=0.05)
+    analyze = Analyze()
+
+    async def scenario():
+        await store.start("project_1", _request(), analyze)
+        taken = await store.take("project_1", _request())
+        await asyncio.sleep(0.1)
+        return taken
+
+    assert asyncio.run(scenario()) is None
+    assert analyze.calls == []
+
+def test_prewarms_are_capped_per_user(shared_db):
+    store = PrewarmStore(debounce=0.05, user_limit=2)
+    analyze = Analyze()
+
+    async def scenario():
+        statuses = [await store.start(f"project_{i}", _request(), analyze, owner="user:alice") for i in range(3)]
+        statuses.append(await store.start("project_9", _request(), analyze, owner="user:bob"))
+        await store.stop()
+        return statuses
+
+    assert asyncio.run(scenario()) == ["started", "started", "throttled", "started"]
+
+def test_changed_inputs_miss(shared_db):
+    store = PrewarmStore(debounce=0)
+
+    async def scenario():
+        await store.start("project_1", _request(), Analyze())
+        await asyncio.sleep(0.05)
+        return await store.take("project_1", _request("Cakes"))
+
+    assert asyncio.run(scenario()) is None
+    assert store.stats["stale"] == 1
@@ -0,0 +1,59 @@
+import asyncio
+import base64
+
+import pytest
+from aiohttp import web
+
+from app.services import render_service as render_service_module
+from app.services.render_service import RenderService, _PublicResolver, _asset_url_allowed
+
+@pytest.mark.parametrize("url, allowed", [
+    ("https://happy-otter-123.convex.cloud/api/storage/abc", True),
+    ("http://happy-otter-123.convex.cloud/api/storage/abc", False),
+    ("https://convex.cloud.attacker.example/logo.png", False),
+    ("https://attacker.example/logo.png", False),
+    ("https://127.0.0.1/logo.png", False),
+    ("https://169.254.169.254/latest/meta-data", False),
+    ("https://[::1]/logo.png", False),
+    ("file:///etc/passwd", False),
+])
+def test_asset_url_allowed(url, allowed):
+    assert _asset_url_allowed(url) is allowed
+
+def test_resolver_rejects_internal_addresses():
+    async def resolve():
+        return await _PublicResolver().resolve("localhost", 443)
+
+    with pytest.raises(OSError):
+        asyncio.run(resolve())
+
+def test_disallowed_assets_keep_their_url():
+    service = RenderService.__new__(RenderService)
+    assets = {"logo": "http://127.0.0.1:1/logo.png", "photo": "https://10.0.0.5/photo.png"}
+
+    assert asyncio.run(service.prefetch_assets(assets)) == assets
+
+def test_allowed_asset_is_inlined(monkeypatch):
+    monkeypatch.setattr(render_service_module, "_asset_url_allowed", lambda url: True)
+    image = bytes(range(256)) * 1024  # several read chunks
+
+    async def logo(request):
+        return web.Response(body=image, content_type="image/png")
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get("/logo.png", logo)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            service = RenderService.__new__(RenderService)
+            return await service.prefetch_assets({"logo": f"http://127.0.0.1:{port}/logo.png"})
+        finally:
+            await runner.cleanup()
+
+    inlined = asyncio.run(scenario())["logo"]
+    assert inlined.startswith("data:image/png;base64,")
+    assert base64.b64decode(inlined.split(",", 1)[1]) == image
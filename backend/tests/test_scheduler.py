@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from app.core.scheduler import LaneScheduler
+
+def test_lanes_share_capacity_by_weight():
+    scheduler = LaneScheduler("test", capacity=1, weights={"interactive": 3, "print": 1}, max_wait=60)
+    granted = []
+
+    async def job(lane):
+        async with scheduler.slot(lane):
+            granted.append(lane)
+            await asyncio.sleep(0)
+
+    async def scenario():
+        lane, _ = await scheduler.acquire("print")  # hold the only slot while both lanes queue up
+        tasks = [asyncio.create_task(job(lane)) for lane in ["print"] * 4 + ["interactive"] * 12]
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert granted[:8].count("interactive") == 6
+
+def test_old_waiters_are_served_first():
+    scheduler = LaneScheduler("test", capacity=1, weights={"interactive": 100, "print": 1}, max_wait=0.0)
+    granted = []
+
+    async def job(lane):
+        async with scheduler.slot(lane):
+            granted.append(lane)
+
+    async def scenario():
+        await scheduler.acquire("interactive")
+        tasks = [asyncio.create_task(job("print"))]
+        await asyncio.sleep(0.01)
+        tasks.append(asyncio.create_task(job("interactive")))
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert granted == ["print", "interactive"]
+    assert scheduler.metrics()["lanes"]["print"]["aged"] == 1
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    scheduler = LaneScheduler("test", capacity=1, weights={"standard": 1})
+
+    async def scenario():
+        await scheduler.acquire()
+        waiter = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        scheduler.release()
+        return scheduler.active, scheduler.metrics()["lanes"]["standard"]["waiting"]
+
+    assert asyncio.run(scenario()) == (0, 0)
@@ -0,0 +1,46 @@
+import asyncio
+
+from app.core.shared_state import SharedState
+
+def test_records_are_visible_across_instances(tmp_path):
+    path = str(tmp_path / "shared.db")
+    first, second = SharedState(path), SharedState(path)
+
+    async def scenario():
+        await first.start()
+        await second.start()
+        await first.set("ns", "key", {"value": 1}, ttl=60)
+        return await second.get("ns", "key")
+
+    assert asyncio.run(scenario()) == {"value": 1}
+
+def test_add_only_once_until_expired():
+    state = SharedState("unused")  # not started: in-memory
+
+    async def scenario():
+        results = [await state.add("ns", "key", 1, ttl=60), await state.add("ns", "key", 2, ttl=60)]
+        await state.set("ns", "short", 1, ttl=-1)
+        results.append(await state.add("ns", "short", 2, ttl=60))
+        return results, await state.get("ns", "key")
+
+    assert asyncio.run(scenario()) == ([True, False, True], 1)
+
+def test_incr_counts_within_window():
+    state = SharedState("unused")
+
+    async def scenario():
+        counts = [await state.incr("ns", "user", ttl=60) for _ in range(3)]
+        counts.append(await state.incr("ns", "other", ttl=60))
+        return counts
+
+    assert asyncio.run(scenario()) == [1, 2, 3, 1]
+
+def test_expired_records_are_not_returned():
+    state = SharedState("unused")
+
+    async def scenario():
+        await state.set("ns", "gone", 1, ttl=-1)
+        await state.set("ns", "kept", 2, ttl=60)
+        return await state.get_many("ns", ["gone", "kept"])
+
+    assert asyncio.run(scenario()) == {"kept": 2}
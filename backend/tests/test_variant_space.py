@@ -0,0 +1,43 @@
+import itertools
+
+import pytest
+
+from app.services.variant_space import DIMENSIONS, VariantSpace, variant_space
+from app.services.variant_system import VariantSystem
+
+def test_index_holds_exactly_the_valid_combinations():
+    valid = [
+        combination
+        for values in itertools.product(*DIMENSIONS.values())
+        if variant_space.is_valid(combination := dict(zip(DIMENSIONS, values)))
+    ]
+
+    assert len(variant_space) == len(valid)
+    assert sorted(variant_space.codes) == sorted(variant_space.encode(combination) for combination in valid)
+
+def test_encode_unpack_roundtrip():
+    for code in variant_space.codes[::997]:
+        assert variant_space.encode(variant_space.unpack(code)) == code
+
+@pytest.mark.parametrize("palette", DIMENSIONS["palette_pack"])
+def test_seed_respects_palette_preference(palette):
+    for seed in range(0, 10**6, 9973):
+        code, combination = variant_space.decode_seed(seed, palette)
+        assert combination["palette_pack"] == palette
+        assert variant_space.is_valid(combination)
+
+def test_curated_variant_sets_are_in_the_space():
+    for variant in VariantSystem.VARIANT_SETS:
+        code = variant_space.encode({name: getattr(variant, name) for name in DIMENSIONS})
+        assert code in variant_space.codes
+
+def test_variant_config_is_deterministic_per_project():
+    first = VariantSystem.generate_variant_config("project_1")
+
+    assert VariantSystem.generate_variant_config("project_1") == first
+    assert VariantSystem.generate_variant_config("project_1", palette_preference="pewter_gold")["palette"]["name"] \
+        == VariantSystem.get_palette("pewter_gold").name
+
+def test_space_wider_than_32_bits_is_refused():
+    with pytest.raises(ValueError):
+        VariantSpace({f"d{i}": tuple(map(str, range(16))) for i in range(9)}, rules=[])
@@ -1,9 +1,21 @@
-import { action } from "./_generated/server";
+import { action, internalAction } from "./_generated/server";
 import { v } from "convex/values";
 import { api } from "./_generated/api";
 
 // FastAPI Backend Configuration  
 const FASTAPI_BASE_URL = process.env.FASTAPI_BASE_URL || "http://localhost:8000";
+// Return a fast PNG preview first; the print PDF URL arrives later via /jobs/progress
+const BROCHURE_PREVIEW = process.env.BROCHURE_PREVIEW === "true";
+// Shared with the backend (SERVICE_TOKEN there); lets it apply per-user limits
+// to our calls, which all come from the same Convex egress address
+const SERVICE_TOKEN = process.env.SERVICE_TOKEN || "";
+
+function serviceHeaders(userId?: string): Record<string, string> {
+  if (!SERVICE_TOKEN) {
+    return {};
+  }
+  return userId ? { "X-Service-Token": SERVICE_TOKEN, "X-On-Behalf-Of": userId } : { "X-Service-Token": SERVICE_TOKEN };
+}
 
 
 // Trigger AI content generation and PDF creation
@@ -66,41 +78,19 @@ export const generateBrochure = action({
         }
       }
 
-      // Update progress
-      await ctx.runMutation(api.jobs.updateStatus, {
-        jobId,
-        status: "running",
-        progress: 25,
-      });
-
-      // Step 1: Generate AI content
-      const aiResponse = await generateAIContent(project, assetUrls);
-      
-      // Update progress
-      await ctx.runMutation(api.jobs.updateStatus, {
-        jobId,
-        status: "running", 
-        progress: 60,
-      });
-
-      // Step 2: Generate PDF
-      const renderResponse = await generatePDF({
+      // Generate copy and render PDF in one backend call; the backend pushes
+      // per-stage progress in batches to the /jobs/progress HTTP action
+      const brochure = await generateBrochurePipeline({
         projectId,
         jobId,
-        copyData: aiResponse.copy_data,
+        userId: project.userId,
+        project,
         assets: assetUrls,
       });
 
-      // Update progress
-      await ctx.runMutation(api.jobs.updateStatus, {
-        jobId,
-        status: "running",
-        progress: 85,
-      });
-
       // Step 3: Store render results in Convex
       // Handle null palette by converting to undefined (Convex prefers undefined over null)
-      const copyData = { ...aiResponse.copy_data };
+      const copyData = { ...brochure.copy_data };
       if (copyData.palette === null) {
         delete copyData.palette; // Remove null values, let optional field be undefined
       }
@@ -113,13 +103,13 @@ export const generateBrochure = action({
           template: "product_a",
           palette: { primary: "#2563eb" }
         },
-        pdfUrl: renderResponse?.pdf_url || "pending",
+        pdfUrl: brochure?.pdf_url || "pending",
         clerkId: projectOwner?.clerkId, // Pass clerkId for local development auth bypass
       };
       
       // Only include pngUrl if it exists (Convex optional fields need undefined, not null)
-      if (renderResponse?.png_url) {
-        renderData.pngUrl = renderResponse.png_url;
+      if (brochure?.png_url) {
+        renderData.pngUrl = brochure.png_url;
       }
       
       const renderId: any = await ctx.runMutation(api.renders.create, renderData);
@@ -154,9 +144,17 @@ export const generateBrochure = action({
   },
 });
 
-// Helper function to call FastAPI AI generation
-async function generateAIContent(project: any, assets: Record<string, string>) {
-  const requestBody = {
+// W3C traceparent for a new sampled trace, so backend spans for this job share one trace id
+function newTraceparent(): string {
+  const hex = (bytes: number) =>
+    Array.from(crypto.getRandomValues(new Uint8Array(bytes)), (b) => b.toString(16).padStart(2, "0")).join("");
+  return `00-${hex(16)}-${hex(8)}-01`;
+}
+
+// Business info and features as the backend's analysis stage sees them. Prewarm
+// and generate must send identical inputs for a parked analysis to be reused.
+function analysisInputs(project: any) {
+  return {
     business_info: {
       name: project.businessInfo.name,
       type: project.businessInfo.type,
@@ -164,57 +162,108 @@ async function generateAIContent(project: any, assets: Record<string, string>) {
       target_audience: project.businessInfo.audience || "General audience",
       key_benefits: project.features.map((f: any) => f.title)
     },
-    selected_features: project.features.map((f: any) => f.title)
+    selected_features: project.features.map((f: any) => f.title),
   };
+}
 
+// Start the business analysis speculatively when a project is saved, so
+// generation can skip stage 1. Best effort - failures only cost the speedup.
+export const prewarmAnalysis = internalAction({
+  args: {
+    projectId: v.id("projects"),
+  },
+  handler: async (ctx, { projectId }) => {
+    try {
+      const project = await ctx.runQuery(api.projects.getById, { projectId });
+      if (!project || project.features.length === 0) {
+        return;
+      }
 
-  const response = await fetch(`${FASTAPI_BASE_URL}/api/ai/generate-copy`, {
-    method: "POST",
-    headers: {
-      "Content-Type": "application/json",
-      // TODO: Add Clerk JWT token for authentication
-      // "Authorization": `Bearer ${clerkToken}`,
-    },
-    body: JSON.stringify(requestBody),
-  });
-
-
-  if (!response.ok) {
-    const errorText = await response.text();
-    throw new Error(`AI generation failed: ${response.status} - ${errorText}`);
-  }
+      const response = await fetch(`${FASTAPI_BASE_URL}/api/ai/prewarm`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          "traceparent": newTraceparent(),
+          ...serviceHeaders(project.userId),
+        },
+        body: JSON.stringify({ project_id: projectId, ...analysisInputs(project) }),
+      });
+      if (!response.ok) {
+        console.warn(`Prewarm for project ${projectId} failed: ${response.status}`);
+      }
+    } catch (error) {
+      console.warn(`Prewarm for project ${projectId} failed:`, error);
+    }
+  },
+});
 
-  return await response.json();
-}
+// Stop the backend work for a cancelled job, on whichever worker runs it.
+// Best effort - 404 just means nothing was running for it any more.
+export const cancelJob = internalAction({
+  args: {
+    jobId: v.id("jobs"),
+  },
+  handler: async (ctx, { jobId }) => {
+    try {
+      const response = await fetch(`${FASTAPI_BASE_URL}/api/jobs/${jobId}/cancel`, {
+        method: "POST",
+        headers: {
+          "traceparent": newTraceparent(),
+          ...serviceHeaders(),
+        },
+      });
+      if (!response.ok && response.status !== 404) {
+        console.warn(`Cancel for job ${jobId} failed: ${response.status}`);
+      }
+    } catch (error) {
+      console.warn(`Cancel for job ${jobId} failed:`, error);
+    }
+  },
+});
 
-// Helper function to call FastAPI PDF generation
-async function generatePDF(params: {
+// Helper function to call the FastAPI end-to-end brochure pipeline
+// (copy generation + validation + rendering in a single request)
+async function generateBrochurePipeline(params: {
   projectId: string;
   jobId: string;
-  copyData: any;
+  userId: string;
+  project: any;
   assets: Record<string, string>;
 }) {
+  const { project } = params;
   const requestBody = {
     project_id: params.projectId,
     job_id: params.jobId,
-    copy_data: params.copyData,
+    ...analysisInputs(project),
     assets: params.assets,
-    template: "product_a"
+    template: "product_a",
+    preview: BROCHURE_PREVIEW
   };
 
-  const response = await fetch(`${FASTAPI_BASE_URL}/api/render/generate`, {
+  const traceparent = newTraceparent();
+  console.log(`Brochure pipeline for job ${params.jobId}: traceparent ${traceparent}`);
+
+  const send = () => fetch(`${FASTAPI_BASE_URL}/api/brochure/generate`, {
     method: "POST",
     headers: {
       "Content-Type": "application/json",
-      // TODO: Add Clerk JWT token for authentication
-      // "Authorization": `Bearer ${clerkToken}`,
+      "traceparent": traceparent,
+      ...serviceHeaders(params.userId),
     },
     body: JSON.stringify(requestBody),
   });
 
+  // The backend sheds load with 429/503 + Retry-After; honor it a couple of times
+  let response = await send();
+  for (let attempt = 0; attempt < 2 && (response.status === 429 || response.status === 503); attempt++) {
+    const retryAfter = Number(response.headers.get("Retry-After") || "1");
+    await new Promise((resolve) => setTimeout(resolve, Math.min(retryAfter, 30) * 1000));
+    response = await send();
+  }
+
   if (!response.ok) {
     const errorText = await response.text();
-    throw new Error(`PDF generation failed: ${response.status} - ${errorText}`);
+    throw new Error(`Brochure generation failed: ${response.status} - ${errorText}`);
   }
 
   return await response.json();
@@ -0,0 +1,30 @@
+import { httpRouter } from "convex/server";
+import { httpAction } from "./_generated/server";
+import { internal } from "./_generated/api";
+
+const http = httpRouter();
+
+// Batched job progress from the FastAPI backend (see backend/app/services/job_status.py)
+http.route({
+  path: "/jobs/progress",
+  method: "POST",
+  handler: httpAction(async (ctx, request) => {
+    const secret = process.env.JOB_CALLBACK_SECRET;
+    if (secret && request.headers.get("Authorization") !== `Bearer ${secret}`) {
+      return new Response("Unauthorized", { status: 401 });
+    }
+
+    const { updates } = await request.json();
+    if (!Array.isArray(updates)) {
+      return new Response("Expected { updates: [...] }", { status: 400 });
+    }
+
+    const result = await ctx.runMutation(internal.jobs.applyProgressBatch, { updates });
+    return new Response(JSON.stringify(result), {
+      status: 200,
+      headers: { "Content-Type": "application/json" },
+    });
+  }),
+});
+
+export default http;
@@ -1,7 +1,7 @@
 import { v } from "convex/values";
-import { mutation, query } from "./_generated/server";
+import { internalMutation, mutation, query } from "./_generated/server";
 import { getCurrentUser } from "./users";
-import { api } from "./_generated/api";
+import { api, internal } from "./_generated/api";
 
 // Create a new job
 export const create = mutation({
@@ -189,6 +189,61 @@ export const updateStatus = mutation({
   },
 });
 
+// Apply a batch of coalesced progress updates pushed by the FastAPI backend
+export const applyProgressBatch = internalMutation({
+  args: {
+    updates: v.array(
+      v.object({
+        jobId: v.string(),
+        status: v.literal("running"),
+        progress: v.optional(v.number()),
+        stage: v.optional(v.string()),
+        error: v.optional(v.string()),
+        // Set when a background print render (preview mode) finishes
+        pdfUrl: v.optional(v.string()),
+        pngUrl: v.optional(v.string()),
+        updatedAt: v.number(),
+      })
+    ),
+  },
+  handler: async (ctx, { updates }) => {
+    let applied = 0;
+    for (const update of updates) {
+      const jobId = ctx.db.normalizeId("jobs", update.jobId);
+      const job = jobId ? await ctx.db.get(jobId) : null;
+
+      // Print PDFs from preview mode land after the job is done - attach them to its render
+      if (jobId && update.pdfUrl) {
+        const render = await ctx.db
+          .query("renders")
+          .withIndex("by_jobId", (q) => q.eq("jobId", jobId))
+          .first();
+        if (render) {
+          await ctx.db.patch(render._id, {
+            pdfUrl: update.pdfUrl,
+            ...(update.pngUrl ? { pngUrl: update.pngUrl } : {}),
+          });
+        }
+      }
+
+      // Skip unknown jobs and jobs that already finished or were cancelled
+      if (!jobId || !job || job.status === "done" || job.status === "error") {
+        continue;
+      }
+
+      await ctx.db.patch(jobId, {
+        status: "running",
+        // Batches can arrive out of order after retries - never move progress back
+        progress: Math.max(job.progress, update.progress ?? job.progress),
+        updatedAt: Date.now(),
+      });
+      applied++;
+    }
+
+    return { applied, skipped: updates.length - applied };
+  },
+});
+
 // Get jobs by status
 export const getByStatus = query({
   args: {
@@ -252,6 +307,9 @@ export const cancel = mutation({
       updatedAt: Date.now(),
     });
 
+    // Stop the backend work too, so it doesn't keep spending Gemini/HCTI calls
+    await ctx.scheduler.runAfter(0, internal.fastapi.cancelJob, { jobId });
+
     return { success: true };
   },
 });
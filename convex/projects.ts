@@ -1,6 +1,7 @@
 import { v } from "convex/values";
 import { mutation, query } from "./_generated/server";
 import { getCurrentUser } from "./users";
+import { internal } from "./_generated/api";
 
 // Create a new project
 export const create = mutation({
@@ -44,6 +45,9 @@ export const create = mutation({
       updatedAt: Date.now(),
     });
 
+    // Warm the backend's business analysis while the user finishes up
+    await ctx.scheduler.runAfter(0, internal.fastapi.prewarmAnalysis, { projectId });
+
     return projectId;
   },
 });
@@ -173,6 +177,11 @@ export const update = mutation({
       updatedAt: Date.now(),
     });
 
+    // Business info or features changed - the parked analysis is stale, warm a new one
+    if (updates.businessInfo || updates.features) {
+      await ctx.scheduler.runAfter(0, internal.fastapi.prewarmAnalysis, { projectId });
+    }
+
     return projectId;
   },
 });